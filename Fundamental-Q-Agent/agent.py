@@ -7,36 +7,156 @@ Agent模块：流程控制、推理调度
 import os
 import json
 import time
-from typing import Dict, List, Tuple, Optional
-import openai
-from config import Config, ModelProvider
+import threading
+from typing import Dict, List, Tuple, Optional, Iterator
+from client_pool import get_client
+from config import Config
 from factors import Factors
 from prompt import SystemPrompt
+from racing import ProviderRace, iter_stream_content
+from response_cache import ResponseCache
 from storage import Storage
 
 
+class SectionParser:
+    """模型输出的增量段落解析器
+    
+    按行解析【决策结论】/【关键事实】/【推理逻辑】/【风险提示】四个段落，每收到一个完整行
+    就返回该行产生的段落内容，流式输出与一次性输出共用同一套解析规则。
+    """
+    
+    def __init__(self):
+        """初始化解析器"""
+        self.result = {
+            "conclusion": "",
+            "key_facts": [],
+            "reasoning": "",
+            "risks": []
+        }
+        self._section = None
+        self._buffer = ""
+    
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """输入一段模型输出
+        
+        Args:
+            text: 新到达的文本片段
+            
+        Returns:
+            List[Tuple[str, str]]: 本次解析出的(段落名, 内容)列表
+        """
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        events = []
+        for line in lines:
+            event = self._parse_line(line)
+            if event:
+                events.append(event)
+        return events
+    
+    def close(self) -> List[Tuple[str, str]]:
+        """处理末尾没有换行符的最后一行
+        
+        Returns:
+            List[Tuple[str, str]]: 解析出的(段落名, 内容)列表
+        """
+        line, self._buffer = self._buffer, ""
+        event = self._parse_line(line)
+        return [event] if event else []
+    
+    def snapshot(self) -> Dict:
+        """获取当前已解析结果的副本
+        
+        Returns:
+            Dict: 已解析的分析结果
+        """
+        return {
+            "conclusion": self.result["conclusion"],
+            "key_facts": list(self.result["key_facts"]),
+            "reasoning": self.result["reasoning"],
+            "risks": list(self.result["risks"])
+        }
+    
+    def _parse_line(self, line: str) -> Optional[Tuple[str, str]]:
+        """解析一个完整行
+        
+        Args:
+            line: 行文本
+            
+        Returns:
+            Optional[Tuple[str, str]]: (段落名, 内容)，该行不产生内容时返回None
+        """
+        line = line.strip()
+        if not line:
+            return None
+        
+        result = self.result
+        if line.startswith("【决策结论】"):
+            self._section = "conclusion"
+            result["conclusion"] = line.replace("【决策结论】", "").strip()
+            return ("conclusion", result["conclusion"]) if result["conclusion"] else None
+        elif line.startswith("【关键事实】"):
+            self._section = "key_facts"
+        elif line.startswith("【推理逻辑】"):
+            self._section = "reasoning"
+            result["reasoning"] = line.replace("【推理逻辑】", "").strip()
+            return ("reasoning", result["reasoning"]) if result["reasoning"] else None
+        elif line.startswith("【风险提示】"):
+            self._section = "risks"
+        elif self._section == "key_facts":
+            if len(result["key_facts"]) < Config.MAX_KEY_FACTS:
+                result["key_facts"].append(line)
+                return ("key_facts", line)
+        elif self._section == "reasoning":
+            result["reasoning"] += " " + line
+            return ("reasoning", line)
+        elif self._section == "risks":
+            if len(result["risks"]) < Config.MAX_RISKS:
+                result["risks"].append(line)
+                return ("risks", line)
+        return None
+
+
 class FundamentalQAgent:
     """基本面量化决策智能体"""
     
-    def __init__(self, api_key: str, model_provider: str = "kimi", model_name: str = "moonshot-v1-8k"):
+    # 模型调用统计：analyses 分析次数，fast_path 排雷快速通道次数，cache_hits 响应缓存命中次数，
+    # llm_calls 主模型调用次数，cheap_llm_calls 低价模型调用次数
+    _llm_stats: Dict[str, int] = {"analyses": 0, "fast_path": 0, "cache_hits": 0, "llm_calls": 0, "cheap_llm_calls": 0}
+    _llm_stats_lock = threading.Lock()
+    
+    def __init__(self, api_key: str, model_provider: str = "kimi", model_name: str = "moonshot-v1-8k",
+                 hedge_providers: Optional[Dict[str, Dict]] = None):
         """初始化智能体
         
         Args:
             api_key: API密钥
             model_provider: 模型提供商
             model_name: 模型名称
+            hedge_providers: 备用提供商配置，如 {"openai": {"api_key": "...", "model_name": "gpt-4o-mini"}}，
+                提供后启用多提供商竞速
         """
         self.api_key = api_key
         self.model_provider = model_provider
         self.model_name = model_name
+        self._cheap_model_warned = False
         
-        # 配置OpenAI客户端
-        self.client = openai.OpenAI(
-            api_key=api_key,
-            base_url=ModelProvider.get_api_base(model_provider)
-        )
+        # OpenAI客户端（从客户端池复用，保持长连接）
+        self.client = get_client(model_provider, api_key)
+        
+        # 多提供商竞速
+        self.race = None
+        if hedge_providers:
+            endpoints = {model_provider: (self.client, model_name)}
+            for provider, provider_config in hedge_providers.items():
+                if provider == model_provider:
+                    continue
+                client = get_client(provider, provider_config["api_key"], provider_config.get("base_url"))
+                endpoints[provider] = (client, provider_config["model_name"])
+            self.race = ProviderRace(endpoints)
     
-    def analyze(self, stock_code: str, company_name: str, factor_data: Dict, business_data: Dict) -> Dict:
+    def analyze(self, stock_code: str, company_name: str, factor_data: Dict, business_data: Dict,
+                bypass_cache: bool = False) -> Dict:
         """执行分析流程
         
         Args:
@@ -44,6 +164,7 @@ class FundamentalQAgent:
             company_name: 公司名称
             factor_data: 因子数据
             business_data: 业务数据
+            bypass_cache: 是否跳过模型响应缓存，强制重新调用模型
             
         Returns:
             Dict: 分析结果
@@ -56,28 +177,28 @@ class FundamentalQAgent:
                     "error": f"因子数据无效: {'; '.join(errors)}"
                 }
             
-            # 2. 排雷
-            minefield_passed, minefield_result = Factors.check_minefields(factor_data, business_data)
+            # 2. 排雷（命中硬否决规则时不调用模型，直接给出"不碰"结论）
+            minefield_mask = Factors.minefield_mask(factor_data, business_data)
+            minefield_passed, minefield_result = Factors.minefield_result(minefield_mask, factor_data, business_data)
+            self._record_stat("analyses")
+            if self._is_hard_reject(minefield_mask):
+                formatted_result = self._fast_path_result(minefield_mask, factor_data, business_data)
+                self._save_analysis(stock_code, company_name, factor_data, business_data, formatted_result)
+                return formatted_result
             
             # 3. 因子评分
             score_result = Factors.score_factors(factor_data)
             
-            # 4. 模型推理
-            analysis_result = self._model_reasoning(factor_data, business_data, minefield_result, score_result)
+            # 4. 模型推理（边缘情况可改用低价模型）
+            cheap_model = self._select_cheap_model(minefield_mask, score_result)
+            analysis_result = self._model_reasoning(factor_data, business_data, minefield_result, score_result,
+                                                   bypass_cache=bypass_cache, cheap_model=cheap_model)
             
             # 5. 格式化输出
             formatted_result = self._format_output(analysis_result, factor_data, business_data)
             
             # 6. 本地缓存
-            cache_data = {
-                "stock_code": stock_code,
-                "company_name": company_name,
-                "factor_data": factor_data,
-                "business_data": business_data,
-                "analysis_result": formatted_result,
-                "timestamp": time.time()
-            }
-            Storage.set_factor_cache(stock_code, cache_data)
+            self._save_analysis(stock_code, company_name, factor_data, business_data, formatted_result)
             
             return formatted_result
             
@@ -86,33 +207,333 @@ class FundamentalQAgent:
                 "error": f"分析失败: {str(e)}"
             }
     
-    def _model_reasoning(self, factor_data: Dict, business_data: Dict, minefield_result: str, score_result: Dict) -> str:
+    def analyze_stream(self, stock_code: str, company_name: str, factor_data: Dict, business_data: Dict,
+                       bypass_cache: bool = False) -> Iterator[Dict]:
+        """流式执行分析流程
+        
+        模型每输出一个完整行就产出解析到的段落内容，决策结论无需等待完整生成即可展示
+        
+        Args:
+            stock_code: 股票代码
+            company_name: 公司名称
+            factor_data: 因子数据
+            business_data: 业务数据
+            bypass_cache: 是否跳过模型响应缓存，强制重新调用模型
+            
+        Yields:
+            Dict: 段落事件 {"type": "section", "section": 段落名, "content": 内容, "partial": 已解析结果}，
+                结束时产出 {"type": "result", "result": 分析结果}，失败时产出 {"type": "error", "error": 错误信息}
+        """
+        try:
+            valid, errors = Factors.validate_factors(factor_data)
+            if not valid:
+                yield {"type": "error", "error": f"因子数据无效: {'; '.join(errors)}"}
+                return
+            
+            minefield_mask = Factors.minefield_mask(factor_data, business_data)
+            minefield_passed, minefield_result = Factors.minefield_result(minefield_mask, factor_data, business_data)
+            self._record_stat("analyses")
+            if self._is_hard_reject(minefield_mask):
+                formatted_result = self._fast_path_result(minefield_mask, factor_data, business_data)
+                self._save_analysis(stock_code, company_name, factor_data, business_data, formatted_result)
+                yield {"type": "result", "result": formatted_result}
+                return
+            
+            score_result = Factors.score_factors(factor_data)
+            
+            parser = SectionParser()
+            chunks = self._model_reasoning_stream(factor_data, business_data, minefield_result, score_result,
+                                                  bypass_cache=bypass_cache,
+                                                  cheap_model=self._select_cheap_model(minefield_mask, score_result))
+            for chunk in chunks:
+                for section, content in parser.feed(chunk):
+                    yield {"type": "section", "section": section, "content": content, "partial": parser.snapshot()}
+            for section, content in parser.close():
+                yield {"type": "section", "section": section, "content": content, "partial": parser.snapshot()}
+            
+            formatted_result = parser.snapshot()
+            self._save_analysis(stock_code, company_name, factor_data, business_data, formatted_result)
+            yield {"type": "result", "result": formatted_result}
+            
+        except Exception as e:
+            yield {"type": "error", "error": f"分析失败: {str(e)}"}
+    
+    def _save_analysis(self, stock_code: str, company_name: str, factor_data: Dict, business_data: Dict,
+                       formatted_result: Dict) -> bool:
+        """保存分析结果到本地缓存
+        
+        Args:
+            stock_code: 股票代码
+            company_name: 公司名称
+            factor_data: 因子数据
+            business_data: 业务数据
+            formatted_result: 格式化的分析结果
+            
+        Returns:
+            bool: 是否保存成功
+        """
+        cache_data = {
+            "stock_code": stock_code,
+            "company_name": company_name,
+            "factor_data": factor_data,
+            "business_data": business_data,
+            "analysis_result": formatted_result,
+            "timestamp": time.time()
+        }
+        return Storage.set_factor_cache(stock_code, cache_data)
+    
+    def _model_reasoning(self, factor_data: Dict, business_data: Dict, minefield_result: str, score_result: Dict,
+                         bypass_cache: bool = False, cheap_model: Optional[str] = None) -> str:
         """模型推理
         
+        提示词与模型参数完全相同时直接返回缓存结果，不再调用模型
+        
         Args:
             factor_data: 因子数据
             business_data: 业务数据
             minefield_result: 排雷结果
             score_result: 评分结果
+            bypass_cache: 是否跳过缓存读取（结果仍会写入缓存）
+            cheap_model: 低价模型名称（边缘情况），为None时使用主模型；低价模型不参与多提供商竞速
             
         Returns:
             str: 模型推理结果
         """
-        system_prompt = SystemPrompt.get_buffett_prompt()
-        user_prompt = SystemPrompt.get_analysis_prompt(factor_data, business_data, minefield_result, score_result)
+        model_name = cheap_model or self.model_name
+        messages, cache_keys, cached = self._prepare_reasoning(factor_data, business_data, minefield_result,
+                                                               score_result, bypass_cache, cheap_model)
+        if cached is not None:
+            self._record_stat("cache_hits")
+            return cached
+        
+        self._record_stat("cheap_llm_calls" if cheap_model else "llm_calls")
+        if self.race and not cheap_model:
+            winners = []
+            content = "".join(self.race.stream(
+                messages,
+                on_winner=winners.append,
+                temperature=Config.MODEL_TEMPERATURE,
+                max_tokens=Config.MAX_TOKENS,
+                timeout=Config.TIMEOUT
+            ))
+            self._cache_response(cache_keys, content, winners[0], self.race.endpoints[winners[0]][1])
+            return content
         
         response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            model=model_name,
+            messages=messages,
             temperature=Config.MODEL_TEMPERATURE,
             max_tokens=Config.MAX_TOKENS,
             timeout=Config.TIMEOUT
         )
+        content = response.choices[0].message.content
+        self._cache_response(cache_keys, content, self.model_provider, model_name)
+        
+        return content
+    
+    def _model_reasoning_stream(self, factor_data: Dict, business_data: Dict, minefield_result: str,
+                                score_result: Dict, bypass_cache: bool = False,
+                                cheap_model: Optional[str] = None) -> Iterator[str]:
+        """流式模型推理
+        
+        缓存命中时一次产出缓存结果，否则以 stream=True 调用模型（配置了备用提供商时竞速）并逐段产出增量文本
+        
+        Args:
+            factor_data: 因子数据
+            business_data: 业务数据
+            minefield_result: 排雷结果
+            score_result: 评分结果
+            bypass_cache: 是否跳过缓存读取（结果仍会写入缓存）
+            cheap_model: 低价模型名称（边缘情况），为None时使用主模型；低价模型不参与多提供商竞速
+            
+        Yields:
+            str: 模型输出的增量文本
+        """
+        model_name = cheap_model or self.model_name
+        messages, cache_keys, cached = self._prepare_reasoning(factor_data, business_data, minefield_result,
+                                                               score_result, bypass_cache, cheap_model)
+        if cached is not None:
+            self._record_stat("cache_hits")
+            yield cached
+            return
+        
+        self._record_stat("cheap_llm_calls" if cheap_model else "llm_calls")
+        winners = []
+        if self.race and not cheap_model:
+            content = self.race.stream(
+                messages,
+                on_winner=winners.append,
+                temperature=Config.MODEL_TEMPERATURE,
+                max_tokens=Config.MAX_TOKENS,
+                timeout=Config.TIMEOUT
+            )
+        else:
+            content = iter_stream_content(self.client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=Config.MODEL_TEMPERATURE,
+                max_tokens=Config.MAX_TOKENS,
+                timeout=Config.TIMEOUT,
+                stream=True
+            ))
+        parts = []
+        for delta in content:
+            parts.append(delta)
+            yield delta
+        if winners:
+            self._cache_response(cache_keys, "".join(parts), winners[0], self.race.endpoints[winners[0]][1])
+        else:
+            self._cache_response(cache_keys, "".join(parts), self.model_provider, model_name)
+    
+    def _prepare_reasoning(self, factor_data: Dict, business_data: Dict, minefield_result: str,
+                           score_result: Dict, bypass_cache: bool,
+                           cheap_model: Optional[str] = None) -> Tuple[List[Dict], Dict[str, str], Optional[str]]:
+        """构建推理请求并查询响应缓存
+        
+        缓存键包含实际生成结果的提供商与模型。启用竞速时结果可能来自任一端点，
+        因此为每个端点计算缓存键，按端点顺序查询，命中任一即复用
+        
+        Args:
+            factor_data: 因子数据
+            business_data: 业务数据
+            minefield_result: 排雷结果
+            score_result: 评分结果
+            bypass_cache: 是否跳过缓存读取
+            cheap_model: 低价模型名称，为None时使用主模型
+            
+        Returns:
+            Tuple[List[Dict], Dict[str, str], Optional[str]]: (消息列表, 提供商到缓存键的映射, 缓存结果)，
+                未启用缓存时映射为空
+        """
+        system_prompt = SystemPrompt.get_buffett_prompt()
+        user_prompt = SystemPrompt.get_analysis_prompt(factor_data, business_data, minefield_result, score_result)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        
+        if not Config.LLM_CACHE_ENABLED:
+            return messages, {}, None
         
-        return response.choices[0].message.content
+        if self.race and not cheap_model:
+            endpoints = [(provider, endpoint[1]) for provider, endpoint in self.race.endpoints.items()]
+        else:
+            endpoints = [(self.model_provider, cheap_model or self.model_name)]
+        cache_keys = {
+            provider: ResponseCache.make_key(system_prompt, user_prompt, endpoint_model, provider,
+                                             Config.MODEL_TEMPERATURE, Config.MAX_TOKENS)
+            for provider, endpoint_model in endpoints
+        }
+        cached = None
+        if not bypass_cache:
+            for cache_key in cache_keys.values():
+                cached = ResponseCache.instance().get(cache_key)
+                if cached is not None:
+                    break
+        return messages, cache_keys, cached
+    
+    def _cache_response(self, cache_keys: Dict[str, str], content: str, provider: str, model_name: str):
+        """写入模型响应缓存
+        
+        Args:
+            cache_keys: 提供商到缓存键的映射，为空表示未启用缓存
+            content: 模型输出
+            provider: 实际生成该输出的提供商（竞速时为胜出者）
+            model_name: 实际生成该输出的模型
+        """
+        cache_key = cache_keys.get(provider)
+        if cache_key and content:
+            ResponseCache.instance().put(cache_key, content, model=model_name, provider=provider)
+    
+    @staticmethod
+    def _is_hard_reject(minefield_mask: int) -> bool:
+        """是否命中硬否决规则（快速通道关闭时始终为False）
+        
+        Args:
+            minefield_mask: 排雷掩码
+            
+        Returns:
+            bool: 是否命中
+        """
+        if not Config.MINEFIELD_FAST_PATH:
+            return False
+        return bool(minefield_mask & Factors.minefield_bits(Config.MINEFIELD_HARD_REJECT_RULES))
+    
+    def _select_cheap_model(self, minefield_mask: int, score_result: Dict) -> Optional[str]:
+        """选择边缘情况使用的低价模型
+        
+        启用低价模型且当前提供商配置了低价模型时，未通过非硬否决排雷规则或因子评分等级较差的
+        边缘情况使用低价模型。低价模型与主模型相同时（如 kimi 默认配置）低价档没有意义，
+        回退为主模型并提示一次
+        
+        Args:
+            minefield_mask: 排雷掩码
+            score_result: 评分结果
+            
+        Returns:
+            Optional[str]: 低价模型名称，使用主模型时返回None
+        """
+        cheap_model = Config.CHEAP_MODELS.get(self.model_provider)
+        if not Config.CHEAP_MODEL_ENABLED or not cheap_model:
+            return None
+        if not minefield_mask and score_result.get("grade") not in Config.CHEAP_MODEL_GRADES:
+            return None
+        if cheap_model == self.model_name:
+            if not self._cheap_model_warned:
+                self._cheap_model_warned = True
+                print(f"低价模型与主模型相同（{self.model_provider}: {cheap_model}），边缘情况仍按主模型调用")
+            return None
+        return cheap_model
+    
+    def _fast_path_result(self, minefield_mask: int, factor_data: Dict, business_data: Dict) -> Dict:
+        """由排雷结果生成模板化的"不碰"结论（不调用模型）
+        
+        Args:
+            minefield_mask: 排雷掩码
+            factor_data: 因子数据
+            business_data: 业务数据
+            
+        Returns:
+            Dict: 与模型输出解析结果结构相同的分析结果
+        """
+        self._record_stat("fast_path")
+        messages = Factors.minefield_messages(minefield_mask, factor_data, business_data)
+        return {
+            "conclusion": f"不碰 未通过硬排雷规则：{messages[0]}",
+            "key_facts": (messages + Factors.get_key_facts(factor_data, business_data))[:Config.MAX_KEY_FACTS],
+            "reasoning": f"硬排雷规则为一票否决条件，该公司未通过 {len(messages)} 条"
+                         f"（{'；'.join(messages)}），财务或经营风险超出安全边际，无需进一步做定性分析。",
+            "risks": messages[:Config.MAX_RISKS]
+        }
+    
+    @classmethod
+    def _record_stat(cls, name: str):
+        """模型调用统计计数加一
+        
+        Args:
+            name: 统计项名称
+        """
+        with cls._llm_stats_lock:
+            cls._llm_stats[name] += 1
+    
+    @classmethod
+    def get_llm_stats(cls) -> Dict[str, int]:
+        """获取模型调用统计
+        
+        Returns:
+            Dict[str, int]: 各统计项次数，另含 avoided（未调用模型的分析次数，即快速通道与缓存命中之和）
+        """
+        with cls._llm_stats_lock:
+            stats = dict(cls._llm_stats)
+        stats["avoided"] = stats["fast_path"] + stats["cache_hits"]
+        return stats
+    
+    @classmethod
+    def reset_llm_stats(cls):
+        """清空模型调用统计"""
+        with cls._llm_stats_lock:
+            for name in cls._llm_stats:
+                cls._llm_stats[name] = 0
     
     def _format_output(self, analysis_result: str, factor_data: Dict, business_data: Dict) -> Dict:
         """格式化输出
@@ -126,44 +547,11 @@ class FundamentalQAgent:
             Dict: 格式化的分析结果
         """
         # 解析模型输出
-        lines = analysis_result.strip().split('\n')
-        
-        result = {
-            "conclusion": "",
-            "key_facts": [],
-            "reasoning": "",
-            "risks": []
-        }
+        parser = SectionParser()
+        parser.feed(analysis_result.strip())
+        parser.close()
         
-        current_section = None
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            if line.startswith("【决策结论】"):
-                current_section = "conclusion"
-                result["conclusion"] = line.replace("【决策结论】", "").strip()
-            elif line.startswith("【关键事实】"):
-                current_section = "key_facts"
-            elif line.startswith("【推理逻辑】"):
-                current_section = "reasoning"
-                result["reasoning"] = line.replace("【推理逻辑】", "").strip()
-            elif line.startswith("【风险提示】"):
-                current_section = "risks"
-            else:
-                if current_section == "key_facts" and line:
-                    result["key_facts"].append(line)
-                elif current_section == "reasoning" and line:
-                    result["reasoning"] += " " + line
-                elif current_section == "risks" and line:
-                    result["risks"].append(line)
-        
-        # 限制数量
-        result["key_facts"] = result["key_facts"][:Config.MAX_KEY_FACTS]
-        result["risks"] = result["risks"][:Config.MAX_RISKS]
-        
-        return result
+        return parser.result
     
     def get_cached_analysis(self, stock_code: str) -> Optional[Dict]:
         """获取缓存的分析结果
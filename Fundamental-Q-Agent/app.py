@@ -7,6 +7,7 @@
 import streamlit as st
 import time
 from agent import FundamentalQAgent
+from client_pool import api_key_hash
 from storage import Storage
 
 
@@ -18,6 +19,49 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def get_agent(model_provider, model_name, key_hash, _api_key):
+    """获取缓存的智能体：按（提供商, 模型, 密钥哈希）复用，脚本重跑时沿用同一客户端与长连接
+    
+    Args:
+        model_provider: 模型提供商
+        model_name: 模型名称
+        key_hash: API密钥哈希（作为缓存键）
+        _api_key: API密钥（下划线前缀参数不参与缓存键计算）
+        
+    Returns:
+        FundamentalQAgent: 智能体
+    """
+    return FundamentalQAgent(_api_key, model_provider, model_name)
+
+
+def render_result(placeholder, result):
+    """在占位区域渲染分析结果（流式输出时随段落到达重复调用）
+    
+    Args:
+        placeholder: st.empty() 占位区域
+        result: 分析结果（可以是部分结果）
+    """
+    with placeholder.container():
+        # 决策结论
+        st.markdown(f"### 【决策结论】")
+        st.write(result["conclusion"])
+        
+        # 关键事实
+        st.markdown(f"### 【关键事实】")
+        for fact in result["key_facts"]:
+            st.write(f"- {fact}")
+        
+        # 推理逻辑
+        st.markdown(f"### 【推理逻辑】")
+        st.write(result["reasoning"])
+        
+        # 风险提示
+        st.markdown(f"### 【风险提示】")
+        for risk in result["risks"]:
+            st.write(f"- {risk}")
+
 # 标题
 st.title("Fundamental-Q-Agent")
 st.subheader("基本面量化决策智能体")
@@ -28,6 +72,15 @@ with st.sidebar:
     api_key = st.text_input("API Key", type="password")
     model_provider = st.selectbox("模型提供商", ["kimi", "minimax", "openai"])
     model_name = st.text_input("模型名称", value="moonshot-v1-8k")
+    bypass_cache = st.checkbox("忽略缓存，重新调用模型", value=False)
+    stream_output = st.checkbox("流式输出", value=True)
+    
+    st.header("模型调用统计")
+    llm_stats = FundamentalQAgent.get_llm_stats()
+    st.caption(f"分析 {llm_stats['analyses']} 次，调用模型 {llm_stats['llm_calls']} 次"
+               f"（低价模型 {llm_stats['cheap_llm_calls']} 次）")
+    st.caption(f"免调用 {llm_stats['avoided']} 次：排雷快速通道 {llm_stats['fast_path']} 次，"
+               f"缓存命中 {llm_stats['cache_hits']} 次")
     
     st.header("观察列表")
     observation_pool = Storage.get_observation_pool()
@@ -113,35 +166,33 @@ if st.button("分析"):
                 "high_pledge": high_pledge
             }
             
-            # 初始化Agent
-            agent = FundamentalQAgent(api_key, model_provider, model_name)
+            # 获取Agent（跨重跑复用）
+            agent = get_agent(model_provider, model_name, api_key_hash(api_key), api_key)
             
             # 执行分析
-            result = agent.analyze(stock_code, company_name, factor_data, business_data)
+            if stream_output:
+                st.subheader("分析结果")
+                placeholder = st.empty()
+                result = {"error": "分析失败: 模型未返回结果"}
+                for event in agent.analyze_stream(stock_code, company_name, factor_data, business_data,
+                                                  bypass_cache=bypass_cache):
+                    if event["type"] == "section":
+                        render_result(placeholder, event["partial"])
+                    elif event["type"] == "result":
+                        result = event["result"]
+                        render_result(placeholder, result)
+                    else:
+                        result = {"error": event["error"]}
+            else:
+                result = agent.analyze(stock_code, company_name, factor_data, business_data, bypass_cache=bypass_cache)
             
             # 显示结果
             if "error" in result:
                 st.error(result["error"])
             else:
-                st.subheader("分析结果")
-                
-                # 决策结论
-                st.markdown(f"### 【决策结论】")
-                st.write(result["conclusion"])
-                
-                # 关键事实
-                st.markdown(f"### 【关键事实】")
-                for fact in result["key_facts"]:
-                    st.write(f"- {fact}")
-                
-                # 推理逻辑
-                st.markdown(f"### 【推理逻辑】")
-                st.write(result["reasoning"])
-                
-                # 风险提示
-                st.markdown(f"### 【风险提示】")
-                for risk in result["risks"]:
-                    st.write(f"- {risk}")
+                if not stream_output:
+                    st.subheader("分析结果")
+                    render_result(st.empty(), result)
                 
                 # 添加到观察列表按钮
                 if st.button("添加到观察列表"):
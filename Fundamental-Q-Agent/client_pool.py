@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+客户端池模块：按（提供商, API地址, API密钥哈希）复用OpenAI兼容客户端，保持长连接
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+import openai
+from config import Config, ModelProvider
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  httpx 启用HTTP/2需要 h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def api_key_hash(api_key: str) -> str:
+    """计算API密钥哈希（缓存键中不保存明文密钥）
+
+    Args:
+        api_key: API密钥
+
+    Returns:
+        str: SHA-256 十六进制摘要
+    """
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+
+
+class ClientPool:
+    """OpenAI兼容客户端池
+
+    每个客户端持有独立的HTTP连接池，同一提供商与密钥的请求复用已建立的连接，
+    跳过DNS解析与TLS握手；超过容量时移出最久未使用的客户端。
+    移出的客户端不主动关闭：其他线程或缓存的智能体可能仍在用它发请求，
+    所有引用释放后由垃圾回收关闭其连接。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """初始化客户端池
+
+        Args:
+            max_entries: 最大客户端数，默认使用配置
+        """
+        self.max_entries = max_entries or Config.CLIENT_POOL_MAX_ENTRIES
+        self._clients: "OrderedDict[Tuple[str, str, str], openai.OpenAI]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    @classmethod
+    def instance(cls) -> "ClientPool":
+        """获取进程内共享的客户端池"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def get_client(self, provider: str, api_key: str, base_url: Optional[str] = None) -> openai.OpenAI:
+        """获取（或创建）客户端
+
+        Args:
+            provider: 模型提供商
+            api_key: API密钥
+            base_url: API基础URL，默认按提供商配置
+
+        Returns:
+            openai.OpenAI: 共享的客户端
+        """
+        base_url = base_url or ModelProvider.get_api_base(provider)
+        key = (provider, base_url, api_key_hash(api_key))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+            client = openai.OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=self._http_client(provider)
+            )
+            self._clients[key] = client
+            self.created += 1
+            while len(self._clients) > self.max_entries:
+                self._clients.popitem(last=False)
+        return client
+
+    @staticmethod
+    def _http_client(provider: str):
+        """创建调优后的HTTP客户端（未安装 httpx 时返回None，使用openai默认客户端）
+
+        Args:
+            provider: 模型提供商
+
+        Returns:
+            HTTP客户端或None
+        """
+        if httpx is None:
+            return None
+        limits = httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+        )
+        http2 = HTTP2_AVAILABLE and provider in Config.HTTP2_PROVIDERS
+        return openai.DefaultHttpxClient(limits=limits, http2=http2)
+
+    def clear(self):
+        """移除所有客户端（不关闭，仍在使用的客户端不受影响）"""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+def get_client(provider: str, api_key: str, base_url: Optional[str] = None) -> openai.OpenAI:
+    """从共享客户端池获取客户端
+
+    Args:
+        provider: 模型提供商
+        api_key: API密钥
+        base_url: API基础URL，默认按提供商配置
+
+    Returns:
+        openai.OpenAI: 共享的客户端
+    """
+    return ClientPool.instance().get_client(provider, api_key, base_url)
@@ -4,6 +4,9 @@
 配置文件：API、模型、参数配置
 """
 
+import threading
+from typing import Dict, List, Optional
+
 
 class Config:
     """配置类"""
@@ -12,6 +15,24 @@ class Config:
     MAX_TOKENS = 1000  # 最大令牌数
     TIMEOUT = 30  # API超时时间（秒）
     
+    # 模型响应缓存配置
+    LLM_CACHE_ENABLED = True  # 是否启用模型响应缓存（提示词完全相同时复用结果）
+    LLM_CACHE_DIR = ".llm_cache"  # 缓存目录
+    LLM_CACHE_TTL = 7 * 24 * 3600  # 缓存有效期（秒）
+    LLM_CACHE_MAX_ENTRIES = 1000  # 最大缓存条目数
+    
+    # HTTP连接配置（客户端按提供商与密钥复用，见 client_pool.py）
+    CLIENT_POOL_MAX_ENTRIES = 16  # 最多保留的客户端数
+    HTTP_MAX_CONNECTIONS = 20  # 每个客户端的最大连接数
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = 10  # 每个客户端保持的空闲长连接数
+    HTTP_KEEPALIVE_EXPIRY = 120  # 空闲长连接保活时间（秒）
+    HTTP2_PROVIDERS = ("openai",)  # 启用HTTP/2的提供商（需要安装 h2）
+    
+    # 多提供商竞速配置
+    HEDGE_DELAY = 2.0  # 当前提供商在该时间（秒）内未返回首个token时启动下一个提供商
+    LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)  # 首token延迟直方图分桶上界（秒）
+    LATENCY_QUANTILE = 0.95  # 选择主提供商时比较的延迟分位数
+    
     # 因子配置
     MIN_ROE = 10  # 最低ROE要求（%）
     MIN_GROSS_MARGIN = 20  # 最低毛利率要求（%）
@@ -25,9 +46,22 @@ class Config:
     LOSS_YEARS_THRESHOLD = 2  # 连续亏损年数阈值
     CASH_FLOW_DETERIORATION_YEARS = 2  # 现金流持续恶化年数
     
+    # 排雷快速通道配置（命中硬否决规则时直接给出"不碰"结论，不调用模型）
+    MINEFIELD_FAST_PATH = True  # 是否启用快速通道
+    MINEFIELD_HARD_REJECT_RULES = ("high_debt", "loss_years", "cash_flow_deterioration", "high_pledge")  # 硬否决规则（factors.MINEFIELD_RULES 的规则名），其余规则未通过时视为边缘情况
+    CHEAP_MODEL_ENABLED = False  # 边缘情况是否改用低价模型
+    CHEAP_MODELS = {"kimi": "moonshot-v1-8k", "minimax": "abab5.5s-chat", "openai": "gpt-4o-mini"}  # 各提供商的低价模型（与主模型相同时低价档不生效，按主模型调用）
+    CHEAP_MODEL_GRADES = ("差", "较差")  # 因子评分等级属于这些档位时视为边缘情况
+    
     # 存储配置
-    OBSERVATION_POOL_PATH = "observation_pool.json"  # 观察池文件路径
-    FACTOR_CACHE_PATH = "factor_cache.json"  # 因子缓存文件路径
+    STORAGE_BACKEND = "sqlite"  # 存储后端：sqlite（WAL模式）/ json / log（观察池用JSON，因子缓存用追加写日志）
+    SQLITE_DB_PATH = "fundamental_q.db"  # SQLite数据库文件路径
+    SQLITE_BUSY_TIMEOUT = 10  # SQLite锁等待超时（秒）
+    OBSERVATION_POOL_PATH = "observation_pool.json"  # 观察池文件路径（json后端，sqlite后端首次启动时自动迁移）
+    FACTOR_CACHE_PATH = "factor_cache.json"  # 因子缓存文件路径（json后端，sqlite/log后端首次启动时自动迁移）
+    FACTOR_CACHE_LOG_PATH = "factor_cache.log"  # 因子缓存日志段文件路径（log后端）
+    FACTOR_CACHE_COMPACT_RATIO = 0.5  # 垃圾记录占比超过该值时后台压缩（log后端）
+    FACTOR_CACHE_COMPACT_MIN_RECORDS = 1000  # 记录数少于该值时不压缩（log后端）
     
     # 分析配置
     MAX_KEY_FACTS = 5  # 关键事实最大数量
@@ -43,6 +77,10 @@ class ModelProvider:
         "openai": "https://api.openai.com/v1",
     }
     
+    # 首token延迟直方图：提供商 -> 各分桶计数（最后一个为溢出桶，失败也计入溢出桶）
+    _latency_histograms: Dict[str, List[int]] = {}
+    _latency_lock = threading.Lock()
+    
     @classmethod
     def get_api_base(cls, provider):
         """获取API基础URL
@@ -54,3 +92,88 @@ class ModelProvider:
             str: API基础URL
         """
         return cls.PROVIDERS.get(provider, cls.PROVIDERS["openai"])
+    
+    @classmethod
+    def record_latency(cls, provider: str, seconds: Optional[float]):
+        """记录一次首token延迟
+        
+        Args:
+            provider: 模型提供商名称
+            seconds: 首token延迟（秒），None表示请求失败
+        """
+        buckets = Config.LATENCY_BUCKETS
+        index = len(buckets)
+        if seconds is not None:
+            for i, upper in enumerate(buckets):
+                if seconds <= upper:
+                    index = i
+                    break
+        with cls._latency_lock:
+            histogram = cls._latency_histograms.setdefault(provider, [0] * (len(buckets) + 1))
+            histogram[index] += 1
+    
+    @classmethod
+    def get_latency_histogram(cls, provider: str) -> Dict[str, int]:
+        """获取首token延迟直方图
+        
+        Args:
+            provider: 模型提供商名称
+            
+        Returns:
+            Dict[str, int]: 分桶上界（如 "<=0.5s"，溢出桶为 ">32s"）到次数的映射
+        """
+        buckets = Config.LATENCY_BUCKETS
+        with cls._latency_lock:
+            counts = list(cls._latency_histograms.get(provider, [0] * (len(buckets) + 1)))
+        labels = [f"<={upper}s" for upper in buckets] + [f">{buckets[-1]}s"]
+        return dict(zip(labels, counts))
+    
+    @classmethod
+    def estimate_latency(cls, provider: str, quantile: Optional[float] = None) -> Optional[float]:
+        """按直方图估计首token延迟分位数
+        
+        Args:
+            provider: 模型提供商名称
+            quantile: 分位数，默认使用配置
+            
+        Returns:
+            Optional[float]: 分位数所在分桶的上界（溢出桶按最大上界的两倍计），无记录时返回None
+        """
+        quantile = Config.LATENCY_QUANTILE if quantile is None else quantile
+        buckets = Config.LATENCY_BUCKETS
+        with cls._latency_lock:
+            histogram = cls._latency_histograms.get(provider)
+            counts = list(histogram) if histogram else None
+        if not counts or not sum(counts):
+            return None
+        
+        target = quantile * sum(counts)
+        cumulative = 0
+        for i, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= target and count:
+                return buckets[i] if i < len(buckets) else buckets[-1] * 2
+        return buckets[-1] * 2
+    
+    @classmethod
+    def rank_providers(cls, providers: List[str]) -> List[str]:
+        """按历史延迟排序提供商，延迟低者优先
+        
+        没有记录的提供商排在有记录者之后，同等情况下保持传入顺序（即配置的主提供商优先）
+        
+        Args:
+            providers: 提供商名称列表
+            
+        Returns:
+            List[str]: 排序后的提供商列表
+        """
+        def key(provider):
+            estimate = cls.estimate_latency(provider)
+            return float("inf") if estimate is None else estimate
+        return sorted(providers, key=key)
+    
+    @classmethod
+    def reset_latency(cls):
+        """清空延迟直方图"""
+        with cls._latency_lock:
+            cls._latency_histograms.clear()
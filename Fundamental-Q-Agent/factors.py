@@ -4,10 +4,74 @@
 因子模块：基本面因子定义、排雷规则（量化核心）
 """
 
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Mapping, Union, Iterable
+import numpy as np
 from config import Config
 
 
+# 因子分档表：因子 -> (方向, 升序阈值)，与 score_factors 中的 if/elif 分档一一对应
+# ">=": 分数 = 1 + 不大于因子值的阈值个数
+# "<": 分数 = 5 - 不大于因子值的阈值个数
+# "pe": 同 "<"，但 PE <= 0（亏损）固定为 1 分
+FACTOR_BUCKETS = {
+    'roe': ('>=', (5, 10, 15, 20)),
+    'gross_margin': ('>=', (10, 20, 30, 40)),
+    'cash_flow_ratio': ('>=', (0.2, 0.5, 1.0, 1.5)),
+    'debt_ratio': ('<', (30, 40, 50, 60)),
+    'pe': ('pe', (15, 20, 25, 30)),
+    'dividend_yield': ('>=', (0.5, 1, 2, 3)),
+    'revenue_growth': ('>=', (5, 10, 20, 30)),
+    'profit_growth': ('>=', (5, 10, 20, 30)),
+    'cash_flow_quality': ('>=', (0.2, 0.4, 0.6, 0.8)),
+}
+# 因子矩阵（二维数组）的列顺序
+FACTOR_COLUMNS = tuple(FACTOR_BUCKETS)
+
+# 评分等级：平均分 >= 第 k 个阈值时落在第 k+1 档
+GRADE_THRESHOLDS = (1.5, 2.5, 3.5, 4.5)
+GRADE_LABELS = ('差', '较差', '一般', '良好', '优秀')
+
+# 排雷规则表：(规则名, 数据来源, 字段, 缺省值, 比较方式, 阈值配置项, 结果模板)
+# 第 k 条规则未通过时排雷掩码的第 k 位为 1，顺序与 check_minefields 的检查顺序一致
+MINEFIELD_RULES = (
+    ('high_debt', 'factor', 'debt_ratio', 0, '>', 'BANKRUPTCY_DEBT_RATIO',
+     "高负债风险：资产负债率 {value}% 超过阈值 {threshold}%"),
+    ('loss_years', 'business', 'loss_years', 0, '>=', 'LOSS_YEARS_THRESHOLD',
+     "利润持续为负：连续亏损 {value} 年"),
+    ('cash_flow_deterioration', 'business', 'cash_flow_deterioration_years', 0, '>=', 'CASH_FLOW_DETERIORATION_YEARS',
+     "现金流持续恶化：连续 {value} 年恶化"),
+    ('high_pledge', 'business', 'high_pledge', False, 'truthy', None,
+     "高质押风险：股权质押比例过高"),
+)
+
+ColumnData = Union[Mapping[str, object], np.ndarray]
+
+
+def _as_columns(data: ColumnData, names: Tuple[str, ...]) -> Mapping[str, object]:
+    """二维矩阵按 names 顺序拆分为列，列映射原样返回"""
+    if isinstance(data, np.ndarray):
+        if data.ndim != 2 or data.shape[1] != len(names):
+            raise ValueError(f"因子矩阵形状应为 (n, {len(names)})，实际为 {data.shape}")
+        return {name: data[:, j] for j, name in enumerate(names)}
+    return data
+
+
+def _column_size(*tables: Mapping[str, object]) -> int:
+    """各列长度必须一致，返回行数"""
+    lengths = {len(column) for table in tables for column in table.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"列长度不一致: {sorted(lengths)}")
+    return lengths.pop() if lengths else 0
+
+
+def _column(table: Mapping[str, object], name: str, default: float, size: int) -> np.ndarray:
+    """读取浮点列，缺失的列与 NaN 取缺省值（等价于 dict.get 的缺省值）"""
+    if name not in table:
+        return np.full(size, float(default))
+    values = np.asarray(table[name], dtype=float)
+    return np.where(np.isnan(values), float(default), values)
+
+
 class Factors:
     """因子类"""
     
@@ -230,6 +294,175 @@ class Factors:
         else:
             return '差'
     
+    @staticmethod
+    def score_factors_batch(factor_data: ColumnData) -> Dict:
+        """批量因子评分：按分档表用 np.searchsorted 一次评分整个因子矩阵
+        
+        Args:
+            factor_data: 因子列映射（因子名 -> 等长序列），或按 FACTOR_COLUMNS 排列的 (n, 9) 矩阵；
+                缺失的列按 0 处理，NaN 与标量路径一致（与任何阈值比较都不成立）落在最低档 1 分
+            
+        Returns:
+            Dict: scores（因子名 -> 分数数组）、total_score、average_score、grade（等级数组），
+                第 i 行与 score_factors 对第 i 家公司的结果一致
+        """
+        columns = _as_columns(factor_data, FACTOR_COLUMNS)
+        size = _column_size(columns)
+        
+        scores = {}
+        for factor, (direction, thresholds) in FACTOR_BUCKETS.items():
+            if factor in columns:
+                values = np.asarray(columns[factor], dtype=float)
+            else:
+                values = np.zeros(size)
+            # NaN 在 searchsorted 中排在所有阈值之后，需先屏蔽，再按标量路径的结果记为 1 分
+            nan_mask = np.isnan(values)
+            rank = np.searchsorted(np.asarray(thresholds, dtype=float), np.where(nan_mask, 0, values), side='right')
+            if direction == '>=':
+                score = 1 + rank
+            elif direction == '<':
+                score = 5 - rank
+            else:
+                score = np.where(values > 0, 5 - rank, 1)
+            scores[factor] = np.where(nan_mask, 1, score)
+        
+        total_score = np.sum(list(scores.values()), axis=0, dtype=np.int64)
+        average_score = total_score / len(scores)
+        grade = np.asarray(GRADE_LABELS, dtype=object)[np.digitize(average_score, GRADE_THRESHOLDS)]
+        
+        return {
+            'scores': scores,
+            'total_score': total_score,
+            'average_score': average_score,
+            'grade': grade
+        }
+    
+    @staticmethod
+    def score_factors_row(batch_result: Dict, i: int) -> Dict:
+        """从批量评分结果中取出第 i 行，结构与 score_factors 的返回值相同
+        
+        Args:
+            batch_result: score_factors_batch 的返回值
+            i: 行号
+            
+        Returns:
+            Dict: 评分结果
+        """
+        return {
+            'scores': {factor: int(values[i]) for factor, values in batch_result['scores'].items()},
+            'total_score': int(batch_result['total_score'][i]),
+            'average_score': float(batch_result['average_score'][i]),
+            'grade': batch_result['grade'][i]
+        }
+    
+    @staticmethod
+    def check_minefields_batch(factor_data: ColumnData, business_data: Mapping[str, object]) -> Tuple[np.ndarray, np.ndarray]:
+        """批量排雷：所有规则以布尔掩码同时计算，返回每家公司未通过规则的位掩码
+        
+        Args:
+            factor_data: 因子列映射，或按 FACTOR_COLUMNS 排列的矩阵
+            business_data: 业务数据列映射（loss_years、cash_flow_deterioration_years、high_pledge）
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (是否通过, 排雷掩码)，掩码第 k 位对应 MINEFIELD_RULES[k]
+        """
+        tables = {'factor': _as_columns(factor_data, FACTOR_COLUMNS), 'business': business_data}
+        size = _column_size(*tables.values())
+        
+        mask = np.zeros(size, dtype=np.uint8)
+        for bit, (_, source, field, default, op, threshold_name, _) in enumerate(MINEFIELD_RULES):
+            values = _column(tables[source], field, default, size)
+            if op == '>':
+                failed = values > getattr(Config, threshold_name)
+            elif op == '>=':
+                failed = values >= getattr(Config, threshold_name)
+            elif op == 'truthy':
+                failed = values != 0
+            else:
+                raise ValueError(f"未知的排雷比较方式: {op}")
+            mask |= failed.astype(np.uint8) << bit
+        
+        return mask == 0, mask
+    
+    @staticmethod
+    def minefield_failures(mask: int) -> List[str]:
+        """列出排雷掩码中未通过的规则名
+        
+        Args:
+            mask: 排雷掩码
+            
+        Returns:
+            List[str]: 规则名列表（按检查顺序）
+        """
+        return [rule[0] for bit, rule in enumerate(MINEFIELD_RULES) if int(mask) >> bit & 1]
+    
+    @staticmethod
+    def minefield_mask(factor_data: Dict, business_data: Dict) -> int:
+        """计算单家公司的排雷掩码
+        
+        Args:
+            factor_data: 因子数据
+            business_data: 业务数据
+            
+        Returns:
+            int: 排雷掩码，第 k 位对应 MINEFIELD_RULES[k]
+        """
+        factor_columns = {name: [value] for name, value in factor_data.items() if name in FACTOR_COLUMNS}
+        business_columns = {rule[2]: [business_data[rule[2]]] for rule in MINEFIELD_RULES
+                            if rule[1] == 'business' and rule[2] in business_data}
+        _, mask = Factors.check_minefields_batch(factor_columns, business_columns)
+        return int(mask[0])
+    
+    @staticmethod
+    def minefield_bits(rule_names: Iterable[str]) -> int:
+        """规则名集合对应的掩码位
+        
+        Args:
+            rule_names: 规则名（MINEFIELD_RULES 中的规则名）
+            
+        Returns:
+            int: 这些规则对应位全为 1 的掩码
+        """
+        names = set(rule_names)
+        return sum(1 << bit for bit, rule in enumerate(MINEFIELD_RULES) if rule[0] in names)
+    
+    @staticmethod
+    def minefield_messages(mask: int, factor_data: Dict, business_data: Dict) -> List[str]:
+        """由排雷掩码生成全部未通过规则的说明
+        
+        Args:
+            mask: 排雷掩码
+            factor_data: 该公司的因子数据（用于格式化结果）
+            business_data: 该公司的业务数据
+            
+        Returns:
+            List[str]: 未通过规则的说明（按检查顺序）
+        """
+        messages = []
+        for bit, (_, source, field, default, _, threshold_name, template) in enumerate(MINEFIELD_RULES):
+            if int(mask) >> bit & 1:
+                data = factor_data if source == 'factor' else business_data
+                threshold = getattr(Config, threshold_name) if threshold_name else None
+                messages.append(template.format(value=data.get(field, default), threshold=threshold))
+        return messages
+    
+    @staticmethod
+    def minefield_result(mask: int, factor_data: Dict, business_data: Dict) -> Tuple[bool, str]:
+        """由排雷掩码生成与 check_minefields 相同的 (是否通过, 排雷结果)
+        
+        Args:
+            mask: 排雷掩码
+            factor_data: 该公司的因子数据（用于格式化结果）
+            business_data: 该公司的业务数据
+            
+        Returns:
+            Tuple[bool, str]: (是否通过, 排雷结果)，未通过时为第一条未通过规则的说明
+        """
+        messages = Factors.minefield_messages(mask, factor_data, business_data)
+        if messages:
+            return False, messages[0]
+        return True, "通过排雷检查"
+    
     @staticmethod
     def get_key_facts(factor_data: Dict, business_data: Dict) -> List[str]:
         """获取关键事实
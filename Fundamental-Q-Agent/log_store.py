@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志结构存储模块：因子缓存的追加写日志，内存索引定位最新记录，垃圾比例过高时后台压缩
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from config import Config
+
+
+def _encode(record: Dict) -> bytes:
+    """编码为一行紧凑JSON"""
+    return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class FactorCacheLog:
+    """因子缓存追加写日志
+
+    每次更新只在段文件末尾追加一行记录（{"k": 代码, "v": 数据}，删除为 {"k": 代码, "d": 1}），
+    内存索引保存每个股票代码最新记录的偏移量。被覆盖或删除的记录计为垃圾，
+    垃圾比例超过阈值时由后台线程把存活记录重写为新的段文件并原子替换。
+    索引只在记录完整写入后更新，写入失败时段文件截断回写入前的长度。
+    """
+
+    _instances: Dict[str, "FactorCacheLog"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, log_path: str, compact_ratio: Optional[float] = None,
+                 compact_min_records: Optional[int] = None):
+        """初始化日志存储，重放段文件建立索引
+
+        Args:
+            log_path: 段文件路径
+            compact_ratio: 触发压缩的垃圾比例，默认使用配置
+            compact_min_records: 触发压缩的最少记录数，默认使用配置
+        """
+        self.log_path = log_path
+        self.compact_ratio = Config.FACTOR_CACHE_COMPACT_RATIO if compact_ratio is None else compact_ratio
+        self.compact_min_records = (Config.FACTOR_CACHE_COMPACT_MIN_RECORDS
+                                    if compact_min_records is None else compact_min_records)
+        self._lock = threading.RLock()
+        self._index: Dict[str, int] = {}
+        self._records = 0
+        self._compacting = False
+        self._compactions = 0
+        self._generation = 0  # 段文件被整体替换（清空、压缩）时递增
+
+        if not os.path.exists(log_path):
+            self._seed_from_json(Config.FACTOR_CACHE_PATH)
+        self._replay()
+        self._file = open(log_path, 'ab')
+        self._reader = open(log_path, 'rb')
+
+    @classmethod
+    def instance(cls, log_path: Optional[str] = None) -> "FactorCacheLog":
+        """获取指定段文件的共享实例
+
+        Args:
+            log_path: 段文件路径，默认使用配置
+
+        Returns:
+            FactorCacheLog: 日志存储实例
+        """
+        log_path = log_path or Config.FACTOR_CACHE_LOG_PATH
+        store = cls._instances.get(log_path)
+        if store is None:
+            with cls._instances_lock:
+                store = cls._instances.get(log_path)
+                if store is None:
+                    store = cls._instances[log_path] = cls(log_path)
+        return store
+
+    def _seed_from_json(self, json_path: str):
+        """段文件不存在时，从已有的JSON因子缓存生成初始段文件"""
+        data = {}
+        if os.path.exists(json_path):
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                data = {}
+        self._write_segment(self.log_path, data)
+
+    @staticmethod
+    def _write_segment(path: str, data: Dict[str, Dict]):
+        """把存活记录写入临时文件后原子替换目标段文件"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for stock_code, factor_data in data.items():
+                f.write(_encode({"k": stock_code, "v": factor_data}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _replay(self):
+        """顺序扫描段文件重建索引，忽略末尾写了一半的记录"""
+        self._index.clear()
+        self._records = 0
+        offset = 0
+        valid_end = 0
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                self._records += 1
+                if record.get("d"):
+                    self._index.pop(record["k"], None)
+                else:
+                    self._index[record["k"]] = offset
+                offset += len(line)
+                valid_end = offset
+        if valid_end != os.path.getsize(self.log_path):
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(valid_end)
+
+    def _read_at(self, offset: int) -> Dict:
+        """读取指定偏移量处的记录值，调用方需持有锁"""
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())["v"]
+
+    def _append(self, payload: bytes, count: int):
+        """追加记录，调用方需持有锁
+
+        写入失败时把段文件截断回写入前的长度，避免写了一半的记录留在中间，
+        导致重放时丢弃其后的全部记录
+        """
+        start = self._file.tell()
+        try:
+            self._file.write(payload)
+            self._file.flush()
+        except IOError:
+            self._rollback(start)
+            raise
+        self._records += count
+
+    def _rollback(self, start: int):
+        """丢弃写缓冲并把段文件截断到 start，调用方需持有锁"""
+        try:
+            self._file.close()
+        except IOError:
+            pass
+        with open(self.log_path, 'r+b') as f:
+            f.truncate(start)
+        self._file = open(self.log_path, 'ab')
+
+    def get(self, stock_code: str) -> Optional[Dict]:
+        """获取因子缓存
+
+        Args:
+            stock_code: 股票代码
+
+        Returns:
+            Optional[Dict]: 因子缓存数据
+        """
+        with self._lock:
+            offset = self._index.get(stock_code)
+            if offset is None:
+                return None
+            return self._read_at(offset)
+
+    def set_many(self, items: Dict[str, Dict]) -> bool:
+        """批量追加因子缓存记录
+
+        Args:
+            items: 股票代码到因子数据的映射
+
+        Returns:
+            bool: 是否写入成功
+        """
+        try:
+            # 先编码全部记录，任何一条无法编码时不写入也不修改索引
+            lines = [(stock_code, _encode({"k": stock_code, "v": factor_data}))
+                     for stock_code, factor_data in items.items()]
+            with self._lock:
+                offset = self._file.tell()
+                self._append(b''.join(line for _, line in lines), len(lines))
+                for stock_code, line in lines:
+                    self._index[stock_code] = offset
+                    offset += len(line)
+                self._maybe_compact()
+            return True
+        except (IOError, TypeError, ValueError) as e:
+            print(f"写入因子缓存日志失败: {e}")
+            return False
+
+    def set(self, stock_code: str, factor_data: Dict) -> bool:
+        """追加一条因子缓存记录
+
+        Args:
+            stock_code: 股票代码
+            factor_data: 因子数据
+
+        Returns:
+            bool: 是否写入成功
+        """
+        return self.set_many({stock_code: factor_data})
+
+    def clear(self, stock_code: Optional[str] = None) -> bool:
+        """清除因子缓存
+
+        Args:
+            stock_code: 股票代码，None表示清除所有
+
+        Returns:
+            bool: 是否清除成功
+        """
+        try:
+            with self._lock:
+                if stock_code is None:
+                    self._file.close()
+                    try:
+                        self._write_segment(self.log_path, {})
+                    finally:
+                        self._reopen()
+                    self._index.clear()
+                    self._records = 0
+                    self._generation += 1
+                elif stock_code in self._index:
+                    self._append(_encode({"k": stock_code, "d": 1}), 1)
+                    del self._index[stock_code]
+                    self._maybe_compact()
+            return True
+        except IOError as e:
+            print(f"清除因子缓存日志失败: {e}")
+            return False
+
+    def _reopen(self):
+        """段文件被替换后重新打开读写句柄，调用方需持有锁"""
+        self._reader.close()
+        self._file = open(self.log_path, 'ab')
+        self._reader = open(self.log_path, 'rb')
+
+    def garbage_ratio(self) -> float:
+        """被覆盖或删除的记录占比"""
+        with self._lock:
+            if not self._records:
+                return 0.0
+            return 1 - len(self._index) / self._records
+
+    def _maybe_compact(self):
+        """垃圾比例超过阈值时启动后台压缩，调用方需持有锁"""
+        if self._compacting or self._records < self.compact_min_records:
+            return
+        if 1 - len(self._index) / self._records < self.compact_ratio:
+            return
+        self._compacting = True
+        threading.Thread(target=self._compact_in_background, daemon=True).start()
+
+    def _compact_in_background(self):
+        """后台压缩，失败时保留原段文件"""
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"因子缓存日志压缩失败: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def compact(self):
+        """把存活记录重写为新的段文件并原子替换
+
+        只在取快照与替换段文件时持有锁：重写期间读写照常进行，新追加的记录在替换前
+        原样接到新段文件末尾。期间段文件被清空或已被其他压缩替换时放弃本次压缩。
+        """
+        with self._lock:
+            generation = self._generation
+            snapshot = dict(self._index)
+            snapshot_end = self._file.tell()
+            reader = open(self.log_path, 'rb')
+        tmp_path = f"{self.log_path}.{threading.get_ident()}.compact"
+        try:
+            with open(tmp_path, 'wb') as out:
+                index, offset = self._copy_live(snapshot, reader, out)
+                out.flush()
+                os.fsync(out.fileno())
+                with self._lock:
+                    if generation != self._generation:
+                        return
+                    # 快照之后追加的记录
+                    reader.seek(snapshot_end)
+                    tail = reader.read(self._file.tell() - snapshot_end)
+                    records = len(index)
+                    for line in tail.splitlines(keepends=True):
+                        record = json.loads(line)
+                        if record.get("d"):
+                            index.pop(record["k"], None)
+                        else:
+                            index[record["k"]] = offset
+                        offset += len(line)
+                        records += 1
+                    out.write(tail)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    self._file.close()
+                    try:
+                        os.replace(tmp_path, self.log_path)
+                    finally:
+                        self._reopen()
+                    self._index = index
+                    self._records = records
+                    self._generation += 1
+                    self._compactions += 1
+        finally:
+            reader.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _copy_live(self, snapshot: Dict[str, int], reader, out) -> Tuple[Dict[str, int], int]:
+        """把快照中的存活记录原样复制到新段文件（不持有锁）
+
+        段文件只追加，快照范围内的字节在替换前不会变化
+
+        Args:
+            snapshot: 股票代码到旧偏移量的映射
+            reader: 旧段文件的读句柄
+            out: 新段文件的写句柄
+
+        Returns:
+            Tuple[Dict[str, int], int]: (新索引, 已写入字节数)
+        """
+        index = {}
+        offset = 0
+        for stock_code, old_offset in snapshot.items():
+            reader.seek(old_offset)
+            line = reader.readline()
+            out.write(line)
+            index[stock_code] = offset
+            offset += len(line)
+        return index, offset
+
+    def stats(self) -> Dict[str, float]:
+        """获取记录数、存活键数、垃圾比例与压缩次数
+
+        Returns:
+            Dict[str, float]: 统计信息
+        """
+        with self._lock:
+            return {
+                "records": self._records,
+                "keys": len(self._index),
+                "garbage_ratio": self.garbage_ratio(),
+                "compactions": self._compactions,
+            }
+
+    def close(self):
+        """关闭文件句柄"""
+        with self._lock:
+            self._file.close()
+            self._reader.close()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多提供商竞速模块：主提供商迟迟不出首个token时启动备用提供商，先出token者胜出，其余请求取消
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Tuple, Iterator, Optional
+from config import Config, ModelProvider
+
+
+def iter_stream_content(stream) -> Iterator[str]:
+    """从流式响应中逐段取出非空的增量文本
+
+    Args:
+        stream: chat.completions.create(stream=True) 的返回值
+
+    Yields:
+        str: 增量文本
+    """
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+class _Attempt:
+    """一个提供商的一次请求"""
+
+    def __init__(self, provider: str, client, model_name: str):
+        self.provider = provider
+        self.client = client
+        self.model_name = model_name
+        self.started = time.monotonic()
+        self.stream = None
+        self.cancelled = False
+        self.failed = False
+        self._lock = threading.Lock()
+
+    def run(self, messages: List[Dict], create_kwargs: Dict, results: "queue.Queue"):
+        """发起流式请求，收到首个token（或流结束）后通知竞速方"""
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model_name, messages=messages, stream=True, **create_kwargs
+            )
+            with self._lock:
+                if self.cancelled:
+                    self._close(stream)
+                    return
+                self.stream = stream
+            content = iter_stream_content(stream)
+            first = next(content, "")
+            results.put(("first", self, (first, content)))
+        except Exception as e:
+            results.put(("error", self, e))
+
+    def cancel(self):
+        """取消请求，关闭已建立的连接"""
+        with self._lock:
+            self.cancelled = True
+            stream = self.stream
+        if stream is not None:
+            self._close(stream)
+
+    @staticmethod
+    def _close(stream):
+        close = getattr(stream, "close", None)
+        if close:
+            try:
+                close()
+            except Exception:
+                pass
+
+
+class ProviderRace:
+    """多提供商竞速
+
+    按历史首token延迟选择主提供商；主提供商在 hedge_delay 内未返回首个token时启动下一个提供商，
+    请求失败时立即启动下一个。最先返回首个token的提供商胜出，其余请求被取消。
+    胜出与失败请求的首token延迟记入 ModelProvider 的延迟直方图（失败计入溢出桶），供下一次选择主提供商；
+    被取消的请求不记录。
+    """
+
+    def __init__(self, endpoints: Dict[str, Tuple[object, str]], hedge_delay: Optional[float] = None):
+        """初始化竞速器
+
+        Args:
+            endpoints: 提供商名称到 (OpenAI兼容客户端, 模型名称) 的映射，按优先级排列
+            hedge_delay: 启动下一个提供商前的等待时间（秒），默认使用配置
+        """
+        self.endpoints = endpoints
+        self.hedge_delay = Config.HEDGE_DELAY if hedge_delay is None else hedge_delay
+        self.last_provider: Optional[str] = None
+
+    def stream(self, messages: List[Dict], on_winner: Optional[Callable[[str], None]] = None,
+               **create_kwargs) -> Iterator[str]:
+        """竞速发起流式请求
+
+        Args:
+            messages: 消息列表
+            on_winner: 胜出提供商确定后以其名称回调（产出首段文本之前）。竞速器被多个请求共享时
+                last_provider 可能已被其他请求覆盖，需要准确归属结果时使用该回调
+            **create_kwargs: 传给 chat.completions.create 的其他参数
+
+        Yields:
+            str: 胜出提供商的增量文本
+        """
+        order = ModelProvider.rank_providers(list(self.endpoints))
+        results: "queue.Queue" = queue.Queue()
+        attempts: List[_Attempt] = []
+        errors: List[Exception] = []
+
+        def launch():
+            provider = order[len(attempts)]
+            client, model_name = self.endpoints[provider]
+            attempt = _Attempt(provider, client, model_name)
+            attempts.append(attempt)
+            threading.Thread(target=attempt.run, args=(messages, create_kwargs, results), daemon=True).start()
+
+        launch()
+        pending = 1
+        while True:
+            can_hedge = len(attempts) < len(order)
+            try:
+                kind, attempt, payload = results.get(timeout=self.hedge_delay if can_hedge else None)
+            except queue.Empty:
+                launch()
+                pending += 1
+                continue
+
+            if kind == "first":
+                winner = attempt
+                break
+
+            attempt.failed = True
+            ModelProvider.record_latency(attempt.provider, None)
+            errors.append(payload)
+            pending -= 1
+            if can_hedge:
+                launch()
+                pending += 1
+            elif not pending:
+                raise errors[-1]
+
+        now = time.monotonic()
+        ModelProvider.record_latency(winner.provider, now - winner.started)
+        for attempt in attempts:
+            if attempt is not winner and not attempt.failed:
+                # 被取消的请求没有返回首个token，已耗时只是延迟下界，不记入直方图
+                # （否则刚启动即被取消的备用提供商会得到极小的延迟样本，被误选为主提供商）
+                attempt.cancel()
+        self.last_provider = winner.provider
+        if on_winner:
+            on_winner(winner.provider)
+
+        first, content = payload
+        if first:
+            yield first
+        yield from content
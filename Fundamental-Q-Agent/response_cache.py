@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型响应缓存模块：以提示词指纹为键的本地磁盘缓存，支持TTL与条目数上限
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from config import Config
+
+
+class ResponseCache:
+    """模型响应缓存
+
+    每条响应保存为缓存目录下以SHA-256指纹命名的JSON文件。系统提示词、用户提示词、
+    模型、提供商和采样参数完全相同时命中缓存，任一变化都会得到新的指纹。
+    条目按写入时间保存在内存索引中（启动时扫描一次目录），写入时按索引淘汰，不再逐次遍历目录。
+    """
+
+    _instances: Dict[str, "ResponseCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """初始化响应缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 有效期（秒），默认使用配置
+            max_entries: 最大条目数，超出后淘汰最早写入的条目，默认使用配置
+        """
+        self.cache_dir = cache_dir
+        self.ttl = Config.LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = Config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._scan()
+
+    @classmethod
+    def instance(cls, cache_dir: Optional[str] = None) -> "ResponseCache":
+        """获取指定目录的共享缓存实例
+
+        Args:
+            cache_dir: 缓存目录，默认使用配置
+
+        Returns:
+            ResponseCache: 缓存实例
+        """
+        cache_dir = cache_dir or Config.LLM_CACHE_DIR
+        cache = cls._instances.get(cache_dir)
+        if cache is None:
+            with cls._instances_lock:
+                cache = cls._instances.get(cache_dir)
+                if cache is None:
+                    cache = cls._instances[cache_dir] = cls(cache_dir)
+        return cache
+
+    @staticmethod
+    def make_key(system_prompt: str, user_prompt: str, model: str, provider: str,
+                 temperature: float, max_tokens: int) -> str:
+        """计算提示词指纹
+
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            model: 模型名称
+            provider: 模型提供商
+            temperature: 温度
+            max_tokens: 最大令牌数
+
+        Returns:
+            str: 十六进制SHA-256指纹
+        """
+        payload = json.dumps(
+            [provider, model, temperature, max_tokens, system_prompt, user_prompt],
+            ensure_ascii=False, separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """缓存条目文件路径"""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _scan(self) -> "OrderedDict[str, float]":
+        """扫描缓存目录，按修改时间从早到晚建立索引"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.cache_dir, name)), name[:-len('.json')]))
+            except OSError:
+                continue
+        entries.sort()
+        return OrderedDict((key, mtime) for mtime, key in entries)
+
+    def _remove(self, key: str):
+        """删除缓存条目文件（调用方持有锁）"""
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[str]:
+        """读取未过期的缓存响应
+
+        Args:
+            key: 提示词指纹
+
+        Returns:
+            Optional[str]: 缓存的模型输出，未命中或已过期时返回None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (IOError, ValueError):
+            return None
+        if time.time() - entry.get("created_at", 0) >= self.ttl:
+            with self._lock:
+                self._remove(key)
+            return None
+        return entry.get("response")
+
+    def put(self, key: str, response: str, model: str = "", provider: str = ""):
+        """写入缓存响应，超过条目数上限时淘汰最早的条目
+
+        Args:
+            key: 提示词指纹
+            response: 模型输出
+            model: 模型名称（仅记录）
+            provider: 模型提供商（仅记录）
+        """
+        entry = {"response": response, "model": model, "provider": provider, "created_at": time.time()}
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            print(f"写入模型响应缓存失败: {e}")
+            return
+        with self._lock:
+            self._index[key] = entry["created_at"]
+            self._index.move_to_end(key)
+            while len(self._index) > self.max_entries:
+                self._remove(next(iter(self._index)))
+
+    def __len__(self) -> int:
+        """缓存条目数"""
+        return len(self._index)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+            self._index.clear()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite存储模块：WAL模式的观察池与因子缓存，主键查询、批量写入、JSON文件一次性迁移
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Iterable, Tuple
+from config import Config
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observation_pool (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT UNIQUE,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS factor_cache (
+    stock_code TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _dumps(data: Dict) -> str:
+    """紧凑JSON序列化"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class SQLiteStore:
+    """SQLite存储类
+
+    每个线程持有独立连接，WAL模式下读写互不阻塞，多个Streamlit会话并发写入不会损坏数据。
+    """
+
+    _instances: Dict[str, "SQLiteStore"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path: str):
+        """初始化存储
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._migrate_json_files()
+
+    @classmethod
+    def instance(cls, db_path: Optional[str] = None) -> "SQLiteStore":
+        """获取指定数据库文件的共享存储实例
+
+        Args:
+            db_path: 数据库文件路径，默认使用配置
+
+        Returns:
+            SQLiteStore: 存储实例
+        """
+        db_path = db_path or Config.SQLITE_DB_PATH
+        store = cls._instances.get(db_path)
+        if store is None:
+            with cls._instances_lock:
+                store = cls._instances.get(db_path)
+                if store is None:
+                    store = cls._instances[db_path] = cls(db_path)
+        return store
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=Config.SQLITE_BUSY_TIMEOUT)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _migrate_json_files(self):
+        """首次使用时将已有的JSON文件导入数据库（只执行一次）"""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+                return
+
+            pool = self._read_json_file(Config.OBSERVATION_POOL_PATH).get('stocks', [])
+            conn.executemany(
+                "INSERT OR IGNORE INTO observation_pool (code, data) VALUES (?, ?)",
+                [(stock.get('code'), _dumps(stock)) for stock in pool]
+            )
+            cache = self._read_json_file(Config.FACTOR_CACHE_PATH)
+            self._upsert_factor_cache(conn, cache.items())
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (_dumps({"stocks": len(pool), "factor_cache": len(cache), "timestamp": time.time()}),)
+            )
+
+    @staticmethod
+    def _read_json_file(file_path: str) -> Dict:
+        """读取待迁移的JSON文件，不存在或损坏时返回空字典"""
+        if not os.path.exists(file_path):
+            return {}
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    @staticmethod
+    def _upsert_factor_cache(conn: sqlite3.Connection, items: Iterable[Tuple[str, Dict]]):
+        """批量写入因子缓存"""
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO factor_cache (stock_code, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(stock_code) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            [(stock_code, _dumps(data), now) for stock_code, data in items]
+        )
+
+    def get_observation_pool(self) -> List[Dict]:
+        """获取观察池
+
+        Returns:
+            List[Dict]: 观察池列表（按加入顺序）
+        """
+        rows = self._connection().execute("SELECT data FROM observation_pool ORDER BY seq").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def add_to_observation_pool(self, stock_info: Dict) -> bool:
+        """添加到观察池，股票代码已存在时返回False
+
+        Args:
+            stock_info: 股票信息
+
+        Returns:
+            bool: 是否添加成功
+        """
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO observation_pool (code, data) VALUES (?, ?)",
+                (stock_info.get('code'), _dumps(stock_info))
+            )
+        return cursor.rowcount == 1
+
+    def remove_from_observation_pool(self, stock_code: str) -> bool:
+        """从观察池移除
+
+        Args:
+            stock_code: 股票代码
+
+        Returns:
+            bool: 是否移除成功
+        """
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM observation_pool WHERE code = ?", (stock_code,))
+        return cursor.rowcount > 0
+
+    def update_observation_pool(self, stock_code: str, updated_info: Dict) -> bool:
+        """更新观察池中的股票信息
+
+        Args:
+            stock_code: 股票代码
+            updated_info: 更新的信息
+
+        Returns:
+            bool: 是否更新成功，股票不存在或新代码已在观察池中时返回False
+        """
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT data FROM observation_pool WHERE code = ?", (stock_code,)).fetchone()
+                if row is None:
+                    return False
+                stock = json.loads(row[0])
+                stock.update(updated_info)
+                conn.execute(
+                    "UPDATE observation_pool SET code = ?, data = ? WHERE code = ?",
+                    (stock.get('code'), _dumps(stock), stock_code)
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def get_factor_cache(self, stock_code: str) -> Optional[Dict]:
+        """获取因子缓存
+
+        Args:
+            stock_code: 股票代码
+
+        Returns:
+            Optional[Dict]: 因子缓存数据
+        """
+        row = self._connection().execute(
+            "SELECT data FROM factor_cache WHERE stock_code = ?", (stock_code,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_factor_cache(self, stock_code: str, factor_data: Dict) -> bool:
+        """设置因子缓存
+
+        Args:
+            stock_code: 股票代码
+            factor_data: 因子数据
+
+        Returns:
+            bool: 是否设置成功
+        """
+        return self.set_factor_cache_many({stock_code: factor_data})
+
+    def set_factor_cache_many(self, items: Dict[str, Dict]) -> bool:
+        """在一个事务中批量设置因子缓存
+
+        Args:
+            items: 股票代码到因子数据的映射
+
+        Returns:
+            bool: 是否设置成功
+        """
+        try:
+            conn = self._connection()
+            with conn:
+                self._upsert_factor_cache(conn, items.items())
+            return True
+        except sqlite3.Error:
+            return False
+
+    def clear_factor_cache(self, stock_code: Optional[str] = None) -> bool:
+        """清除因子缓存
+
+        Args:
+            stock_code: 股票代码，None表示清除所有
+
+        Returns:
+            bool: 是否清除成功
+        """
+        try:
+            conn = self._connection()
+            with conn:
+                if stock_code:
+                    conn.execute("DELETE FROM factor_cache WHERE stock_code = ?", (stock_code,))
+                else:
+                    conn.execute("DELETE FROM factor_cache")
+            return True
+        except sqlite3.Error:
+            return False
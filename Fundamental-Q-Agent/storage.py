@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-存储模块：本地JSON存储，包含观察池和因子缓存的增删改查
+存储模块：本地存储，包含观察池和因子缓存的增删改查
+
+默认使用SQLite（WAL模式）后端，Config.STORAGE_BACKEND = "json" 时使用JSON文件，
+"log" 时观察池使用JSON文件、因子缓存使用追加写日志
 """
 
 import json
@@ -13,6 +16,22 @@ from config import Config
 class Storage:
     """存储类"""
     
+    @staticmethod
+    def _sqlite():
+        """获取SQLite后端，未启用时返回None"""
+        if Config.STORAGE_BACKEND != "sqlite":
+            return None
+        from sqlite_store import SQLiteStore
+        return SQLiteStore.instance()
+    
+    @staticmethod
+    def _factor_log():
+        """获取因子缓存追加写日志，未启用时返回None"""
+        if Config.STORAGE_BACKEND != "log":
+            return None
+        from log_store import FactorCacheLog
+        return FactorCacheLog.instance()
+    
     @staticmethod
     def _read_json(file_path: str) -> Dict:
         """读取JSON文件
@@ -57,6 +76,10 @@ class Storage:
         Returns:
             List[Dict]: 观察池列表
         """
+        sqlite = cls._sqlite()
+        if sqlite:
+            return sqlite.get_observation_pool()
+        
         data = cls._read_json(Config.OBSERVATION_POOL_PATH)
         return data.get('stocks', [])
     
@@ -70,6 +93,10 @@ class Storage:
         Returns:
             bool: 是否添加成功
         """
+        sqlite = cls._sqlite()
+        if sqlite:
+            return sqlite.add_to_observation_pool(stock_info)
+        
         data = cls._read_json(Config.OBSERVATION_POOL_PATH)
         stocks = data.get('stocks', [])
         
@@ -93,6 +120,10 @@ class Storage:
         Returns:
             bool: 是否移除成功
         """
+        sqlite = cls._sqlite()
+        if sqlite:
+            return sqlite.remove_from_observation_pool(stock_code)
+        
         data = cls._read_json(Config.OBSERVATION_POOL_PATH)
         stocks = data.get('stocks', [])
         
@@ -114,6 +145,10 @@ class Storage:
         Returns:
             bool: 是否更新成功
         """
+        sqlite = cls._sqlite()
+        if sqlite:
+            return sqlite.update_observation_pool(stock_code, updated_info)
+        
         data = cls._read_json(Config.OBSERVATION_POOL_PATH)
         stocks = data.get('stocks', [])
         
@@ -140,6 +175,14 @@ class Storage:
         Returns:
             Optional[Dict]: 因子缓存数据
         """
+        sqlite = cls._sqlite()
+        if sqlite:
+            return sqlite.get_factor_cache(stock_code)
+        
+        factor_log = cls._factor_log()
+        if factor_log:
+            return factor_log.get(stock_code)
+        
         data = cls._read_json(Config.FACTOR_CACHE_PATH)
         return data.get(stock_code)
     
@@ -154,6 +197,14 @@ class Storage:
         Returns:
             bool: 是否设置成功
         """
+        sqlite = cls._sqlite()
+        if sqlite:
+            return sqlite.set_factor_cache(stock_code, factor_data)
+        
+        factor_log = cls._factor_log()
+        if factor_log:
+            return factor_log.set(stock_code, factor_data)
+        
         data = cls._read_json(Config.FACTOR_CACHE_PATH)
         data[stock_code] = factor_data
         return cls._write_json(Config.FACTOR_CACHE_PATH, data)
@@ -168,6 +219,14 @@ class Storage:
         Returns:
             bool: 是否清除成功
         """
+        sqlite = cls._sqlite()
+        if sqlite:
+            return sqlite.clear_factor_cache(stock_code)
+        
+        factor_log = cls._factor_log()
+        if factor_log:
+            return factor_log.clear(stock_code)
+        
         if stock_code:
             data = cls._read_json(Config.FACTOR_CACHE_PATH)
             if stock_code in data:
@@ -177,3 +236,25 @@ class Storage:
         else:
             # 清除所有缓存
             return cls._write_json(Config.FACTOR_CACHE_PATH, {})
+    
+    @classmethod
+    def set_factor_cache_many(cls, items: Dict[str, Dict]) -> bool:
+        """批量设置因子缓存
+        
+        Args:
+            items: 股票代码到因子数据的映射
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        sqlite = cls._sqlite()
+        if sqlite:
+            return sqlite.set_factor_cache_many(items)
+        
+        factor_log = cls._factor_log()
+        if factor_log:
+            return factor_log.set_many(items)
+        
+        data = cls._read_json(Config.FACTOR_CACHE_PATH)
+        data.update(items)
+        return cls._write_json(Config.FACTOR_CACHE_PATH, data)
@@ -1694,6 +1694,9 @@ document.addEventListener("DOMContentLoaded", () => {
     aiStockSelector.appendChild(opt);
   }
   
+  // 后端分配的会话ID，对话与追问保持在同一会话中
+  let sessionId = null;
+  
   // 发送消息函数
   async function sendMessage() {
     const message = userInput.value.trim();
@@ -1713,7 +1716,8 @@ document.addEventListener("DOMContentLoaded", () => {
       const requestData = {
         code: selectedStock,
         user_question: message,
-        real_time: false
+        real_time: false,
+        session_id: sessionId
       };
       
       // 调用后端API
@@ -1731,6 +1735,14 @@ document.addEventListener("DOMContentLoaded", () => {
       typingIndicator.remove();
       
       if (result.success) {
+        // 原会话已超时或丢失时提示用户，之前的对话不再作为上下文
+        if (result.session_expired) {
+          addMessageToHistory("ai", "之前的会话已过期，以上对话不再作为上下文，已开始新的会话。");
+        }
+        
+        // 保存会话ID，后续请求沿用同一会话
+        sessionId = result.session_id || sessionId;
+        
         // 显示AI响应
         const aiResponse = formatAIResponse(result.data);
         addMessageToHistory("ai", aiResponse);
@@ -1,19 +1,67 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-from src.buffet_agent.agent import ValueInvestmentAgent
+from src.buffet_agent.agent import ValueInvestmentAgent, run_analysis
 from src.buffet_agent.data import load_data, load_sample_data
+from src.buffet_agent.session import SessionManager, is_valid_session_id
+from src.buffet_agent.stock_listing import StockListing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import json
 
 app = Flask(__name__)
 # 添加CORS支持
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=["X-Session-ID"])
 
-# 创建全局智能体实例
-agent = ValueInvestmentAgent()
+# 会话配置：空闲超时（秒）与最大会话数
+SESSION_IDLE_TIMEOUT = 1800
+SESSION_MAX_SESSIONS = 1000
+
+# 每个客户端会话独立的智能体实例
+sessions = SessionManager(ValueInvestmentAgent, idle_timeout=SESSION_IDLE_TIMEOUT,
+                          max_sessions=SESSION_MAX_SESSIONS)
 
 # 加载示例数据
 sample_data = load_sample_data()
 
+# 股票列表按数据版本预先序列化
+stock_listing = StockListing(sample_data)
+
+# 股票列表分页：每页最大数量
+STOCKS_MAX_PAGE_SIZE = 500
+
+# 批量分析配置：单次请求最大股票数、工作线程数、同时进行的批量请求数
+BATCH_MAX_CODES = 500
+BATCH_WORKERS = 8
+BATCH_MAX_CONCURRENT_REQUESTS = 4
+
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch-analyze")
+batch_slots = threading.BoundedSemaphore(BATCH_MAX_CONCURRENT_REQUESTS)
+
+def _session_id(data):
+    """
+    读取请求中的会话ID（X-Session-ID 请求头或 session_id 字段），未提供时返回None
+    """
+    session_id = request.headers.get('X-Session-ID') or data.get('session_id')
+    if session_id is None:
+        return None
+    session_id = str(session_id)
+    if not is_valid_session_id(session_id):
+        raise ValueError("会话ID只能包含1-64位字母、数字、下划线或连字符")
+    return session_id
+
+def _session_response(session_id, result, requested_session_id=None):
+    """
+    返回带会话ID的成功响应；请求的会话已不存在（超时淘汰或落到其他进程）时标记 session_expired
+    """
+    response = jsonify({
+        "success": True,
+        "session_id": session_id,
+        "session_expired": requested_session_id is not None and requested_session_id != session_id,
+        "data": result
+    })
+    response.headers['X-Session-ID'] = session_id
+    return response
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
     """
@@ -23,12 +71,15 @@ def analyze():
     {
         "code": "股票代码",
         "user_question": "用户问题（可选）",
-        "real_time": false
+        "real_time": false,
+        "session_id": "会话ID（可选，也可通过 X-Session-ID 请求头传递，未提供时新建会话）"
     }
     
     返回结果:
     {
         "success": true,
+        "session_id": "会话ID（请求的会话不存在或已超时时为新分配的ID）",
+        "session_expired": false,
         "data": {
             "traditional_analysis": {},
             "github_deep_analysis": {},
@@ -44,6 +95,10 @@ def analyze():
         
         if not code:
             return jsonify({"success": False, "error": "缺少股票代码"}), 400
+        try:
+            session_id = _session_id(data)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
         # 加载股票数据
         stock_data = load_data(code, real_time)
@@ -54,16 +109,90 @@ def analyze():
                 return jsonify({"success": False, "error": "找不到股票数据"}), 404
         
         # 运行分析
+        requested_session_id = session_id
+        session_id, agent = sessions.get_or_create(session_id)
         result = agent.run_analysis(stock_data, user_question)
         
-        return jsonify({
-            "success": True,
-            "data": result
-        })
+        return _session_response(session_id, result, requested_session_id)
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+def _analyze_item(code, stock_data, user_question):
+    """
+    分析单只股票，异常转换为该条目的错误结果
+    """
+    if not stock_data:
+        return {"code": code, "success": False, "error": "找不到股票数据"}
+    try:
+        return {"code": code, "success": True, "data": run_analysis(stock_data, user_question)}
+    except Exception as e:
+        return {"code": code, "success": False, "error": str(e)}
+
+def _ndjson_line(item):
+    return json.dumps(item, ensure_ascii=False, default=str) + "\n"
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    批量分析，按完成顺序以NDJSON逐行流式返回
+    
+    请求参数:
+    {
+        "codes": ["股票代码", ...],
+        "user_question": "用户问题（可选）",
+        "real_time": false
+    }
+    
+    返回结果（每行一个JSON对象，单只股票失败不影响其他股票）:
+    {"code": "股票代码", "success": true, "data": {...}}
+    {"code": "股票代码", "success": false, "error": "错误信息"}
+    {"done": true, "total": 2, "succeeded": 1, "failed": 1}
+    """
+    try:
+        data = request.json or {}
+        codes = data.get('codes')
+        user_question = data.get('user_question')
+        real_time = data.get('real_time', False)
+        
+        if not codes or not isinstance(codes, list):
+            return jsonify({"success": False, "error": "缺少股票代码列表"}), 400
+        if len(codes) > BATCH_MAX_CODES:
+            return jsonify({"success": False, "error": f"单次最多分析 {BATCH_MAX_CODES} 只股票"}), 400
+        
+        # 去重并保持顺序
+        codes = list(dict.fromkeys(str(code) for code in codes))
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    
+    if not batch_slots.acquire(blocking=False):
+        return jsonify({"success": False, "error": "批量分析请求过多，请稍后重试"}), 429
+    
+    def generate():
+        futures = []
+        try:
+            # 批量加载行情：实时数据合并为少量请求
+            stock_data = load_data(codes, real_time)
+            futures = [batch_executor.submit(_analyze_item, code, stock_data.get(code), user_question)
+                       for code in codes]
+            succeeded = 0
+            for future in as_completed(futures):
+                item = future.result()
+                succeeded += 1 if item["success"] else 0
+                yield _ndjson_line(item)
+            yield _ndjson_line({"done": True, "total": len(codes), "succeeded": succeeded,
+                                "failed": len(codes) - succeeded})
+        except Exception as e:
+            yield _ndjson_line({"done": True, "success": False, "error": str(e)})
+        finally:
+            # 客户端提前断开时取消尚未开始的任务
+            for future in futures:
+                future.cancel()
+    
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.call_on_close(batch_slots.release)
+    return response
+
 @app.route('/api/ask', methods=['POST'])
 def ask():
     """
@@ -71,12 +200,15 @@ def ask():
     
     请求参数:
     {
-        "question": "用户问题"
+        "question": "用户问题",
+        "session_id": "会话ID（可选，也可通过 X-Session-ID 请求头传递）"
     }
     
     返回结果:
     {
         "success": true,
+        "session_id": "会话ID（请求的会话不存在或已超时时为新分配的ID）",
+        "session_expired": false,
         "data": {
             "answer": "回答内容",
             "confidence": 0.8,
@@ -90,48 +222,98 @@ def ask():
         
         if not question:
             return jsonify({"success": False, "error": "缺少问题内容"}), 400
+        try:
+            session_id = _session_id(data)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
-        # 处理追问
+        # 处理追问（基于本会话的对话历史）
+        requested_session_id = session_id
+        session_id, agent = sessions.get_or_create(session_id)
         result = agent.ask_follow_up(question)
         
-        return jsonify({
-            "success": True,
-            "data": result
-        })
+        return _session_response(session_id, result, requested_session_id)
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+def reload_sample_data():
+    """
+    重新加载示例数据，股票列表缓存随之失效
+    """
+    global sample_data
+    sample_data = load_sample_data()
+    stock_listing.load(sample_data)
+
+def _positive_int_arg(name):
+    """
+    读取正整数查询参数，未提供时返回None
+    """
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    value = int(value)
+    if value < 1:
+        raise ValueError
+    return value
+
 @app.route('/api/stocks', methods=['GET'])
 def get_stocks():
     """
     获取所有可用的股票列表
     
+    查询参数（均可选）:
+        market: 市场（如 SH、SZ）
+        industry: 行业
+        page: 页码（从1开始）
+        page_size: 每页数量（最大 STOCKS_MAX_PAGE_SIZE），只提供 page_size 时返回第一页
+    
+    响应带 ETag，请求头 If-None-Match 匹配时返回 304；客户端支持时返回 gzip 压缩内容
+    
     返回结果:
     {
         "success": true,
+        "total": 1,
+        "page": 1,
+        "page_size": 50,
         "data": [
             {
                 "code": "股票代码",
                 "name": "公司名称",
-                "industry": "行业"
+                "industry": "行业",
+                "market": "市场"
             }
         ]
     }
+    （page 与 page_size 仅在分页时返回）
     """
     try:
-        stocks = []
-        for code, data in sample_data.items():
-            stocks.append({
-                "code": code,
-                "name": data.get('name', ''),
-                "industry": data.get('industry', '')
-            })
+        try:
+            page = _positive_int_arg('page')
+            page_size = _positive_int_arg('page_size')
+        except ValueError:
+            return jsonify({"success": False, "error": "page 与 page_size 必须为正整数"}), 400
+        if page is not None or page_size is not None:
+            page = page or 1
+            page_size = min(page_size or STOCKS_MAX_PAGE_SIZE, STOCKS_MAX_PAGE_SIZE)
+        
+        rendered = stock_listing.render(request.args.get('market'), request.args.get('industry'),
+                                        page, page_size)
         
-        return jsonify({
-            "success": True,
-            "data": stocks
-        })
+        use_gzip = 'gzip' in request.accept_encodings
+        etag = rendered.gzip_etag if use_gzip else rendered.etag
+        # If-None-Match 按弱比较匹配（RFC 9110），同时支持 * 与 W/ 前缀的校验器
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        elif use_gzip:
+            response = Response(rendered.gzipped, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(rendered.body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -0,0 +1,56 @@
+"""异步分析流程基准：使用延迟的模拟大模型后端，对比串行 run_analysis 与并发 arun_analysis 的延迟"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.buffet_agent import agent as agent_module
+from src.buffet_agent.agent import ValueInvestmentAgent
+from src.buffet_agent.data import load_sample_data
+
+
+def delayed(func, delay):
+    """包装大模型函数，模拟网络与生成延迟"""
+    def wrapper(*args, **kwargs):
+        time.sleep(delay)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def measure(label, analyze, companies, iterations):
+    samples = []
+    for _ in range(iterations):
+        for company_data in companies:
+            start = time.perf_counter()
+            analyze(company_data)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label}: p50={p50 * 1000:7.1f} ms  p99={p99 * 1000:7.1f} ms")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description='arun_analysis 延迟基准')
+    parser.add_argument('--llm-delay', type=float, default=0.3, help='传统大模型模拟延迟（秒）')
+    parser.add_argument('--github-delay', type=float, default=0.6, help='GitHub大模型模拟延迟（秒）')
+    parser.add_argument('--iterations', type=int, default=3, help='每家公司分析次数')
+    args = parser.parse_args()
+
+    agent_module.get_llm_analysis = delayed(agent_module.get_llm_analysis, args.llm_delay)
+    agent_module.get_github_llm_analysis = delayed(agent_module.get_github_llm_analysis, args.github_delay)
+
+    companies = list(load_sample_data().values())
+    agent = ValueInvestmentAgent()
+    serial = measure("串行 run_analysis       ", agent.run_analysis, companies, args.iterations)
+    concurrent = measure("并发 arun_analysis      ", agent.run_analysis_concurrent, companies, args.iterations)
+    print(f"p50 延迟降低 {(1 - concurrent / serial) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
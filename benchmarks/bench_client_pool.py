@@ -0,0 +1,96 @@
+"""OpenAI客户端池基准：对比每次分析新建客户端与复用客户端池时的耗时与新建连接数
+
+使用本地伪 OpenAI 兼容服务，每个新连接额外等待 --handshake-ms 毫秒，模拟 DNS 解析与 TLS 握手开销。
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+
+# 添加 Fundamental-Q-Agent 目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Fundamental-Q-Agent"))
+
+from client_pool import ClientPool
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """伪 /chat/completions 接口，支持 HTTP/1.1 长连接并统计新建连接数"""
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    handshake = 0.0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with _FakeOpenAIHandler.lock:
+            _FakeOpenAIHandler.connections += 1
+        time.sleep(_FakeOpenAIHandler.handshake)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "bench-model",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "【决策结论】观察"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(label, get_client, requests_total):
+    """顺序发送请求，打印总耗时、平均耗时与新建连接数"""
+    _FakeOpenAIHandler.connections = 0
+    start = time.perf_counter()
+    for _ in range(requests_total):
+        client = get_client()
+        client.chat.completions.create(model="bench-model", messages=[{"role": "user", "content": "分析"}])
+    elapsed = time.perf_counter() - start
+    print(f"{label}: 总耗时 {elapsed * 1000:8.1f} ms | 平均 {elapsed / requests_total * 1000:6.1f} ms/次"
+          f" | 新建连接 {_FakeOpenAIHandler.connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI客户端池基准测试')
+    parser.add_argument('--requests', type=int, default=50, help='分析次数')
+    parser.add_argument('--handshake-ms', type=float, default=30, help='每个新连接的模拟握手耗时（毫秒）')
+    args = parser.parse_args()
+
+    _FakeOpenAIHandler.handshake = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    def new_client():
+        # 旧行为：每次点击“分析”都新建客户端
+        return openai.OpenAI(api_key="sk-bench", base_url=base_url)
+
+    pool = ClientPool()
+
+    try:
+        print(f"伪 OpenAI 服务 {base_url}，{args.requests} 次分析，模拟握手 {args.handshake_ms:.0f} ms")
+        run("每次新建客户端", new_client, args.requests)
+        run("复用客户端池  ", lambda: pool.get_client("openai", "sk-bench", base_url), args.requests)
+    finally:
+        pool.clear()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""GitHub大模型接口基准：对比每次新建接口（重新读取Skill.md）与注册表复用的单次分析开销"""
+import os
+import sys
+import time
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.buffet_agent import github_llm
+from src.buffet_agent.data import load_sample_data
+
+
+def per_call_overhead(label, factory, company_data, iterations):
+    """测量构建接口并完成一次分析的平均耗时"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        interface = factory()
+        interface.generate_investment_analysis(company_data)
+        interface.clear_conversation_history()
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"{label}: {elapsed * 1e6:8.1f} µs/次")
+    return elapsed
+
+
+def fresh_interface():
+    """复现改造前的行为：每次新建实例并从磁盘重新读取Skill.md"""
+    github_llm.clear_skill_cache()
+    return github_llm.GitHubLLMInterface()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GitHub大模型接口开销基准')
+    parser.add_argument('--iterations', type=int, default=2000, help='分析次数')
+    args = parser.parse_args()
+
+    company_data = load_sample_data()["600519.SH"]
+    before = per_call_overhead("每次新建接口", fresh_interface, company_data, args.iterations)
+    github_llm.clear_github_llm_interfaces()
+    after = per_call_overhead("注册表复用  ", github_llm.get_github_llm_interface, company_data, args.iterations)
+    print(f"单次分析开销降低: {(before - after) * 1e6:.1f} µs ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
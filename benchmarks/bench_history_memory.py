@@ -0,0 +1,77 @@
+"""会话历史内存基准：对比无界历史（结果字符串副本）与有界 HistoryStore 在大量请求下的内存占用"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.buffet_agent.agent import ValueInvestmentAgent
+from src.buffet_agent.data import load_sample_data
+from src.buffet_agent.llm import get_llm_analysis
+from src.buffet_agent.github_llm import get_github_llm_analysis
+
+
+class UnboundedHistoryAgent(ValueInvestmentAgent):
+    """旧版行为：历史列表无上限，对话历史保存完整结果的 str() 副本"""
+
+    def __init__(self):
+        super().__init__()
+        self.legacy_conversation: list = []
+        self.legacy_analyses: list = []
+
+    def _build_result(self, company_data, user_question, traditional, llm_analysis, github_analysis):
+        result = super()._build_result(company_data, user_question, traditional, llm_analysis, github_analysis)
+        self.legacy_analyses.append(result)
+        if user_question:
+            self.legacy_conversation.append({"role": "user", "content": user_question})
+        self.legacy_conversation.append({"role": "assistant", "content": str(result)})
+        return result
+
+
+def run(label, agent, stages, requests, checkpoints):
+    """模拟 api.py 中全局 agent 连续处理请求，记录各检查点的内存占用"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    companies = list(stages)
+    for i in range(1, requests + 1):
+        company_data, traditional, llm_analysis, github_analysis = companies[i % len(companies)]
+        agent._build_result(company_data, "护城河能维持多久？", traditional, llm_analysis, github_analysis)
+        if i in checkpoints:
+            current = tracemalloc.get_traced_memory()[0] - baseline
+            print(f"{label} {i:>7} 次请求: {current / 1024 / 1024:8.2f} MB")
+    elapsed = time.perf_counter() - start
+    current = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    print(f"{label} 耗时 {elapsed:.1f} s，每次请求 {current / requests:.0f} B")
+    return current / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description='会话历史内存基准')
+    parser.add_argument('--requests', type=int, default=100000, help='有界历史的请求数')
+    parser.add_argument('--legacy-requests', type=int, default=10000, help='无界历史的请求数（之后按线性外推）')
+    args = parser.parse_args()
+
+    stages = []
+    for company_data in load_sample_data().values():
+        traditional = ValueInvestmentAgent()._run_skills(company_data)
+        stages.append((company_data, traditional, get_llm_analysis(company_data),
+                       get_github_llm_analysis(company_data, "护城河能维持多久？")))
+
+    def checkpoints(n):
+        return {c for c in (1000, 10000, 100000, n) if c <= n}
+
+    legacy_per_request = run("无界历史", UnboundedHistoryAgent(), stages, args.legacy_requests,
+                             checkpoints(args.legacy_requests))
+    print(f"无界历史外推到 {args.requests} 次请求: {legacy_per_request * args.requests / 1024 / 1024:.1f} MB")
+    agent = ValueInvestmentAgent()
+    run("有界历史", agent, stages, args.requests, checkpoints(args.requests))
+    print(f"有界历史统计: {agent.history.stats()}")
+
+
+if __name__ == "__main__":
+    main()
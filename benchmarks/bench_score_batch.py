@@ -0,0 +1,72 @@
+"""批量评分基准：对比逐条调用 skills 与 skills.score_batch 的耗时"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.buffet_agent import skills
+from src.buffet_agent.batch import score_records_loop
+
+
+def make_frame(size, seed=0):
+    """生成随机全市场列式数据"""
+    rng = np.random.default_rng(seed)
+    return {
+        "code": [f"{i:06d}.SH" for i in range(size)],
+        "pe": rng.uniform(-10, 120, size),
+        "pb": rng.uniform(0.3, 15, size),
+        "peg": rng.uniform(0, 3, size),
+        "pe_hist_percent": rng.integers(0, 101, size).astype(float),
+        "pb_hist_percent": rng.integers(0, 101, size).astype(float),
+        "roe_ttm": rng.uniform(-5, 40, size),
+        "debt_to_asset": rng.uniform(0, 100, size),
+        "revenue_growth": rng.uniform(-20, 40, size),
+        "profit_growth": rng.uniform(-20, 40, size),
+        "gross_margin": rng.uniform(0, 90, size),
+        "cash_flow_healthy": rng.random(size) > 0.3,
+    }
+
+
+def to_records(frame, size):
+    """列式数据转换为逐条评分使用的字典列表"""
+    columns = {key: list(np.asarray(values).tolist()) for key, values in frame.items()}
+    return [{key: columns[key][i] for key in columns} for i in range(size)]
+
+
+def bench(size, repeat):
+    frame = make_frame(size)
+    records = to_records(frame, size)
+
+    loop_best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        score_records_loop(records)
+        loop_best = min(loop_best, time.perf_counter() - start)
+
+    batch_best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        batch = skills.score_batch(frame)
+        batch_best = min(batch_best, time.perf_counter() - start)
+
+    print(f"{size:>7} 行 | 逐条: {loop_best * 1000:9.1f} ms | 批量: {batch_best * 1000:7.1f} ms"
+          f" | 加速: {loop_best / batch_best:6.1f}x | 综合分均值: {batch.avg.mean():.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='skills.score_batch 基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 50000], help='数据行数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数（取最优）')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
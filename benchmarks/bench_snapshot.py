@@ -0,0 +1,80 @@
+"""股票池快照基准：对比 JSON 文件与内存映射快照在大股票池下的启动耗时、按行与按列访问耗时"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.buffet_agent import skills
+from src.buffet_agent.batch import SCORE_FIELDS
+from src.buffet_agent.snapshot import write_snapshot, open_snapshot
+from benchmarks.bench_score_batch import make_frame, to_records
+
+
+def make_universe(size, extra_factors, seed=0):
+    """生成随机股票池：评分字段加 extra_factors 个附加因子"""
+    frame = make_frame(size, seed)
+    rng = np.random.default_rng(seed + 1)
+    for k in range(extra_factors):
+        frame[f"factor_{k:02d}"] = rng.normal(0, 1, size)
+    frame["name"] = [f"公司{i}" for i in range(size)]
+    frame["industry"] = [("银行", "白酒", "医药", "半导体")[i % 4] for i in range(size)]
+    records = to_records(frame, size)
+    return {record["code"]: record for record in records}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='股票池快照基准测试')
+    parser.add_argument('--size', type=int, default=50000, help='股票数量')
+    parser.add_argument('--factors', type=int, default=30, help='附加因子数量')
+    args = parser.parse_args()
+
+    universe = make_universe(args.size, args.factors)
+    codes = list(universe)
+    probe = codes[len(codes) // 2]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "universe.json")
+        snap_path = os.path.join(tmp, "universe.snap")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(universe, f, ensure_ascii=False)
+        _, write_time = timed(lambda: write_snapshot(universe, snap_path))
+        print(f"{args.size} 行 × {len(universe[probe])} 列 | JSON {os.path.getsize(json_path) / 1e6:.1f} MB"
+              f" | 快照 {os.path.getsize(snap_path) / 1e6:.1f} MB | 写入快照 {write_time * 1000:.0f} ms")
+
+        def load_json():
+            with open(json_path, encoding="utf-8") as f:
+                return json.load(f)
+
+        loaded, json_open = timed(load_json)
+        _, json_row = timed(lambda: loaded[probe]["roe_ttm"])
+        _, json_column = timed(lambda: np.array([loaded[code]["roe_ttm"] for code in codes]))
+        _, json_score = timed(lambda: skills.score_batch({key: [loaded[code].get(key) for code in codes]
+                                                          for key in SCORE_FIELDS}))
+        print(f"JSON : 启动 {json_open * 1000:8.1f} ms | 按代码读一行 {json_row * 1e6:8.1f} us"
+              f" | 取一列 {json_column * 1000:7.2f} ms | 批量评分 {json_score * 1000:7.1f} ms")
+
+        snapshot, snap_open = timed(lambda: open_snapshot(snap_path))
+        _, snap_row = timed(lambda: snapshot[probe]["roe_ttm"])
+        _, snap_column = timed(lambda: np.asarray(snapshot.columns["roe_ttm"]).sum())
+        _, snap_score = timed(lambda: skills.score_batch(snapshot.frame))
+        print(f"快照 : 启动 {snap_open * 1000:8.1f} ms | 按代码读一行 {snap_row * 1e6:8.1f} us"
+              f" | 取一列 {snap_column * 1000:7.2f} ms | 批量评分 {snap_score * 1000:7.1f} ms")
+        print("（快照首次按代码读取时构建代码索引，已计入“按代码读一行”）")
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
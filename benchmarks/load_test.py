@@ -0,0 +1,119 @@
+"""API 压测脚本：并发请求 /api/analyze 与 /api/stocks，报告吞吐量与延迟分位数
+
+用法:
+    python benchmarks/load_test.py --url http://127.0.0.1:5000
+    python benchmarks/load_test.py --start --workers 4 --threads 8   # 在本地启动 serve.py 后压测
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.buffet_agent.data import load_sample_data
+
+# --start 时等待服务优雅退出的时间（秒）
+SHUTDOWN_WAIT = 40
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def run_endpoint(label, send, requests_total, concurrency):
+    """以固定并发发送请求，打印 req/s 与 p50/p95/p99"""
+    local = threading.local()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = send(session, i)
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            (latencies if ok else errors).append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests_total)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    if not latencies:
+        print(f"{label}: 全部 {len(errors)} 个请求失败")
+        return
+    print(f"{label}: {len(latencies) / wall:8.1f} req/s  "
+          f"p50={percentile(latencies, 0.50) * 1000:7.1f} ms  "
+          f"p95={percentile(latencies, 0.95) * 1000:7.1f} ms  "
+          f"p99={percentile(latencies, 0.99) * 1000:7.1f} ms  失败 {len(errors)}")
+
+
+def start_server(args):
+    """在空闲端口上启动 serve.py，等待端口可连接"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    command = [sys.executable, os.path.join(ROOT, 'serve.py'), '--host', '127.0.0.1', '--port', str(port),
+               '--workers', str(args.workers), '--threads', str(args.threads)]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("服务启动超时")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API 压测')
+    parser.add_argument('--url', type=str, default='http://127.0.0.1:5000', help='服务地址')
+    parser.add_argument('--requests', type=int, default=500, help='每个接口的请求数')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发数')
+    parser.add_argument('--start', action='store_true', help='在本地启动 serve.py 并压测')
+    parser.add_argument('--workers', type=int, default=4, help='--start 时的工作进程数')
+    parser.add_argument('--threads', type=int, default=8, help='--start 时每进程线程数')
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if args.start:
+        process, url = start_server(args)
+    codes = list(load_sample_data())
+
+    def analyze(session, i):
+        payload = {"code": codes[i % len(codes)], "user_question": "护城河如何？"}
+        return session.post(f"{url}/api/analyze", json=payload, timeout=60).status_code == 200
+
+    def stocks(session, i):
+        return session.get(f"{url}/api/stocks", timeout=60).status_code == 200
+
+    try:
+        print(f"压测 {url}：每个接口 {args.requests} 个请求，并发 {args.concurrency}")
+        run_endpoint("GET  /api/stocks ", stocks, args.requests, args.concurrency)
+        run_endpoint("POST /api/analyze", analyze, args.requests, args.concurrency)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=SHUTDOWN_WAIT)
+
+
+if __name__ == "__main__":
+    main()
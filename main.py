@@ -1,6 +1,63 @@
 from src.buffet_agent.agent import run_analysis
 from src.buffet_agent.data import load_data, load_sample_data
+from src.buffet_agent.incremental import IncrementalScorer
+from src.buffet_agent.screening import (iter_universe, iter_universe_chunks, open_result_writer, screen_universe,
+                                        RESULT_FIELDS, LLM_FIELDS, SCREEN_CHUNK_SIZE, SCREEN_LLM_CONCURRENCY)
 import argparse
+import sys
+
+def run_screening(args):
+    """
+    全市场筛选模式：流式读取股票池，进程池并行评分并增量写出结果
+    """
+    fields = RESULT_FIELDS + (LLM_FIELDS if args.llm else [])
+    try:
+        writer = open_result_writer(args.out, fields)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    def progress(rows, seconds):
+        print(f"\r  已完成 {rows} 只 | {rows / max(seconds, 1e-9):,.0f} 只/秒", end="", file=sys.stderr, flush=True)
+
+    print(f"\n【筛选】{args.universe} → {args.out}（工作进程 {args.workers or '自动'}，分片 {args.chunk_size}）")
+    try:
+        stats = screen_universe(iter_universe_chunks(args.universe, args.chunk_size), writer,
+                                workers=args.workers, with_llm=args.llm,
+                                llm_concurrency=args.llm_concurrency, progress=progress)
+    except (OSError, ValueError) as e:
+        print(f"\n❌ 筛选失败: {e}")
+        return 1
+    finally:
+        writer.close()
+
+    print(file=sys.stderr)
+    print(f"完成: {stats['rows']} 只股票，{stats['chunks']} 个分片，耗时 {stats['seconds']:.2f} 秒，"
+          f"吞吐 {stats['rows_per_second']:,.0f} 只/秒")
+    for decision, count in sorted(stats["decisions"].items(), key=lambda item: -item[1]):
+        print(f"  {decision}: {count}")
+    return 0
+
+def run_incremental(args):
+    """
+    增量评分模式：只重算输入字段发生变化的股票与技能，其余复用状态文件中的上次结果
+    """
+    universe = iter_universe(args.universe) if args.universe else load_sample_data()
+    scorer = IncrementalScorer(args.state)
+    try:
+        results = scorer.score_all(universe)
+    except (OSError, ValueError) as e:
+        print(f"❌ 增量评分失败: {e}")
+        return 1
+
+    stats = scorer.stats
+    print(f"\n【增量评分】状态文件 {args.state}")
+    print(f"共 {stats['tickers']} 只股票：复用 {stats['reused']} 只，重算 {stats['recomputed']} 只")
+    print("各技能重算次数: " + "，".join(f"{skill} {count}" for skill, count in stats['skills_recomputed'].items()))
+    if len(results) <= 20:
+        for code, result in results.items():
+            print(f"  {code}: {result['avg_score']}分｜{result['final_decision']}")
+    return 0
 
 def main():
     print("=" * 60)
@@ -12,34 +69,48 @@ def main():
     parser.add_argument('--code', type=str, help='股票代码 (例如: 600519.SH)')
     parser.add_argument('--real-time', action='store_true', help='使用实时数据')
     parser.add_argument('--all', action='store_true', help='分析所有示例股票')
+    parser.add_argument('--universe', type=str, help='股票池文件（.csv/.jsonl/.json/.snap），启用全市场筛选模式')
+    parser.add_argument('--out', type=str, default='results.csv', help='筛选结果输出文件（.csv/.parquet）')
+    parser.add_argument('--workers', type=int, default=None, help='筛选工作进程数（默认CPU核数）')
+    parser.add_argument('--chunk-size', type=int, default=SCREEN_CHUNK_SIZE, help='每个分片的股票数')
+    parser.add_argument('--llm', action='store_true', help='筛选时同时运行大模型分析')
+    parser.add_argument('--llm-concurrency', type=int, default=SCREEN_LLM_CONCURRENCY, help='大模型分析并发数')
+    parser.add_argument('--state', type=str, help='增量评分状态文件：只重算输入变化的股票（可与 --universe 同用）')
     args = parser.parse_args()
 
+    if args.state:
+        return run_incremental(args)
+
+    if args.universe:
+        return run_screening(args)
+
     if args.code:
         # 分析指定股票
         data = load_data(args.code, args.real_time)
         print(f"\n【分析】{data['name']} ({data['code']})")
         report = run_analysis(data)
-        print(f"综合评分: {report['avg_score']}")
-        print(f"结论: {report['final_decision']}")
+        traditional = report['traditional_analysis']
+        print(f"综合评分: {traditional['avg_score']}")
+        print(f"结论: {traditional['final_decision']}")
         print("\n详细分析:")
-        print(f"  🛡️ 安全边际: {report['safety_margin']['score']}分｜{report['safety_margin']['level']}")
-        print(f"  📈 基本面: {report['fundamental']['score']}分｜{report['fundamental']['status']}")
-        print(f"  🏰 护城河: {report['moat']['score']}分｜{report['moat']['level']}")
-        print(f"  ⚠️  风险评分: {report['risk']['score']}分｜{report['risk']['risk_level']}")
+        print(f"  🛡️ 安全边际: {traditional['safety_margin']['score']}分｜{traditional['safety_margin']['level']}")
+        print(f"  📈 基本面: {traditional['fundamental']['score']}分｜{traditional['fundamental']['status']}")
+        print(f"  🏰 护城河: {traditional['moat']['score']}分｜{traditional['moat']['level']}")
+        print(f"  ⚠️  风险评分: {traditional['risk']['score']}分｜{traditional['risk']['risk_level']}")
         
         # 打印大模型分析结果
-        if 'llm_analysis' in report:
+        if 'basic_llm_analysis' in report:
             print("\n  🤖 大模型分析:")
-            llm = report['llm_analysis']
+            llm = report['basic_llm_analysis']
             print(f"    建议: {llm.get('investment_recommendation', '未知')}")
             print(f"    风险: {llm.get('risk_assessment', '未知')}")
             print(f"    置信度: {llm.get('confidence_score', 0):.2f}")
             print(f"    分析: {llm.get('llm_analysis', '无')}")
         
         # 打印风险警告
-        if report['safety_margin']['warn']:
+        if traditional['safety_margin']['warn']:
             print("\n  风险警告:")
-            for warn in report['safety_margin']['warn']:
+            for warn in traditional['safety_margin']['warn']:
                 print(f"    • {warn}")
         print("---")
     else:
@@ -48,14 +119,15 @@ def main():
         for code, data in sample_data.items():
             print(f"\n【分析】{data['name']} ({code})")
             report = run_analysis(data)
-            print(f"综合评分: {report['avg_score']}")
-            print(f"结论: {report['final_decision']}")
+            traditional = report['traditional_analysis']
+            print(f"综合评分: {traditional['avg_score']}")
+            print(f"结论: {traditional['final_decision']}")
             
             # 打印大模型分析结果
-            if 'llm_analysis' in report:
-                llm = report['llm_analysis']
+            if 'basic_llm_analysis' in report:
+                llm = report['basic_llm_analysis']
                 print(f"🤖 大模型建议: {llm.get('investment_recommendation', '未知')}")
             print("---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -32,6 +32,8 @@ try:
     from tests import test_skills
     test_skills.test_safety_margin()
     test_skills.test_moat()
+    test_skills.test_score_batch_matches_per_dict()
+    test_skills.test_score_batch_numpy_columns()
     print("✅ 技能模块测试通过！")
 except Exception as e:
     print(f"❌ 技能模块测试失败: {e}")
@@ -0,0 +1,142 @@
+"""生产环境服务入口：多进程多线程运行 api.py，fork 前预加载数据，收到 SIGTERM/SIGINT 时优雅退出
+
+用法:
+    python serve.py --threads 8 --port 5000
+    python serve.py --workers 4 --threads 8 --port 5000   # 前端已按会话ID粘性路由时
+
+安装了 gunicorn 时以预加载（preload）的 gthread 模式运行；未安装时退回单进程多线程的
+werkzeug 服务器（--workers 被忽略）。会话保存在各进程内，因此默认只启动一个工作进程；
+多进程部署时必须在前端按会话ID粘性路由，否则追问可能落到没有该会话的进程。
+"""
+import sys
+import signal
+import argparse
+import threading
+
+# 服务默认配置：工作进程数、每进程线程数、请求超时与优雅退出等待时间（秒）
+# 会话保存在进程内存中，未做粘性路由时多进程会丢失会话，默认单进程
+DEFAULT_WORKERS = 1
+DEFAULT_THREADS = 8
+DEFAULT_TIMEOUT = 60
+DEFAULT_GRACEFUL_TIMEOUT = 30
+
+
+def preload():
+    """
+    在 fork 工作进程前加载应用与只读数据（示例数据、知识图谱、Skill.md），子进程通过写时复制共享
+
+    Returns:
+        api 模块
+    """
+    import api
+    from src.buffet_agent.knowledge import get_shared_knowledge_graph
+    from src.buffet_agent.github_llm import load_skill_content
+    get_shared_knowledge_graph()
+    load_skill_content()
+    return api
+
+
+def release_resources(api):
+    """
+    工作进程退出前释放线程池与HTTP连接池
+
+    Args:
+        api: api 模块
+    """
+    from src.buffet_agent.data import close_sessions
+    api.batch_executor.shutdown(wait=False, cancel_futures=True)
+    close_sessions()
+
+
+def run_gunicorn(api, args):
+    """
+    以 gunicorn 多进程模式运行
+
+    Args:
+        api: 已预加载的 api 模块
+        args: 命令行参数
+    """
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "worker_exit": lambda server, worker: release_resources(api),
+    }
+
+    class _Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return api.app
+
+    _Application().run()
+
+
+def run_threaded(api, args):
+    """
+    以单进程多线程模式运行（未安装 gunicorn 时使用）
+
+    Args:
+        api: 已预加载的 api 模块
+        args: 命令行参数
+    """
+    from werkzeug.serving import make_server
+
+    server = make_server(args.host, args.port, api.app, threaded=True)
+    # 关闭时等待进行中的请求完成
+    server.daemon_threads = False
+    server.block_on_close = True
+
+    def shutdown(signum, frame):
+        print(f"收到信号 {signum}，停止接收新请求，等待进行中的请求完成...")
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    print(f"🚀 服务已启动: http://{args.host}:{args.port}（单进程多线程）")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        release_resources(api)
+        print("服务已退出")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BuffettMunger-Agent API 生产服务')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='监听地址')
+    parser.add_argument('--port', type=int, default=5000, help='监听端口')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='工作进程数（需要 gunicorn；大于1时前端须按会话ID粘性路由）')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help='每个工作进程的线程数（需要 gunicorn）')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT, help='请求超时时间（秒）')
+    parser.add_argument('--graceful-timeout', type=int, default=DEFAULT_GRACEFUL_TIMEOUT,
+                        help='优雅退出时等待进行中请求的时间（秒）')
+    parser.add_argument('--threaded', action='store_true', help='强制使用单进程多线程模式')
+    args = parser.parse_args()
+
+    api = preload()
+
+    if not args.threaded:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print("未安装 gunicorn，使用单进程多线程模式（pip install gunicorn 以启用多进程）")
+        else:
+            if args.workers > 1:
+                print(f"⚠️  以 {args.workers} 个工作进程运行：会话保存在各进程内，请确认前端按会话ID粘性路由")
+            run_gunicorn(api, args)
+            return
+    run_threaded(api, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
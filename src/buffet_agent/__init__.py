@@ -1,6 +1,6 @@
 # BuffettMunger-Agent 核心模块
 
-from .agent import run_analysis, ask_follow_up
+from .agent import run_analysis, arun_analysis, ask_follow_up
 from .agent import ValueInvestmentAgent
 from .data import load_data, load_sample_data, get_real_time_data
 from .github_llm import get_github_llm_analysis, ask_github_llm_follow_up
@@ -8,6 +8,7 @@ from .knowledge import build_investment_reasoning, enhance_analysis, cross_valid
 
 __all__ = [
     'run_analysis',
+    'arun_analysis',
     'ask_follow_up',
     'ValueInvestmentAgent',
     'load_data',
@@ -1,18 +1,68 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from . import skills
 from .llm import get_llm_analysis
 from .github_llm import get_github_llm_analysis, ask_github_llm_follow_up
 from .knowledge import enhance_analysis
+from .history import HistoryStore, analysis_reference
 from typing import Optional, Dict, Any, List
 
+# 异步分析流程中各大模型阶段的超时时间（秒）
+STAGE_TIMEOUTS = {
+    "basic_llm_analysis": 10.0,
+    "github_deep_analysis": 15.0
+}
+
+# 大模型阶段超时或失败时的降级结果，字段与正常返回保持一致
+DEGRADED_LLM_ANALYSIS = {
+    "llm_analysis": "大模型分析超时或失败，使用默认分析",
+    "investment_recommendation": "中性",
+    "risk_assessment": "中等",
+    "confidence_score": 0.5
+}
+
+DEGRADED_GITHUB_ANALYSIS = {
+    "analysis_summary": "GitHub大模型分析超时或失败，使用默认分析",
+    "investment_recommendation": "中性",
+    "confidence_score": 0.5,
+    "risk_assessment": "中等",
+    "key_findings": ["分析超时或失败，无法提供详细信息"],
+    "valuation_analysis": {},
+    "fundamental_analysis": {},
+    "moat_analysis": {},
+    "risk_analysis": {},
+    "recommendation_reasoning": "分析超时或失败，无法提供推理过程",
+    "next_steps": ["请稍后重试"]
+}
+
+# 大模型阶段使用独立线程池：超时的请求在后台结束，不阻塞事件循环退出
+_llm_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="buffet-llm")
+
 class ValueInvestmentAgent:
     """价值投资AI智能体"""
     
-    def __init__(self):
+    def __init__(self, history: Optional[HistoryStore] = None):
         """
         初始化价值投资智能体
+        
+        Args:
+            history: 会话历史存储，默认新建一个有界的 HistoryStore
         """
-        self.conversation_history: List[Dict[str, str]] = []
-        self.analysis_history: List[Dict[str, Any]] = []
+        self.history = history if history is not None else HistoryStore()
+    
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """
+        保留的对话历史（有界，早期消息见 history.summary）
+        """
+        return self.history.messages()
+    
+    @property
+    def analysis_history(self) -> List[Dict[str, Any]]:
+        """
+        保留的分析历史（有界）
+        """
+        return self.history.analyses()
     
     def run_analysis(self, company_data: Dict[str, Any], user_question: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -26,11 +76,7 @@ class ValueInvestmentAgent:
             分析结果
         """
         # 传统分析模块
-        safety = skills.safety_margin(company_data)
-        fund = skills.fundamental(company_data)
-        moat = skills.moat(company_data)
-        risk = skills.risk(company_data)
-        final = skills.final_rating([safety, fund, moat, risk])
+        traditional = self._run_skills(company_data)
         
         # 传统大模型分析
         llm_analysis = get_llm_analysis(company_data)
@@ -38,20 +84,118 @@ class ValueInvestmentAgent:
         # GitHub大模型深度分析
         github_analysis = get_github_llm_analysis(company_data, user_question)
         
+        return self._build_result(company_data, user_question, traditional, llm_analysis, github_analysis)
+    
+    async def arun_analysis(self, company_data: Dict[str, Any], user_question: Optional[str] = None,
+                            stage_timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        异步运行完整价值投资分析流程
+        
+        两个大模型阶段在线程池中并发执行，同时在当前线程完成技能评分；
+        某个大模型阶段超时或失败时使用降级结果，其余阶段照常返回，
+        降级的阶段名记录在结果的 degraded_stages 字段中。
+        
+        Args:
+            company_data: 公司数据
+            user_question: 用户问题（可选）
+            stage_timeouts: 各大模型阶段超时时间（秒），默认 STAGE_TIMEOUTS
+            
+        Returns:
+            分析结果，结构与 run_analysis 一致
+        """
+        timeouts = dict(STAGE_TIMEOUTS)
+        timeouts.update(stage_timeouts or {})
+        loop = asyncio.get_running_loop()
+        
+        llm_future = loop.run_in_executor(_llm_executor, get_llm_analysis, company_data)
+        github_future = loop.run_in_executor(_llm_executor, get_github_llm_analysis, company_data, user_question)
+        
+        # 大模型请求进行中，在当前线程完成技能评分
+        traditional = self._run_skills(company_data)
+        
+        llm_analysis, github_analysis = await asyncio.gather(
+            asyncio.wait_for(llm_future, timeouts["basic_llm_analysis"]),
+            asyncio.wait_for(github_future, timeouts["github_deep_analysis"]),
+            return_exceptions=True
+        )
+        
+        degraded_stages = []
+        if isinstance(llm_analysis, BaseException):
+            print(f"大模型分析阶段降级: {llm_analysis!r}")
+            llm_analysis = dict(DEGRADED_LLM_ANALYSIS)
+            degraded_stages.append("basic_llm_analysis")
+        if isinstance(github_analysis, BaseException):
+            print(f"GitHub大模型分析阶段降级: {github_analysis!r}")
+            github_analysis = dict(DEGRADED_GITHUB_ANALYSIS)
+            degraded_stages.append("github_deep_analysis")
+        
+        result = self._build_result(company_data, user_question, traditional, llm_analysis, github_analysis)
+        if degraded_stages:
+            result["degraded_stages"] = degraded_stages
+        return result
+    
+    def run_analysis_concurrent(self, company_data: Dict[str, Any], user_question: Optional[str] = None,
+                                stage_timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        arun_analysis 的同步封装，供非异步调用方使用
+        
+        Args:
+            company_data: 公司数据
+            user_question: 用户问题（可选）
+            stage_timeouts: 各大模型阶段超时时间（秒）
+            
+        Returns:
+            分析结果
+        """
+        return asyncio.run(self.arun_analysis(company_data, user_question, stage_timeouts))
+    
+    def _run_skills(self, company_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        运行传统分析模块
+        
+        Args:
+            company_data: 公司数据
+            
+        Returns:
+            传统分析结果
+        """
+        safety = skills.safety_margin(company_data)
+        fund = skills.fundamental(company_data)
+        moat = skills.moat(company_data)
+        risk = skills.risk(company_data)
+        final = skills.final_rating([safety, fund, moat, risk])
+        return {
+            "safety_margin": safety,
+            "fundamental": fund,
+            "moat": moat,
+            "risk": risk,
+            "avg_score": final["avg"],
+            "final_decision": final["decision"]
+        }
+    
+    def _build_result(self, company_data: Dict[str, Any], user_question: Optional[str],
+                      traditional: Dict[str, Any], llm_analysis: Dict[str, Any],
+                      github_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        整合各阶段结果、记录历史并进行知识图谱增强
+        
+        Args:
+            company_data: 公司数据
+            user_question: 用户问题（可选）
+            traditional: 传统分析结果
+            llm_analysis: 传统大模型分析结果
+            github_analysis: GitHub大模型深度分析结果
+            
+        Returns:
+            增强后的分析结果
+        """
         # 整合分析结果
         analysis_result = {
-            "traditional_analysis": {
-                "safety_margin": safety,
-                "fundamental": fund,
-                "moat": moat,
-                "risk": risk,
-                "avg_score": final["avg"],
-                "final_decision": final["decision"]
-            },
+            "traditional_analysis": traditional,
             "basic_llm_analysis": llm_analysis,
             "github_deep_analysis": github_analysis,
             "integrated_recommendation": self._integrate_recommendations(
-                final["decision"], 
+                traditional["final_decision"], 
                 github_analysis.get("investment_recommendation", "中性")
             ),
             "analysis_time": self._get_current_time(),
@@ -61,17 +205,17 @@ class ValueInvestmentAgent:
             }
         }
         
-        # 保存分析历史
-        self.analysis_history.append(analysis_result)
-        
-        # 保存对话历史
-        if user_question:
-            self.conversation_history.append({"role": "user", "content": user_question})
-        
         # 使用知识图谱增强分析
         enhanced_analysis = enhance_analysis(analysis_result, company_data)
         
-        self.conversation_history.append({"role": "assistant", "content": str(enhanced_analysis)})
+        # 保存分析历史（保存结果引用，对话历史中只记录分析ID）
+        analysis_id = self.history.add_analysis(enhanced_analysis)
+        enhanced_analysis["analysis_id"] = analysis_id
+        
+        # 保存对话历史
+        if user_question:
+            self.history.add_message("user", user_question)
+        self.history.add_message("assistant", analysis_reference(analysis_id, enhanced_analysis))
         
         return enhanced_analysis
     
@@ -85,14 +229,20 @@ class ValueInvestmentAgent:
         Returns:
             回答结果
         """
-        # 使用GitHub大模型处理追问
-        follow_up_response = ask_github_llm_follow_up(question)
-        
-        # 保存对话历史
-        self.conversation_history.append({"role": "user", "content": question})
-        self.conversation_history.append({"role": "assistant", "content": str(follow_up_response)})
+        # 使用GitHub大模型处理追问，基于并写入本智能体的对话历史
+        return ask_github_llm_follow_up(question, history=self.history)
+    
+    def get_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        按ID获取分析结果
         
-        return follow_up_response
+        Args:
+            analysis_id: 分析结果ID
+            
+        Returns:
+            分析结果，已被淘汰或不存在时返回None
+        """
+        return self.history.get_analysis(analysis_id)
     
     def get_analysis_history(self) -> List[Dict[str, Any]]:
         """
@@ -116,8 +266,7 @@ class ValueInvestmentAgent:
         """
         清除历史记录
         """
-        self.conversation_history = []
-        self.analysis_history = []
+        self.history.clear()
     
     def _integrate_recommendations(self, traditional_decision: str, github_recommendation: str) -> str:
         """
@@ -184,9 +333,17 @@ def run_analysis(company_data: Dict[str, Any], user_question: Optional[str] = No
     agent = ValueInvestmentAgent()
     return agent.run_analysis(company_data, user_question)
 
+def arun_analysis(company_data: Dict[str, Any], user_question: Optional[str] = None,
+                  stage_timeouts: Optional[Dict[str, float]] = None):
+    """
+    异步运行完整价值投资分析流程，返回可 await 的协程
+    """
+    agent = ValueInvestmentAgent()
+    return agent.arun_analysis(company_data, user_question, stage_timeouts)
+
 # 新增追问功能
 def ask_follow_up(question: str) -> Dict[str, Any]:
     """
-    处理用户追问
+    处理用户追问（不带会话上下文；需要基于对话历史追问时使用 ValueInvestmentAgent.ask_follow_up）
     """
     return ask_github_llm_follow_up(question)
\ No newline at end of file
@@ -0,0 +1,349 @@
+"""批量评分模块：以列式结构（struct-of-arrays）向量化计算四大技能与综合评级"""
+import math
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Mapping, Sequence
+
+import numpy as np
+
+from . import skills
+
+
+# 规则表：(字段, 缺省值, 比较方式, 阈值, 分值, 文案)
+# 与 skills.py 中逐条 dict.get 判断一一对应，顺序即理由/警告的输出顺序
+SAFETY_RULES = (
+    ("pe_hist_percent", 99, "lt", 30, 20, "PE处于历史低分位({}%)"),
+    ("pb_hist_percent", 99, "lt", 30, 20, "PB处于历史低分位({}%)"),
+    ("peg", 99, "lt", 1.0, 20, "PEG合理({})"),
+    ("roe_ttm", 0, "gt", 15, 20, "ROE优秀({}%)"),
+    ("debt_to_asset", 100, "lt", 50, 20, "负债健康({}%)"),
+)
+SAFETY_WARN_RULES = (
+    ("pe", 0, "gt", 50, 0, "PE过高，估值泡沫风险"),
+    ("debt_to_asset", 0, "gt", 70, 0, "负债率过高，财务风险大"),
+)
+FUNDAMENTAL_RULES = (
+    ("roe_ttm", 0, "gt", 15, 25, "ROE连续优秀"),
+    ("gross_margin", 0, "gt", 30, 25, "毛利率健康，具备定价权"),
+    ("revenue_growth", 0, "gt", 8, 20, "营收稳步增长"),
+    ("profit_growth", 0, "gt", 5, 20, "利润增长稳定"),
+    ("cash_flow_healthy", False, "truthy", None, 10, "现金流健康"),
+)
+FUNDAMENTAL_WARN_RULES = (
+    ("profit_growth", 0, "lt", 0, 0, "利润出现负增长"),
+)
+MOAT_RULES = (
+    ("gross_margin", 0, "gt", 40, 25, "高毛利 → 品牌/定价权护城河"),
+    ("roe_ttm", 0, "gt", 20, 25, "长期高ROE → 竞争壁垒强"),
+    ("pe_hist_percent", 100, "lt", 50, 20, "市场长期给予稳定估值 → 认可度高"),
+    ("debt_to_asset", 100, "lt", 40, 20, "财务稳健 → 抗周期能力强"),
+    ("revenue_growth", 0, "gt", 10, 10, "成长稳定 → 规模护城河"),
+)
+RISK_RULES = (
+    ("debt_to_asset", 0, "gt", 60, -30, "负债率过高"),
+    ("pe", 0, "gt", 50, -20, "估值过高"),
+    ("profit_growth", 0, "lt", 0, -25, "利润下滑"),
+    ("cash_flow_healthy", False, "falsy", None, -25, "现金流不健康"),
+)
+
+# 分档阈值与文案：分数 >= 第 k 个阈值时落在第 k 档，否则落到最后一档
+SAFETY_THRESHOLDS = (80, 60)
+SAFETY_LEVELS = ("安全｜可关注", "一般｜观察", "危险｜回避")
+SAFETY_MARGINS = ("高安全边际", "中等安全边际", "无安全边际")
+SAFETY_SUGGESTS = ("可分批布局，长期持有", "持续跟踪，等待更好价格", "估值偏高，建议规避")
+FUNDAMENTAL_THRESHOLDS = (70, 50)
+FUNDAMENTAL_STATUSES = ("优秀", "一般", "较差")
+MOAT_THRESHOLDS = (70, 50)
+MOAT_LEVELS = ("强护城河", "一般", "无明显护城河")
+RISK_THRESHOLDS = (70, 50)
+RISK_LEVELS = ("低风险", "中风险", "高风险")
+FINAL_THRESHOLDS = (80, 65, 50)
+FINAL_DECISIONS = (
+    "🌟 强烈推荐｜价值优质 + 安全边际高",
+    "✅ 建议关注｜基本面稳健",
+    "⚠️  中性观察｜需等待更好价格",
+    "❌ 规避｜风险偏高或估值过贵",
+)
+
+SCORE_FIELDS = (
+    "pe", "peg", "pe_hist_percent", "pb_hist_percent", "roe_ttm", "debt_to_asset",
+    "revenue_growth", "profit_growth", "gross_margin", "cash_flow_healthy",
+)
+
+
+def _is_missing(value: Any) -> bool:
+    """None 与 NaN 视为缺失字段（等价于 dict 中不存在该键）"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _float_column(values: Sequence[Any]) -> np.ndarray:
+    """
+    将一列值转换为浮点列，无法解析为数字的值（如 "N/A"、"-"）视为缺失
+
+    Args:
+        values: 列值序列
+
+    Returns:
+        浮点列，NaN 表示缺失
+    """
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        pass
+    column = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            column[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return column
+
+
+def _rule_mask(values: np.ndarray, rule: tuple) -> np.ndarray:
+    """
+    计算单条规则在整列上的命中掩码
+
+    Args:
+        values: 浮点列，NaN 表示缺失
+        rule: 规则元组
+
+    Returns:
+        布尔掩码
+    """
+    _, default, op, threshold = rule[:4]
+    filled = np.where(np.isnan(values), float(default), values)
+    if op == "lt":
+        return filled < threshold
+    if op == "gt":
+        return filled > threshold
+    if op == "truthy":
+        return filled != 0
+    if op == "falsy":
+        return filled == 0
+    raise ValueError(f"未知的规则比较方式: {op}")
+
+
+def _bucket(scores: np.ndarray, thresholds: Sequence[int]) -> np.ndarray:
+    """按降序阈值分档，返回档位下标"""
+    index = np.zeros(scores.shape, dtype=np.int8)
+    for threshold in thresholds:
+        index += scores < threshold
+    return index
+
+
+class BatchScores:
+    """批量评分结果：分数与档位为整列数组，理由/警告列表仅在按行读取时生成"""
+
+    def __init__(self, frame: Mapping[str, Sequence[Any]], size: int, columns: Dict[str, np.ndarray]):
+        """
+        执行向量化评分
+
+        Args:
+            frame: 原始列式数据，用于按行还原输入和格式化理由文案
+            size: 行数
+            columns: 已转换为浮点数组的评分字段
+        """
+        self.frame = frame
+        self.size = size
+
+        def masks(rules):
+            if not rules:
+                return np.zeros((0, size), dtype=bool)
+            return np.vstack([_rule_mask(columns[rule[0]], rule) for rule in rules])
+
+        def total(rules, rule_masks, base=0):
+            points = np.array([rule[4] for rule in rules], dtype=np.int64)
+            return base + points @ rule_masks.astype(np.int64)
+
+        self.safety_masks = masks(SAFETY_RULES)
+        self.safety_warn_masks = masks(SAFETY_WARN_RULES)
+        self.fundamental_masks = masks(FUNDAMENTAL_RULES)
+        self.fundamental_warn_masks = masks(FUNDAMENTAL_WARN_RULES)
+        self.moat_masks = masks(MOAT_RULES)
+        self.risk_masks = masks(RISK_RULES)
+
+        self.safety_score = total(SAFETY_RULES, self.safety_masks)
+        self.fundamental_score = total(FUNDAMENTAL_RULES, self.fundamental_masks)
+        self.moat_score = total(MOAT_RULES, self.moat_masks)
+        raw_risk = total(RISK_RULES, self.risk_masks, base=100)
+        self.risk_score = np.maximum(raw_risk, 0)
+
+        self.safety_index = _bucket(self.safety_score, SAFETY_THRESHOLDS)
+        self.fundamental_index = _bucket(self.fundamental_score, FUNDAMENTAL_THRESHOLDS)
+        self.moat_index = _bucket(self.moat_score, MOAT_THRESHOLDS)
+        self.risk_index = _bucket(raw_risk, RISK_THRESHOLDS)
+
+        # final_rating: 四项均有 score，取整除平均
+        self.avg = (self.safety_score + self.fundamental_score + self.moat_score + self.risk_score) // 4
+        self.final_index = _bucket(self.avg, FINAL_THRESHOLDS)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def decision(self) -> np.ndarray:
+        """综合评级文案列"""
+        return np.asarray(FINAL_DECISIONS, dtype=object)[self.final_index]
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """
+        还原第 i 行的输入字典（缺失值不出现在字典中）
+
+        Args:
+            i: 行号
+
+        Returns:
+            公司数据字典
+        """
+        record = {}
+        for key in self.frame:
+            value = self._value(key, i)
+            if not _is_missing(value):
+                record[key] = value
+        return record
+
+    def _value(self, key: str, i: int) -> Any:
+        """读取原始列中的单元格，NumPy 标量转换为 Python 原生类型"""
+        value = self.frame[key][i]
+        if isinstance(value, np.generic):
+            value = value.item()
+        return value
+
+    def _texts(self, rules: tuple, rule_masks: np.ndarray, i: int) -> List[str]:
+        """按规则顺序生成第 i 行命中的文案"""
+        texts = []
+        for k, rule in enumerate(rules):
+            if rule_masks[k, i]:
+                template = rule[5]
+                texts.append(template.format(self._value(rule[0], i)) if "{}" in template else template)
+        return texts
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """
+        生成第 i 行与逐条评分函数完全一致的结果
+
+        Args:
+            i: 行号
+
+        Returns:
+            包含 safety_margin/fundamental/moat/risk/final_rating 的字典
+        """
+        s, f, m, r = (int(self.safety_index[i]), int(self.fundamental_index[i]),
+                      int(self.moat_index[i]), int(self.risk_index[i]))
+        safety = {
+            "score": int(self.safety_score[i]),
+            "level": SAFETY_LEVELS[s],
+            "margin": SAFETY_MARGINS[s],
+            "reason": self._texts(SAFETY_RULES, self.safety_masks, i),
+            "warn": self._texts(SAFETY_WARN_RULES, self.safety_warn_masks, i),
+            "suggest": SAFETY_SUGGESTS[s]
+        }
+        fund = {
+            "score": int(self.fundamental_score[i]),
+            "status": FUNDAMENTAL_STATUSES[f],
+            "reason": self._texts(FUNDAMENTAL_RULES, self.fundamental_masks, i),
+            "warn": self._texts(FUNDAMENTAL_WARN_RULES, self.fundamental_warn_masks, i)
+        }
+        moat = {
+            "score": int(self.moat_score[i]),
+            "level": MOAT_LEVELS[m],
+            "reason": self._texts(MOAT_RULES, self.moat_masks, i)
+        }
+        risk = {
+            "score": int(self.risk_score[i]),
+            "risk_level": RISK_LEVELS[r],
+            "warn": self._texts(RISK_RULES, self.risk_masks, i)
+        }
+        final = {
+            "avg": int(self.avg[i]),
+            "decision": FINAL_DECISIONS[int(self.final_index[i])],
+            "all_warnings": safety["warn"] + fund["warn"] + risk["warn"]
+        }
+        return {
+            "safety_margin": safety,
+            "fundamental": fund,
+            "moat": moat,
+            "risk": risk,
+            "final_rating": final
+        }
+
+    def rows(self, indices: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        按需逐行生成完整结果
+
+        Args:
+            indices: 行号序列，None 表示全部
+
+        Returns:
+            结果迭代器
+        """
+        for i in (range(self.size) if indices is None else indices):
+            yield self.row(i)
+
+
+def records_to_frame(records: Iterable[Mapping[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    将公司数据字典列表转换为列式结构，缺失字段填 None
+
+    Args:
+        records: 公司数据字典序列
+
+    Returns:
+        列名到值列表的映射
+    """
+    records = list(records)
+    keys: List[str] = []
+    for record in records:
+        for key in record:
+            if key not in keys:
+                keys.append(key)
+    return {key: [record.get(key) for record in records] for key in keys}
+
+
+def score_frame(frame: Mapping[str, Sequence[Any]]) -> BatchScores:
+    """
+    对列式数据批量评分
+
+    Args:
+        frame: 列名到等长序列的映射（dict of list / ndarray，或 pandas.DataFrame），
+            None/NaN 与无法解析为数字的值视为缺失字段
+
+    Returns:
+        BatchScores 批量评分结果
+    """
+    lengths = {len(frame[key]) for key in frame}
+    if len(lengths) > 1:
+        raise ValueError(f"列长度不一致: {sorted(lengths)}")
+    size = lengths.pop() if lengths else 0
+
+    columns = {}
+    for field in SCORE_FIELDS:
+        if field in frame:
+            columns[field] = _float_column(frame[field])
+        else:
+            columns[field] = np.full(size, np.nan)
+    return BatchScores(frame, size, columns)
+
+
+def score_records_loop(records: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    逐条调用 skills 函数的参照实现，用于一致性校验和基准对比
+
+    Args:
+        records: 公司数据字典序列
+
+    Returns:
+        与 BatchScores.row 结构一致的结果列表
+    """
+    results = []
+    for data in records:
+        safety = skills.safety_margin(data)
+        fund = skills.fundamental(data)
+        moat = skills.moat(data)
+        risk = skills.risk(data)
+        results.append({
+            "safety_margin": safety,
+            "fundamental": fund,
+            "moat": moat,
+            "risk": risk,
+            "final_rating": skills.final_rating([safety, fund, moat, risk])
+        })
+    return results
@@ -0,0 +1,159 @@
+"""行情缓存模块：带 TTL、LRU 淘汰、过期后台刷新和并发请求合并的进程内缓存"""
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Hashable
+
+
+class QuoteCache:
+    """进程内行情缓存"""
+
+    def __init__(self, ttl: float = 5.0, max_size: int = 1024, stale_ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化行情缓存
+
+        Args:
+            ttl: 新鲜期（秒），期内直接命中
+            max_size: 最大条目数，超出后按最近最少使用淘汰
+            stale_ttl: 过期后仍可返回旧值的时长（秒），期间由后台线程刷新
+            clock: 时钟函数
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "refreshes": 0, "coalesced": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        读取新鲜缓存，不触发加载
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存值，过期或不存在时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._clock() - entry[1] >= self.ttl:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+        """
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Optional[Any]:
+        """
+        读取缓存，未命中时调用 loader 加载；同一键的并发未命中只发起一次加载
+
+        Args:
+            key: 缓存键
+            loader: 加载函数，返回None表示加载失败（不写入缓存）
+
+        Returns:
+            缓存值或加载结果
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = self._clock() - entry[1]
+                if age < self.ttl:
+                    self._stats["hits"] += 1
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                if age < self.ttl + self.stale_ttl:
+                    self._stats["stale_hits"] += 1
+                    self._entries.move_to_end(key)
+                    if key not in self._inflight:
+                        self._stats["refreshes"] += 1
+                        self._inflight[key] = Future()
+                        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                    return entry[0]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+            else:
+                self._stats["misses"] += 1
+                self._inflight[key] = Future()
+
+        if future is not None:
+            return future.result()
+        return self._load(key, loader)
+
+    def _load(self, key: Hashable, loader: Callable[[], Any]) -> Optional[Any]:
+        """执行加载并唤醒等待同一键的调用方"""
+        future = self._inflight[key]
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if value is not None:
+                self._store(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]):
+        """后台刷新过期条目，失败时保留旧值"""
+        try:
+            self._load(key, loader)
+        except Exception as e:
+            print(f"行情缓存后台刷新失败: {e}")
+
+    def _store(self, key: Hashable, value: Any):
+        """写入条目并按 LRU 淘汰，调用方需持有锁"""
+        self._entries[key] = (value, self._clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """
+        使缓存失效
+
+        Args:
+            key: 缓存键，None表示清空全部
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取命中/未命中/淘汰等计数
+
+        Returns:
+            计数字典
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            return stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,10 +1,130 @@
+import os
 import requests
 import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from requests.adapters import HTTPAdapter
+from .cache import QuoteCache
+from .snapshot import open_snapshot
+
+# 数据源接口地址（测试时可替换为本地桩服务）
+SOURCE_URLS = {
+    "xueqiu": "https://stock.xueqiu.com",
+    "sina": "http://hq.sinajs.cn",
+}
+
+# 单次请求超时（秒）
+SOURCE_TIMEOUTS = {
+    "xueqiu": 10,
+    "sina": 5,
+}
+
+# 并发模式下各数据源的延迟预算（秒，自发起请求起计）：超出预算的请求按超时放弃，
+# 最大预算到期后不再等待任何数据源
+SOURCE_BUDGETS = {
+    "xueqiu": 1.5,
+    "sina": 1.0,
+    "xiaohongshu": 0.5,
+}
+
+# 并发模式下的兜底数据源（模拟数据）：只有其他数据源都没有有效结果时才采用
+FALLBACK_SOURCES = ("xiaohongshu",)
+
+# 每个数据源连接池的最大保活连接数
+SESSION_POOL_SIZE = 16
+
+# 新浪财经批量接口每次请求包含的代码数量
+SINA_BULK_CHUNK_SIZE = 100
+
+# 实时行情缓存：新鲜期、过期后仍可返回旧值并后台刷新的时长（秒）、最大条目数
+QUOTE_CACHE_TTL = 5
+QUOTE_CACHE_STALE_TTL = 60
+QUOTE_CACHE_SIZE = 2048
+
+quote_cache = QuoteCache(ttl=QUOTE_CACHE_TTL, max_size=QUOTE_CACHE_SIZE, stale_ttl=QUOTE_CACHE_STALE_TTL)
+
+# 股票池快照路径（snapshot.write_snapshot 生成）；设置后 load_sample_data 返回内存映射的快照
+UNIVERSE_SNAPSHOT_PATH = os.environ.get("BUFFET_UNIVERSE_SNAPSHOT")
+
+_snapshots = {}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_executor = None
+
+
+def get_session(source):
+    """
+    获取数据源共享的 keep-alive 会话，按数据源复用连接池
+
+    Args:
+        source: 数据源名称
+
+    Returns:
+        requests.Session
+    """
+    session = _sessions.get(source)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(source)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SESSION_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sessions[source] = session
+    return session
+
+
+def close_sessions():
+    """
+    关闭所有共享会话及其连接池
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _get_executor():
+    """获取并发拉取数据使用的线程池"""
+    global _executor
+    if _executor is None:
+        with _sessions_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=SESSION_POOL_SIZE, thread_name_prefix="buffet-data")
+    return _executor
+
+def get_universe_snapshot(path=None):
+    """
+    打开股票池快照，同一路径在进程内只映射一次
+
+    Args:
+        path: 快照文件路径，默认使用 UNIVERSE_SNAPSHOT_PATH
+
+    Returns:
+        Snapshot（{code: 行} 的只读映射），未配置路径时返回None
+    """
+    path = path or UNIVERSE_SNAPSHOT_PATH
+    if not path:
+        return None
+    snapshot = _snapshots.get(path)
+    if snapshot is None:
+        with _sessions_lock:
+            snapshot = _snapshots.get(path)
+            if snapshot is None:
+                snapshot = _snapshots[path] = open_snapshot(path)
+    return snapshot
+
 
 def load_sample_data():
     """
-    加载示例离线数据，与前端 data.js 保持一致
+    加载离线数据：配置了股票池快照时返回快照，否则返回与前端 data.js 一致的示例数据
     """
+    snapshot = get_universe_snapshot()
+    if snapshot is not None:
+        return snapshot
     return {
         "600519.SH": {
             "code": "600519.SH",
@@ -53,55 +173,111 @@ def load_sample_data():
         }
     }
 
-def get_sina_finance_data(stock_code):
+def _to_sina_code(stock_code):
+    """
+    转换股票代码格式，新浪财经使用的格式
+    """
+    if stock_code.endswith('.SH'):
+        return 'sh' + stock_code[:6]
+    if stock_code.endswith('.SZ'):
+        return 'sz' + stock_code[:6]
+    return None
+
+def _parse_sina_payload(payload):
+    """
+    一次性解析新浪财经返回的多行 var hq_str_xxx="..."; 数据
+    :return: 新浪代码到字段列表的映射（无效行被忽略）
+    """
+    quotes = {}
+    for line in payload.splitlines():
+        line = line.strip()
+        if not line.startswith('var hq_str_') or '=' not in line:
+            continue
+        key, _, value = line.partition('=')
+        stock_info = value.strip().rstrip(';').strip('"').split(',')
+        if len(stock_info) > 3:
+            quotes[key[len('var hq_str_'):].strip()] = stock_info
+    return quotes
+
+def _build_sina_record(stock_code, stock_info):
+    """
+    根据新浪财经字段构建基本数据结构
+    """
+    return {
+        "code": stock_code,
+        "name": stock_info[0],
+        "pe": 15.0,  # 模拟数据
+        "pb": 3.0,   # 模拟数据
+        "peg": 1.0,  # 模拟数据
+        "pe_hist_percent": 50,  # 模拟数据
+        "pb_hist_percent": 50,  # 模拟数据
+        "roe_ttm": 15.0,  # 模拟数据
+        "debt_to_asset": 40,  # 模拟数据
+        "revenue_growth": 8,  # 模拟数据
+        "profit_growth": 5,  # 模拟数据
+        "gross_margin": 30,  # 模拟数据
+        "cash_flow_healthy": True  # 模拟数据
+    }
+
+def get_sina_finance_data(stock_code, timeout=None):
     """
     从新浪财经获取实时股票数据
+    :param timeout: 请求超时（秒），默认 SOURCE_TIMEOUTS["sina"]
     """
     try:
-        # 转换股票代码格式，新浪财经使用的格式
-        if stock_code.endswith('.SH'):
-            api_code = 'sh' + stock_code[:6]
-        elif stock_code.endswith('.SZ'):
-            api_code = 'sz' + stock_code[:6]
-        else:
+        api_code = _to_sina_code(stock_code)
+        if not api_code:
             return None
         
         # 新浪财经API接口
-        url = f"http://hq.sinajs.cn/list={api_code}"
-        response = requests.get(url, timeout=5)
+        url = f"{SOURCE_URLS['sina']}/list={api_code}"
+        response = get_session("sina").get(url, timeout=timeout or SOURCE_TIMEOUTS["sina"])
         
         if response.status_code == 200:
-            # 解析返回的数据
-            data = response.text
-            if '=' in data:
-                data_part = data.split('=')[1].strip().strip('"')
-                stock_info = data_part.split(',')
-                
-                if len(stock_info) > 3:
-                    # 构建基本数据结构
-                    return {
-                        "code": stock_code,
-                        "name": stock_info[0],
-                        "pe": 15.0,  # 模拟数据
-                        "pb": 3.0,   # 模拟数据
-                        "peg": 1.0,  # 模拟数据
-                        "pe_hist_percent": 50,  # 模拟数据
-                        "pb_hist_percent": 50,  # 模拟数据
-                        "roe_ttm": 15.0,  # 模拟数据
-                        "debt_to_asset": 40,  # 模拟数据
-                        "revenue_growth": 8,  # 模拟数据
-                        "profit_growth": 5,  # 模拟数据
-                        "gross_margin": 30,  # 模拟数据
-                        "cash_flow_healthy": True  # 模拟数据
-                    }
+            stock_info = _parse_sina_payload(response.text).get(api_code)
+            if stock_info:
+                return _build_sina_record(stock_code, stock_info)
         return None
     except Exception as e:
         print(f"新浪财经API获取数据失败: {e}")
         return None
 
-def get_xueqiu_data(stock_code):
+def get_sina_finance_data_bulk(codes, chunk_size=None):
+    """
+    从新浪财经批量获取实时股票数据，多个代码合并为一次请求
+    :param codes: 股票代码列表
+    :param chunk_size: 每次请求包含的代码数量，默认 SINA_BULK_CHUNK_SIZE
+    :return: 股票代码到数据字典的映射（获取失败的代码不出现在结果中）
+    """
+    chunk_size = chunk_size or SINA_BULK_CHUNK_SIZE
+    api_codes = {}
+    for stock_code in codes:
+        api_code = _to_sina_code(stock_code)
+        if api_code:
+            api_codes.setdefault(api_code, stock_code)
+    
+    results = {}
+    pending = list(api_codes)
+    session = get_session("sina")
+    for offset in range(0, len(pending), chunk_size):
+        chunk = pending[offset:offset + chunk_size]
+        try:
+            url = f"{SOURCE_URLS['sina']}/list={','.join(chunk)}"
+            response = session.get(url, timeout=SOURCE_TIMEOUTS["sina"])
+            if response.status_code != 200:
+                continue
+            for api_code, stock_info in _parse_sina_payload(response.text).items():
+                if api_code in api_codes:
+                    stock_code = api_codes[api_code]
+                    results[stock_code] = _build_sina_record(stock_code, stock_info)
+        except Exception as e:
+            print(f"新浪财经API批量获取数据失败: {e}")
+    return results
+
+def get_xueqiu_data(stock_code, timeout=None):
     """
     从雪球网获取股票数据
+    :param timeout: 请求超时（秒），默认 SOURCE_TIMEOUTS["xueqiu"]
     """
     try:
         # 转换股票代码格式，雪球网使用的格式
@@ -113,13 +289,13 @@ def get_xueqiu_data(stock_code):
             return None
         
         # 雪球网API接口（示例）
-        url = f"https://stock.xueqiu.com/v5/stock/detail/{xueqiu_code}/profile.json"
+        url = f"{SOURCE_URLS['xueqiu']}/v5/stock/detail/{xueqiu_code}/profile.json"
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             "Referer": f"https://xueqiu.com/S/{xueqiu_code}"
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_session("xueqiu").get(url, headers=headers, timeout=timeout or SOURCE_TIMEOUTS["xueqiu"])
         
         if response.status_code == 200:
             try:
@@ -151,9 +327,10 @@ def get_xueqiu_data(stock_code):
         print(f"雪球网API获取数据失败: {e}")
         return None
 
-def get_xiaohongshu_data(stock_code):
+def get_xiaohongshu_data(stock_code, timeout=None):
     """
     从小红书获取相关投资信息和市场情绪
+    :param timeout: 请求超时（秒），目前为模拟数据，仅保持与其他数据源一致的签名
     """
     try:
         # 验证股票代码格式
@@ -187,11 +364,75 @@ def get_xiaohongshu_data(stock_code):
         print(f"小红书数据获取失败: {e}")
         return None
 
-def get_real_time_data(stock_code):
+def _real_time_sources():
+    """按优先级排列的实时数据源"""
+    return [
+        ("xueqiu", get_xueqiu_data),
+        ("sina", get_sina_finance_data),
+        ("xiaohongshu", get_xiaohongshu_data),
+    ]
+
+def _fetch_within_budget(fetch, stock_code, deadline):
+    """
+    在延迟预算内请求单个数据源：开始执行时已超出预算则直接放弃，
+    否则以剩余预算作为请求超时，避免超出预算的请求长时间占用共享线程池
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    return fetch(stock_code, timeout=remaining)
+
+def _get_real_time_data_hedged(stock_code):
+    """
+    并发请求所有数据源，采用最先返回的有效结果
+
+    同一批完成的结果中按数据源优先级取舍；兜底数据源（FALLBACK_SOURCES）只在其他数据源
+    都已失败或超出预算时采用
+    """
+    start = time.monotonic()
+    deadline = start + max(SOURCE_BUDGETS.values(), default=0)
+    executor = _get_executor()
+    sources = _real_time_sources()
+    priority = {name: i for i, (name, _) in enumerate(sources)}
+    pending = {executor.submit(_fetch_within_budget, fetch, stock_code, start + SOURCE_BUDGETS.get(name, 0)): name
+               for name, fetch in sources}
+    futures = list(pending)
+    received = {}
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"{name}数据获取失败: {e}")
+                    continue
+                if result:
+                    received[name] = result
+            primary = [name for name in received if name not in FALLBACK_SOURCES]
+            if primary:
+                return received[min(primary, key=priority.get)]
+            if received and all(name in FALLBACK_SOURCES for name in pending.values()):
+                break
+        return received[min(received, key=priority.get)] if received else None
+    finally:
+        # 尚未开始的请求直接取消，进行中的请求最迟在各自预算到期时超时
+        for future in futures:
+            future.cancel()
+
+def get_real_time_data(stock_code, hedged=False):
     """
     获取实时股票数据
     尝试从多个数据源获取数据
+    :param stock_code: 股票代码
+    :param hedged: 是否并发请求所有数据源（采用最先返回的有效结果）
     """
+    if hedged:
+        return _get_real_time_data_hedged(stock_code)
+
     # 首先尝试从雪球网获取数据
     xueqiu_data = get_xueqiu_data(stock_code)
     if xueqiu_data:
@@ -210,21 +451,58 @@ def get_real_time_data(stock_code):
     # 所有数据源都失败
     return None
 
-def load_data(stock_code=None, use_real_time=False):
+def load_data(stock_code=None, use_real_time=False, hedged=False, use_cache=True):
     """
     加载股票数据
-    :param stock_code: 股票代码
+    :param stock_code: 股票代码，传入代码列表时批量加载
     :param use_real_time: 是否使用实时数据
-    :return: 股票数据字典
+    :param hedged: 实时数据是否并发请求所有数据源
+    :param use_cache: 实时数据是否经过进程内行情缓存（按 (代码, 数据源) 缓存）
+    :return: 股票数据字典；批量加载时返回股票代码到数据字典的映射
     """
+    if isinstance(stock_code, (list, tuple, set)):
+        return _load_data_bulk(stock_code, use_real_time, use_cache)
+    
     if use_real_time and stock_code:
         # 尝试获取实时数据
-        real_time_data = get_real_time_data(stock_code)
+        if use_cache:
+            source = "hedged" if hedged else "real_time"
+            real_time_data = quote_cache.get_or_load(
+                (stock_code, source), lambda: get_real_time_data(stock_code, hedged)
+            )
+        else:
+            real_time_data = get_real_time_data(stock_code, hedged)
         if real_time_data:
-            return real_time_data
+            # 返回副本，避免调用方修改缓存中的数据
+            return dict(real_time_data)
     
     # 如果无法获取实时数据或未指定股票代码，返回示例数据
     sample_data = load_sample_data()
     if stock_code and stock_code in sample_data:
         return sample_data[stock_code]
-    return sample_data
\ No newline at end of file
+    return sample_data
+
+def _load_data_bulk(codes, use_real_time=False, use_cache=True):
+    """
+    批量加载股票数据：实时数据走新浪财经批量接口，失败的代码回退到示例数据
+    """
+    results = {}
+    if use_real_time:
+        missing = []
+        for stock_code in codes:
+            cached = quote_cache.get((stock_code, "sina")) if use_cache else None
+            if cached:
+                results[stock_code] = dict(cached)
+            else:
+                missing.append(stock_code)
+        if missing:
+            fetched = get_sina_finance_data_bulk(missing)
+            for stock_code, quote in fetched.items():
+                if use_cache:
+                    quote_cache.put((stock_code, "sina"), quote)
+                results[stock_code] = dict(quote)
+    sample_data = load_sample_data()
+    for stock_code in codes:
+        if stock_code not in results and stock_code in sample_data:
+            results[stock_code] = sample_data[stock_code]
+    return {stock_code: results[stock_code] for stock_code in codes if stock_code in results}
@@ -2,24 +2,132 @@
 import os
 import json
 import time
-from typing import Optional, Dict, Any, List
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+from .prompt_budget import count_tokens, compact_skill_content
+from .history import HistoryStore
+
+
+SKILL_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "Skill.md")
+
+# 技能框架的 token 预算，None 表示内联完整的 Skill.md
+SKILL_TOKEN_BUDGET: Optional[int] = 1500
+
+# 输出格式（紧凑 JSON 写入提示词）
+OUTPUT_SCHEMA = {
+    "analysis_summary": "分析摘要",
+    "investment_recommendation": "投资建议（买入/持有/卖出）",
+    "confidence_score": "置信度评分（0-1）",
+    "risk_assessment": "风险评估（低/中/高）",
+    "key_findings": ["关键发现"],
+    "valuation_analysis": {
+        "intrinsic_value_estimate": "内在价值估计",
+        "safety_margin": "安全边际",
+        "valuation_methodology": "估值方法"
+    },
+    "fundamental_analysis": {
+        "financial_health": "财务健康度",
+        "growth_prospects": "增长前景",
+        "management_quality": "管理层质量"
+    },
+    "moat_analysis": {
+        "moat_type": "护城河类型",
+        "moat_strength": "护城河强度",
+        "sustainability": "可持续性"
+    },
+    "risk_analysis": {
+        "key_risks": ["风险"],
+        "risk_mitigation": ["缓解策略"]
+    },
+    "recommendation_reasoning": "建议推理过程",
+    "next_steps": ["下一步"]
+}
+_OUTPUT_SCHEMA_COMPACT = json.dumps(OUTPUT_SCHEMA, ensure_ascii=False, separators=(',', ':'))
+_OUTPUT_SCHEMA_SAVED_TOKENS = (count_tokens(json.dumps(OUTPUT_SCHEMA, ensure_ascii=False, indent=2))
+                               - count_tokens(_OUTPUT_SCHEMA_COMPACT))
+
+# Skill.md 进程级缓存：按文件修改时间热加载
+_skill_cache: Dict[str, Tuple[int, str]] = {}
+_skill_lock = threading.Lock()
+
+# GitHub大模型接口注册表：按 (api_key, model) 复用实例
+_interfaces: Dict[Tuple[Optional[str], str], "GitHubLLMInterface"] = {}
+_interfaces_lock = threading.Lock()
+
+
+def load_skill_content(skill_path: Optional[str] = None) -> str:
+    """
+    读取Skill.md内容，文件未修改时直接返回缓存
+
+    Args:
+        skill_path: 文件路径，默认项目根目录下的Skill.md
+
+    Returns:
+        Skill.md文件内容
+    """
+    skill_path = skill_path or SKILL_FILE_PATH
+    try:
+        mtime = os.stat(skill_path).st_mtime_ns
+    except OSError as e:
+        print(f"加载Skill.md失败: {e}")
+        return ""
+
+    cached = _skill_cache.get(skill_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _skill_lock:
+        cached = _skill_cache.get(skill_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(skill_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"加载Skill.md失败: {e}")
+            return ""
+        _skill_cache[skill_path] = (mtime, content)
+        return content
+
+
+def clear_skill_cache():
+    """
+    清除Skill.md缓存
+    """
+    with _skill_lock:
+        _skill_cache.clear()
 
 
 class GitHubLLMInterface:
     """GitHub大模型接口封装"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "github-copilot"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "github-copilot", keep_history: bool = True):
         """
         初始化GitHub大模型接口
         
         Args:
             api_key: API密钥
             model: 模型名称
+            keep_history: 是否在实例上保留对话历史。进程级共享的实例不保留（见 get_github_llm_interface），
+                对话历史只写入调用方传入的 history，避免不同用户的内容互相可见
         """
         self.api_key = api_key or os.environ.get("GITHUB_TOKEN")
         self.model = model
-        self.skill_content = self._load_skill_file()
-        self.conversation_history: List[Dict[str, str]] = []
+        self.history = HistoryStore() if keep_history else None
+    
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """
+        实例自身保留的对话历史（有界，不保留历史的实例返回空列表）
+        """
+        return self.history.messages() if self.history is not None else []
+    
+    @property
+    def skill_content(self) -> str:
+        """
+        Skill.md内容（进程级缓存，文件修改后自动重新加载）
+        """
+        return self._load_skill_file()
     
     def _load_skill_file(self) -> str:
         """
@@ -28,28 +136,25 @@ class GitHubLLMInterface:
         Returns:
             Skill.md文件内容
         """
-        try:
-            skill_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "Skill.md")
-            with open(skill_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            print(f"加载Skill.md失败: {e}")
-            return ""
+        return load_skill_content()
     
-    def generate_investment_analysis(self, company_data: Dict[str, Any], user_question: Optional[str] = None) -> Dict[str, Any]:
+    def generate_investment_analysis(self, company_data: Dict[str, Any], user_question: Optional[str] = None,
+                                     history: Optional[HistoryStore] = None) -> Dict[str, Any]:
         """
         使用GitHub大模型生成投资分析
         
         Args:
             company_data: 公司数据
             user_question: 用户问题（可选）
+            history: 会话历史（可选），提供时写入该会话的历史，否则写入实例自身的历史（如有）
             
         Returns:
             分析结果
         """
+        history = history if history is not None else self.history
         try:
             # 构建提示词
-            prompt = self._build_investment_prompt(company_data, user_question)
+            prompt, prompt_stats = self._build_investment_prompt(company_data, user_question)
             
             # 这里使用模拟数据，实际项目中应该调用真实的GitHub AI API
             # 例如使用GitHub Copilot API或其他GitHub AI服务
@@ -57,10 +162,13 @@ class GitHubLLMInterface:
             # 模拟大模型返回的分析结果
             analysis_result = self._mock_github_llm_response(company_data, user_question)
             
+            analysis_result["prompt_stats"] = prompt_stats
+            
             # 保存对话历史
-            if user_question:
-                self.conversation_history.append({"role": "user", "content": user_question})
-            self.conversation_history.append({"role": "assistant", "content": json.dumps(analysis_result)})
+            if history is not None:
+                if user_question:
+                    history.add_message("user", user_question)
+                history.add_message("assistant", json.dumps(analysis_result))
             
             return analysis_result
             
@@ -81,23 +189,28 @@ class GitHubLLMInterface:
                 "next_steps": ["请检查网络连接后重试"]
             }
     
-    def _build_investment_prompt(self, company_data: Dict[str, Any], user_question: Optional[str] = None) -> str:
+    def _build_investment_prompt(self, company_data: Dict[str, Any], user_question: Optional[str] = None,
+                                 token_budget: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
         """
-        构建投资分析提示词
+        构建投资分析提示词，只内联与公司指标和用户问题相关的技能框架章节
         
         Args:
             company_data: 公司数据
             user_question: 用户问题（可选）
+            token_budget: 技能框架的 token 预算，默认使用 SKILL_TOKEN_BUDGET
             
         Returns:
-            提示词字符串
+            (提示词字符串, token 统计)。统计随返回值传出而不记录在实例上，共享实例的并发请求互不影响
         """
+        budget = SKILL_TOKEN_BUDGET if token_budget is None else token_budget
+        skill_text, skill_stats = compact_skill_content(self.skill_content, company_data, user_question, budget)
+        
         prompt_parts = []
         
         # 系统提示词
         prompt_parts.append(f"你是一个专业的价值投资分析师，精通巴菲特和芒格的投资哲学。")
         prompt_parts.append(f"请根据以下技能框架和公司数据，提供深入、专业的投资分析：")
-        prompt_parts.append(f"\n## 价值投资技能框架\n{self.skill_content}")
+        prompt_parts.append(f"\n## 价值投资技能框架\n{skill_text}")
         
         # 公司数据
         prompt_parts.append(f"\n## 公司数据\n")
@@ -131,22 +244,26 @@ class GitHubLLMInterface:
         
         # 输出格式要求
         prompt_parts.append(f"\n## 输出格式\n")
-        prompt_parts.append(f"请以JSON格式返回分析结果，包含以下字段：")
-        prompt_parts.append(f"{{")
-        prompt_parts.append(f"  \"analysis_summary\": \"分析摘要\",")
-        prompt_parts.append(f"  \"investment_recommendation\": \"投资建议（买入/持有/卖出）\",")
-        prompt_parts.append(f"  \"confidence_score\": 置信度评分（0-1）,")
-        prompt_parts.append(f"  \"risk_assessment\": \"风险评估（低/中/高）\",")
-        prompt_parts.append(f"  \"key_findings\": [\"关键发现1\", \"关键发现2\", ...],")
-        prompt_parts.append('  "valuation_analysis": {\n    "intrinsic_value_estimate": "内在价值估计",\n    "safety_margin": "安全边际",\n    "valuation_methodology": "估值方法"\n  },')
-        prompt_parts.append('  "fundamental_analysis": {\n    "financial_health": "财务健康度",\n    "growth_prospects": "增长前景",\n    "management_quality": "管理层质量"\n  },')
-        prompt_parts.append('  "moat_analysis": {\n    "moat_type": "护城河类型",\n    "moat_strength": "护城河强度",\n    "sustainability": "可持续性"\n  },')
-        prompt_parts.append('  "risk_analysis": {\n    "key_risks": ["风险1", "风险2", ...],\n    "risk_mitigation": ["缓解策略1", "缓解策略2", ...]\n  },')
-        prompt_parts.append(f"  \"recommendation_reasoning\": \"建议推理过程\",")
-        prompt_parts.append(f"  \"next_steps\": [\"下一步1\", \"下一步2\", ...]")
-        prompt_parts.append(f"}}")
+        prompt_parts.append(f"请以JSON格式返回分析结果，字段如下（列表字段可包含多项）：")
+        prompt_parts.append(_OUTPUT_SCHEMA_COMPACT)
         
-        return "\n".join(prompt_parts)
+        prompt = "\n".join(prompt_parts)
+        
+        # 统计相对于内联完整 Skill.md 与缩进格式说明的节省量
+        prompt_tokens = count_tokens(prompt)
+        saved_tokens = skill_stats["skill_tokens_full"] - skill_stats["skill_tokens"] + _OUTPUT_SCHEMA_SAVED_TOKENS
+        full_tokens = prompt_tokens + saved_tokens
+        prompt_stats = {
+            "prompt_tokens": prompt_tokens,
+            "full_prompt_tokens": full_tokens,
+            "saved_tokens": saved_tokens,
+            "saved_ratio": round(saved_tokens / full_tokens, 4) if full_tokens else 0.0,
+            "skill_sections_used": skill_stats["sections_used"],
+            "skill_sections_total": skill_stats["sections_total"],
+            "token_budget": budget
+        }
+        
+        return prompt, prompt_stats
     
     def _mock_github_llm_response(self, company_data: Dict[str, Any], user_question: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -278,26 +395,30 @@ class GitHubLLMInterface:
         
         return analysis_result
     
-    def ask_follow_up_question(self, question: str) -> Dict[str, Any]:
+    def ask_follow_up_question(self, question: str, history: Optional[HistoryStore] = None) -> Dict[str, Any]:
         """
         追问功能
         
         Args:
             question: 用户追问
+            history: 会话历史，提供时基于并写入该会话的历史；未提供且实例不保留历史时不带上下文回答
             
         Returns:
             回答结果
         """
+        history = history if history is not None else self.history
+        if history is None:
+            history = HistoryStore()
         try:
             # 构建追问提示词
-            prompt = self._build_follow_up_prompt(question)
+            prompt = self._build_follow_up_prompt(question, history.messages())
             
             # 模拟大模型回答
             follow_up_response = self._mock_follow_up_response(question)
             
             # 保存对话历史
-            self.conversation_history.append({"role": "user", "content": question})
-            self.conversation_history.append({"role": "assistant", "content": json.dumps(follow_up_response)})
+            history.add_message("user", question)
+            history.add_message("assistant", json.dumps(follow_up_response))
             
             return follow_up_response
             
@@ -309,20 +430,23 @@ class GitHubLLMInterface:
                 "related_topics": ["追问失败"]
             }
     
-    def _build_follow_up_prompt(self, question: str) -> str:
+    def _build_follow_up_prompt(self, question: str, messages: Optional[List[Dict[str, str]]] = None) -> str:
         """
         构建追问提示词
         
         Args:
             question: 用户追问
+            messages: 对话历史，默认使用实例自身的历史
             
         Returns:
             提示词字符串
         """
+        if messages is None:
+            messages = self.conversation_history
         prompt_parts = []
         prompt_parts.append(f"你是一个专业的价值投资分析师，正在回答用户的追问。")
         prompt_parts.append(f"\n## 对话历史\n")
-        for msg in self.conversation_history[-5:]:  # 只使用最近5条对话
+        for msg in messages[-5:]:  # 只使用最近5条对话
             prompt_parts.append(f"{msg['role']}: {msg['content']}")
         prompt_parts.append(f"\n## 最新问题\n{question}")
         prompt_parts.append(f"\n## 回答要求\n")
@@ -375,7 +499,39 @@ class GitHubLLMInterface:
         """
         清除对话历史
         """
-        self.conversation_history = []
+        if self.history is not None:
+            self.history.clear()
+
+
+def get_github_llm_interface(api_key: Optional[str] = None, model: str = "github-copilot") -> GitHubLLMInterface:
+    """
+    获取进程级共享的GitHub大模型接口实例
+    
+    共享实例不保留对话历史：分析与追问只读写调用方传入的会话历史
+    
+    Args:
+        api_key: API密钥
+        model: 模型名称
+        
+    Returns:
+        GitHubLLMInterface实例
+    """
+    key = (api_key or os.environ.get("GITHUB_TOKEN"), model)
+    interface = _interfaces.get(key)
+    if interface is None:
+        with _interfaces_lock:
+            interface = _interfaces.get(key)
+            if interface is None:
+                interface = _interfaces[key] = GitHubLLMInterface(api_key, model, keep_history=False)
+    return interface
+
+
+def clear_github_llm_interfaces():
+    """
+    清空GitHub大模型接口注册表
+    """
+    with _interfaces_lock:
+        _interfaces.clear()
 
 
 def get_github_llm_analysis(company_data: Dict[str, Any], user_question: Optional[str] = None, api_key: Optional[str] = None) -> Dict[str, Any]:
@@ -390,20 +546,22 @@ def get_github_llm_analysis(company_data: Dict[str, Any], user_question: Optiona
     Returns:
         分析结果
     """
-    github_llm = GitHubLLMInterface(api_key)
+    github_llm = get_github_llm_interface(api_key)
     return github_llm.generate_investment_analysis(company_data, user_question)
 
 
-def ask_github_llm_follow_up(question: str, api_key: Optional[str] = None) -> Dict[str, Any]:
+def ask_github_llm_follow_up(question: str, api_key: Optional[str] = None,
+                             history: Optional[HistoryStore] = None) -> Dict[str, Any]:
     """
     向GitHub大模型追问
     
     Args:
         question: 用户追问
         api_key: API密钥
+        history: 会话历史（可选），提供时追问基于该会话的历史，否则不带上下文回答
         
     Returns:
         回答结果
     """
-    github_llm = GitHubLLMInterface(api_key)
-    return github_llm.ask_follow_up_question(question)
+    github_llm = get_github_llm_interface(api_key)
+    return github_llm.ask_follow_up_question(question, history)
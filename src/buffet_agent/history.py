@@ -0,0 +1,229 @@
+"""会话历史模块：有界的对话环形缓冲、按ID引用的分析结果与滚动摘要"""
+import itertools
+import json
+import threading
+from collections import deque, OrderedDict
+from typing import Optional, Dict, Any, List, Callable
+
+# 默认上限：对话消息条数、对话内容字节数、分析结果条数、分析结果字节数、滚动摘要字符数
+MAX_MESSAGES = 200
+MAX_MESSAGE_BYTES = 256 * 1024
+MAX_ANALYSES = 50
+MAX_ANALYSIS_BYTES = 256 * 1024
+MAX_SUMMARY_CHARS = 2000
+
+# 单条消息写入摘要时保留的字符数
+SUMMARY_SNIPPET_CHARS = 60
+
+_analysis_ids = itertools.count(1)
+
+
+def default_summarizer(message: Dict[str, str]) -> str:
+    """
+    把被淘汰的消息压缩为一行摘要
+
+    Args:
+        message: 对话消息
+
+    Returns:
+        摘要行
+    """
+    content = " ".join(message["content"].split())
+    if len(content) > SUMMARY_SNIPPET_CHARS:
+        content = content[:SUMMARY_SNIPPET_CHARS] + "…"
+    return f"{message['role']}: {content}"
+
+
+def analysis_size(analysis: Dict[str, Any]) -> int:
+    """
+    估算分析结果占用的字节数（按 JSON 序列化后的 UTF-8 长度计）
+
+    Args:
+        analysis: 分析结果
+
+    Returns:
+        字节数
+    """
+    return len(json.dumps(analysis, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def analysis_reference(analysis_id: str, analysis: Dict[str, Any]) -> str:
+    """
+    生成写入对话历史的分析结果引用（代替完整结果的字符串副本）
+
+    Args:
+        analysis_id: 分析结果ID
+        analysis: 分析结果
+
+    Returns:
+        引用文本
+    """
+    company = analysis.get("company_info", {})
+    return (f"[分析 {analysis_id}] {company.get('name', '未知')}({company.get('code', '未知')}) "
+            f"{analysis.get('integrated_recommendation', '')}")
+
+
+class HistoryStore:
+    """有界会话历史
+
+    对话消息保存在环形缓冲中，条数或总字节数超限时淘汰最早的消息；
+    分析结果按ID保存原对象的引用，条数或估算的总字节数超限时淘汰最早的结果（始终保留最新一条）。
+    开启摘要时，被淘汰的消息压缩成一行写入滚动摘要，摘要本身也有字符上限。
+    """
+
+    def __init__(self, max_messages: int = MAX_MESSAGES, max_bytes: int = MAX_MESSAGE_BYTES,
+                 max_analyses: int = MAX_ANALYSES, max_analysis_bytes: int = MAX_ANALYSIS_BYTES,
+                 summarize: bool = True,
+                 summarizer: Callable[[Dict[str, str]], str] = default_summarizer,
+                 max_summary_chars: int = MAX_SUMMARY_CHARS):
+        """
+        初始化会话历史
+
+        Args:
+            max_messages: 最多保留的对话消息条数
+            max_bytes: 对话消息内容（UTF-8）的总字节上限
+            max_analyses: 最多保留的分析结果条数
+            max_analysis_bytes: 分析结果（按 analysis_size 估算）的总字节上限
+            summarize: 是否把被淘汰的消息写入滚动摘要
+            summarizer: 单条消息的摘要函数
+            max_summary_chars: 滚动摘要的字符上限
+        """
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_analyses = max_analyses
+        self.max_analysis_bytes = max_analysis_bytes
+        self.summarize = summarize
+        self.summarizer = summarizer
+        self.max_summary_chars = max_summary_chars
+        self._messages: deque = deque()
+        self._bytes = 0
+        self._analyses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._analysis_sizes: Dict[str, int] = {}
+        self._analysis_bytes = 0
+        self._summary: deque = deque()
+        self._summary_chars = 0
+        self._evicted_messages = 0
+        self._evicted_analyses = 0
+        self._lock = threading.Lock()
+
+    def add_message(self, role: str, content: str):
+        """
+        追加对话消息，超限时淘汰最早的消息
+
+        Args:
+            role: 角色（user/assistant）
+            content: 消息内容
+        """
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._messages.append(({"role": role, "content": content}, size))
+            self._bytes += size
+            while self._messages and (len(self._messages) > self.max_messages or self._bytes > self.max_bytes):
+                message, evicted_size = self._messages.popleft()
+                self._bytes -= evicted_size
+                self._evicted_messages += 1
+                if self.summarize:
+                    self._append_summary(self.summarizer(message))
+
+    def _append_summary(self, line: str):
+        """追加摘要行并按字符上限淘汰最早的摘要，调用方需持有锁"""
+        self._summary.append(line)
+        self._summary_chars += len(line)
+        while len(self._summary) > 1 and self._summary_chars > self.max_summary_chars:
+            self._summary_chars -= len(self._summary.popleft())
+
+    def add_analysis(self, analysis: Dict[str, Any]) -> str:
+        """
+        保存分析结果的引用，条数或字节数超限时淘汰最早的结果
+
+        Args:
+            analysis: 分析结果
+
+        Returns:
+            分析结果ID
+        """
+        analysis_id = f"a{next(_analysis_ids)}"
+        size = analysis_size(analysis)
+        with self._lock:
+            self._analyses[analysis_id] = analysis
+            self._analysis_sizes[analysis_id] = size
+            self._analysis_bytes += size
+            while len(self._analyses) > 1 and (len(self._analyses) > self.max_analyses
+                                               or self._analysis_bytes > self.max_analysis_bytes):
+                evicted_id, _ = self._analyses.popitem(last=False)
+                self._analysis_bytes -= self._analysis_sizes.pop(evicted_id)
+                self._evicted_analyses += 1
+        return analysis_id
+
+    def get_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        按ID获取分析结果
+
+        Args:
+            analysis_id: 分析结果ID
+
+        Returns:
+            分析结果，已淘汰或不存在时返回None
+        """
+        with self._lock:
+            return self._analyses.get(analysis_id)
+
+    def messages(self) -> List[Dict[str, str]]:
+        """
+        获取保留的对话消息（按时间顺序）
+
+        Returns:
+            对话消息列表
+        """
+        with self._lock:
+            return [message for message, _ in self._messages]
+
+    def analyses(self) -> List[Dict[str, Any]]:
+        """
+        获取保留的分析结果（按时间顺序）
+
+        Returns:
+            分析结果列表
+        """
+        with self._lock:
+            return list(self._analyses.values())
+
+    @property
+    def summary(self) -> str:
+        """被淘汰消息的滚动摘要"""
+        with self._lock:
+            return "\n".join(self._summary)
+
+    def clear(self):
+        """
+        清空历史与摘要
+        """
+        with self._lock:
+            self._messages.clear()
+            self._bytes = 0
+            self._analyses.clear()
+            self._analysis_sizes.clear()
+            self._analysis_bytes = 0
+            self._summary.clear()
+            self._summary_chars = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取历史占用与淘汰计数
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            return {
+                "messages": len(self._messages),
+                "message_bytes": self._bytes,
+                "analyses": len(self._analyses),
+                "analysis_bytes": self._analysis_bytes,
+                "summary_chars": self._summary_chars,
+                "evicted_messages": self._evicted_messages,
+                "evicted_analyses": self._evicted_analyses
+            }
+
+    def __len__(self) -> int:
+        return len(self._messages)
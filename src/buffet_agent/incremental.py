@@ -0,0 +1,182 @@
+"""增量评分模块：按技能记录输入字段指纹，只重算输入发生变化的股票与技能"""
+import os
+import json
+import hashlib
+from typing import Optional, Dict, Any, Iterable, Mapping, Tuple
+
+from . import skills
+from .batch import (SAFETY_RULES, SAFETY_WARN_RULES, FUNDAMENTAL_RULES, FUNDAMENTAL_WARN_RULES,
+                    MOAT_RULES, RISK_RULES)
+from .knowledge import build_investment_reasoning, get_shared_knowledge_graph
+
+# 状态文件默认路径、格式版本（格式或推理代码逻辑变化时递增，使旧状态全部失效；知识数据变化由快照摘要覆盖）
+INCREMENTAL_STATE_PATH = ".buffet_state.json"
+INCREMENTAL_STATE_VERSION = 1
+
+# 知识图谱推理读取的字段
+REASONING_FIELDS = ("name", "code", "roe_ttm", "pe", "debt_to_asset", "revenue_growth", "gross_margin",
+                    "pe_hist_percent")
+
+
+def _rule_fields(*rule_tables) -> Tuple[str, ...]:
+    """规则表中用到的字段（去重并保持顺序）"""
+    return tuple(dict.fromkeys(rule[0] for rules in rule_tables for rule in rules))
+
+
+def _digest(value: Any) -> str:
+    """对可 JSON 序列化的值计算稳定的 SHA-1 摘要"""
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _to_plain(value: Any) -> Any:
+    """转换为 JSON 往返后的形式（元组转列表、只读字典转普通字典），使新算结果与复用结果完全一致"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+def _reasoning_salt() -> str:
+    """推理技能的盐值：格式版本加当前知识快照摘要，加载新的行业映射后旧推理自动失效"""
+    return _digest([INCREMENTAL_STATE_VERSION, get_shared_knowledge_graph().snapshot_digest()])
+
+
+# 技能 -> (计算函数, 输入字段, 盐值)。评分技能的盐值取自规则表，阈值或分值修改后旧结果自动失效；
+# 知识快照可能在运行时替换，推理技能的盐值为函数，计算指纹时求值
+SKILLS = {
+    "safety_margin": (skills.safety_margin, _rule_fields(SAFETY_RULES, SAFETY_WARN_RULES),
+                      _digest([SAFETY_RULES, SAFETY_WARN_RULES])),
+    "fundamental": (skills.fundamental, _rule_fields(FUNDAMENTAL_RULES, FUNDAMENTAL_WARN_RULES),
+                    _digest([FUNDAMENTAL_RULES, FUNDAMENTAL_WARN_RULES])),
+    "moat": (skills.moat, _rule_fields(MOAT_RULES), _digest(MOAT_RULES)),
+    "risk": (skills.risk, _rule_fields(RISK_RULES), _digest(RISK_RULES)),
+    "investment_reasoning": (build_investment_reasoning, REASONING_FIELDS, _reasoning_salt),
+}
+
+
+def skill_fingerprint(skill: str, company_data: Mapping[str, Any]) -> str:
+    """
+    计算单个技能的输入指纹（只包含该技能读取的字段）
+
+    Args:
+        skill: 技能名称（SKILLS 的键）
+        company_data: 公司数据
+
+    Returns:
+        指纹（十六进制字符串）
+    """
+    _, fields, salt = SKILLS[skill]
+    if callable(salt):
+        salt = salt()
+    return _digest([salt, [[field, company_data.get(field)] for field in fields]])[:20]
+
+
+class IncrementalScorer:
+    """增量评分器
+
+    状态文件保存每只股票各技能的输入指纹与结果。再次运行时只重算指纹变化的技能：
+    例如盘中仅价格变动时，只有读取估值字段（pe、peg、估值分位）的技能会重算，
+    基本面等技能直接复用上次结果。
+    """
+
+    def __init__(self, state_path: str = INCREMENTAL_STATE_PATH):
+        """
+        初始化增量评分器并加载上次的状态
+
+        Args:
+            state_path: 状态文件路径
+        """
+        self.state_path = state_path
+        self.state: Dict[str, Dict[str, Any]] = self._load()
+        self.stats = self._new_stats()
+
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        return {"tickers": 0, "reused": 0, "recomputed": 0,
+                "skills_recomputed": {skill: 0 for skill in SKILLS}}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """加载状态文件，不存在、损坏或版本不一致时从空状态开始"""
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"增量状态文件读取失败，将全量重算: {e}")
+            return {}
+        if saved.get("version") != INCREMENTAL_STATE_VERSION:
+            return {}
+        return saved.get("tickers", {})
+
+    def score(self, company_data: Mapping[str, Any], code: Optional[str] = None) -> Dict[str, Any]:
+        """
+        评分单只股票，复用输入未变化的技能结果
+
+        Args:
+            company_data: 公司数据
+            code: 股票代码，默认取 company_data["code"]
+
+        Returns:
+            与 ValueInvestmentAgent 传统分析结构一致的结果，另含 investment_reasoning
+        """
+        code = code or company_data.get("code")
+        entry = self.state.get(code) or {"fingerprints": {}, "results": {}}
+        fingerprints = {}
+        results = {}
+        changed = False
+        for skill, (func, _, _) in SKILLS.items():
+            fingerprint = skill_fingerprint(skill, company_data)
+            if entry["fingerprints"].get(skill) == fingerprint and skill in entry["results"]:
+                results[skill] = entry["results"][skill]
+            else:
+                results[skill] = _to_plain(func(company_data))
+                self.stats["skills_recomputed"][skill] += 1
+                changed = True
+            fingerprints[skill] = fingerprint
+        self.state[code] = {"fingerprints": fingerprints, "results": results}
+
+        self.stats["tickers"] += 1
+        self.stats["recomputed" if changed else "reused"] += 1
+
+        final = skills.final_rating([results["safety_margin"], results["fundamental"], results["moat"],
+                                     results["risk"]])
+        return {
+            "safety_margin": results["safety_margin"],
+            "fundamental": results["fundamental"],
+            "moat": results["moat"],
+            "risk": results["risk"],
+            "avg_score": final["avg"],
+            "final_decision": final["decision"],
+            "investment_reasoning": results["investment_reasoning"]
+        }
+
+    def score_all(self, universe: Iterable[Mapping[str, Any]], prune: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        评分整个股票池并保存状态
+
+        Args:
+            universe: 公司数据序列（或 {code: 公司数据} 映射）
+            prune: 是否从状态中删除本次未出现的股票
+
+        Returns:
+            股票代码到结果的映射
+        """
+        self.stats = self._new_stats()
+        if isinstance(universe, Mapping):
+            items = ((code, data) for code, data in universe.items())
+        else:
+            items = ((data.get("code"), data) for data in universe)
+        results = {code: self.score(data, code) for code, data in items}
+        if prune:
+            self.state = {code: entry for code, entry in self.state.items() if code in results}
+        self.save()
+        return results
+
+    def save(self):
+        """保存状态（先写临时文件再原子替换）"""
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INCREMENTAL_STATE_VERSION, "tickers": self.state}, f,
+                          ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"增量状态文件保存失败: {e}")
@@ -1,29 +1,116 @@
 """知识图谱和推理能力模块"""
 import os
 import json
-from typing import Optional, Dict, Any, List, Set, Tuple
+import hashlib
+import threading
+from typing import Optional, Dict, Any, List, Set, Tuple, NamedTuple, Mapping
+from .matcher import KeywordMatcher
+
+
+class FrozenDict(dict):
+    """只读字典：可直接JSON序列化，任何修改操作都会抛出TypeError"""
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("知识图谱快照为只读数据，请通过 InvestmentKnowledgeGraph 的更新接口修改")
+    
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def _freeze(value: Any) -> Any:
+    """
+    递归冻结数据：dict 转为 FrozenDict，list 转为 tuple
+    """
+    if isinstance(value, dict):
+        return FrozenDict({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class KnowledgeSnapshot(NamedTuple):
+    """知识图谱不可变快照"""
+    industry_knowledge: Dict[str, Dict[str, Any]]
+    company_relationships: Dict[str, Tuple[Dict[str, str], ...]]
+    investment_logics: Tuple[Dict[str, Any], ...]
+    knowledge_base: Dict[str, Any]
+    industry_keywords: Dict[str, str]
+    industry_codes: Dict[str, str]
+    industry_matcher: KeywordMatcher
+
 
 class InvestmentKnowledgeGraph:
-    """投资知识图谱"""
+    """投资知识图谱
+    
+    知识以不可变快照保存，读取无需加锁；更新时复制出新快照后整体替换（copy-on-write）。
+    """
     
-    def __init__(self):
+    def __init__(self, snapshot: Optional[KnowledgeSnapshot] = None):
         """
         初始化投资知识图谱
+        
+        Args:
+            snapshot: 已有的知识快照，None表示构建默认知识
         """
-        self.industry_knowledge: Dict[str, Dict[str, Any]] = {}
-        self.company_relationships: Dict[str, List[Dict[str, str]]] = {}
-        self.investment_logics: List[Dict[str, Any]] = []
-        self.knowledge_base: Dict[str, Any] = {}
+        self._write_lock = threading.Lock()
+        self._digest_cache: Optional[Tuple[KnowledgeSnapshot, str]] = None
+        if snapshot is not None:
+            self._snapshot = snapshot
+        else:
+            # 初始化默认知识
+            self._initialize_default_knowledge()
+    
+    @property
+    def snapshot(self) -> KnowledgeSnapshot:
+        """当前知识快照"""
+        return self._snapshot
+    
+    def snapshot_digest(self) -> str:
+        """
+        当前知识快照的摘要（不含由关键词派生的匹配器），快照被替换后重新计算
         
-        # 初始化默认知识
-        self._initialize_default_knowledge()
+        Returns:
+            摘要（十六进制字符串）
+        """
+        snapshot = self._snapshot
+        cached = self._digest_cache
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        content = snapshot._replace(industry_matcher=None)._asdict()
+        digest = hashlib.sha1(json.dumps(content, ensure_ascii=False, sort_keys=True,
+                                         default=str).encode("utf-8")).hexdigest()
+        self._digest_cache = (snapshot, digest)
+        return digest
+    
+    @property
+    def industry_knowledge(self) -> Dict[str, Dict[str, Any]]:
+        return self._snapshot.industry_knowledge
+    
+    @property
+    def company_relationships(self) -> Dict[str, Tuple[Dict[str, str], ...]]:
+        return self._snapshot.company_relationships
+    
+    @property
+    def investment_logics(self) -> Tuple[Dict[str, Any], ...]:
+        return self._snapshot.investment_logics
+    
+    @property
+    def knowledge_base(self) -> Dict[str, Any]:
+        return self._snapshot.knowledge_base
+    
+    @property
+    def industry_keywords(self) -> Dict[str, str]:
+        return self._snapshot.industry_keywords
     
     def _initialize_default_knowledge(self):
         """
         初始化默认知识
         """
         # 行业知识
-        self.industry_knowledge = {
+        industry_knowledge = {
             "白酒": {
                 "characteristics": ["高毛利率", "强品牌效应", "抗周期性", "社交属性"],
                 "key_metrics": ["毛利率", "净利率", "ROE", "品牌价值"],
@@ -59,7 +146,7 @@ class InvestmentKnowledgeGraph:
         }
         
         # 投资逻辑模板
-        self.investment_logics = [
+        investment_logics = [
             {
                 "id": "value_investing_basic",
                 "name": "价值投资基础逻辑",
@@ -100,18 +187,91 @@ class InvestmentKnowledgeGraph:
                 "applicable_industries": ["银行", "周期股"]
             }
         ]
+        
+        # 公司名称关键词到行业的映射
+        industry_keywords = {
+            "茅台": "白酒",
+            "五粮液": "白酒",
+            "泸州老窖": "白酒",
+            "工商": "银行",
+            "建设": "银行",
+            "招商": "银行",
+            "恒瑞": "医药",
+            "药明": "医药",
+            "长春": "医药",
+            "腾讯": "科技",
+            "阿里": "科技",
+            "华为": "科技"
+        }
+        
+        self._snapshot = KnowledgeSnapshot(
+            industry_knowledge=_freeze(industry_knowledge),
+            company_relationships=FrozenDict(),
+            investment_logics=_freeze(investment_logics),
+            knowledge_base=FrozenDict(),
+            industry_keywords=FrozenDict(industry_keywords),
+            industry_codes=FrozenDict(),
+            industry_matcher=KeywordMatcher(industry_keywords)
+        )
     
     def add_company_relationship(self, company: str, relationship: Dict[str, str]):
         """
-        添加公司关系
+        添加公司关系（复制出新快照后替换，不影响正在读取旧快照的线程）
         
         Args:
             company: 公司名称
             relationship: 关系信息，包含type和target
         """
-        if company not in self.company_relationships:
-            self.company_relationships[company] = []
-        self.company_relationships[company].append(relationship)
+        with self._write_lock:
+            current = self._snapshot
+            relationships = dict(current.company_relationships)
+            relationships[company] = relationships.get(company, ()) + (_freeze(relationship),)
+            self._snapshot = current._replace(company_relationships=FrozenDict(relationships))
+    
+    def add_industry_keywords(self, keywords: Mapping[str, str]):
+        """
+        添加行业关键词（含别名），重新编译匹配器后替换快照
+        
+        Args:
+            keywords: 关键词到行业的映射，已存在的关键词以新值为准
+        """
+        with self._write_lock:
+            current = self._snapshot
+            merged = dict(current.industry_keywords)
+            merged.update(keywords)
+            self._snapshot = current._replace(
+                industry_keywords=FrozenDict(merged),
+                industry_matcher=KeywordMatcher(merged)
+            )
+    
+    def add_industry_codes(self, codes: Mapping[str, str]):
+        """
+        添加股票代码到行业的索引
+        
+        Args:
+            codes: 股票代码到行业的映射
+        """
+        with self._write_lock:
+            current = self._snapshot
+            merged = dict(current.industry_codes)
+            merged.update(codes)
+            self._snapshot = current._replace(industry_codes=FrozenDict(merged))
+    
+    def load_industry_mapping(self, path: str):
+        """
+        从JSON文件加载行业分类映射（如申万/证监会行业）
+        
+        文件格式：{"keywords": {"关键词": "行业"}, "codes": {"600519.SH": "行业"}}
+        
+        Args:
+            path: 文件路径
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+        if mapping.get("keywords"):
+            self.add_industry_keywords(mapping["keywords"])
+        if mapping.get("codes"):
+            self.add_industry_codes(mapping["codes"])
     
     def get_company_relationships(self, company: str) -> List[Dict[str, str]]:
         """
@@ -123,7 +283,7 @@ class InvestmentKnowledgeGraph:
         Returns:
             公司关系列表
         """
-        return self.company_relationships.get(company, [])
+        return list(self.company_relationships.get(company, ()))
     
     def get_industry_knowledge(self, industry: str) -> Optional[Dict[str, Any]]:
         """
@@ -137,36 +297,24 @@ class InvestmentKnowledgeGraph:
         """
         return self.industry_knowledge.get(industry)
     
-    def infer_industry(self, company_name: str) -> Optional[str]:
+    def infer_industry(self, company_name: str, stock_code: Optional[str] = None) -> Optional[str]:
         """
-        根据公司名称推断行业
+        根据股票代码或公司名称推断行业
+        
+        优先查询代码索引；否则用预编译的关键词自动机匹配公司名称，
+        多个关键词命中时取最长者，等长时取最先出现者。
         
         Args:
             company_name: 公司名称
+            stock_code: 股票代码（可选）
             
         Returns:
             推断的行业
         """
-        industry_mappings = {
-            "茅台": "白酒",
-            "五粮液": "白酒",
-            "泸州老窖": "白酒",
-            "工商": "银行",
-            "建设": "银行",
-            "招商": "银行",
-            "恒瑞": "医药",
-            "药明": "医药",
-            "长春": "医药",
-            "腾讯": "科技",
-            "阿里": "科技",
-            "华为": "科技"
-        }
-        
-        for keyword, industry in industry_mappings.items():
-            if keyword in company_name:
-                return industry
-        
-        return None
+        snapshot = self._snapshot
+        if stock_code and stock_code in snapshot.industry_codes:
+            return snapshot.industry_codes[stock_code]
+        return snapshot.industry_matcher.match(company_name or "")
     
     def build_investment_reasoning_chain(self, company_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -179,7 +327,7 @@ class InvestmentKnowledgeGraph:
             推理链
         """
         company_name = company_data.get("name", "未知公司")
-        industry = self.infer_industry(company_name)
+        industry = self.infer_industry(company_name, company_data.get("code"))
         
         # 收集证据
         evidence = self._collect_evidence(company_data, industry)
@@ -496,7 +644,7 @@ class InvestmentKnowledgeGraph:
         
         # 添加行业洞察
         company_name = company_data.get("name", "未知公司")
-        industry = self.infer_industry(company_name)
+        industry = self.infer_industry(company_name, company_data.get("code"))
         industry_insights = self.get_industry_knowledge(industry) if industry else None
         
         # 增强分析结果
@@ -524,6 +672,24 @@ class InvestmentKnowledgeGraph:
         
         return enhanced_analysis
 
+_shared_graph: Optional[InvestmentKnowledgeGraph] = None
+_shared_graph_lock = threading.Lock()
+
+
+def get_shared_knowledge_graph() -> InvestmentKnowledgeGraph:
+    """
+    获取进程内共享的知识图谱（默认知识只构建一次，多线程可无锁并发读取）
+    
+    Returns:
+        共享的知识图谱实例
+    """
+    global _shared_graph
+    if _shared_graph is None:
+        with _shared_graph_lock:
+            if _shared_graph is None:
+                _shared_graph = InvestmentKnowledgeGraph()
+    return _shared_graph
+
 # 导出函数
 def build_investment_reasoning(company_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -535,7 +701,7 @@ def build_investment_reasoning(company_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         推理结果
     """
-    knowledge_graph = InvestmentKnowledgeGraph()
+    knowledge_graph = get_shared_knowledge_graph()
     return knowledge_graph.build_investment_reasoning_chain(company_data)
 
 def enhance_analysis(analysis: Dict[str, Any], company_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -549,7 +715,7 @@ def enhance_analysis(analysis: Dict[str, Any], company_data: Dict[str, Any]) ->
     Returns:
         增强后的分析
     """
-    knowledge_graph = InvestmentKnowledgeGraph()
+    knowledge_graph = get_shared_knowledge_graph()
     return knowledge_graph.enhance_analysis_with_knowledge(analysis, company_data)
 
 def cross_validate_data(company_data: Dict[str, Any], external_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -563,5 +729,5 @@ def cross_validate_data(company_data: Dict[str, Any], external_data: Dict[str, A
     Returns:
         验证结果
     """
-    knowledge_graph = InvestmentKnowledgeGraph()
+    knowledge_graph = get_shared_knowledge_graph()
     return knowledge_graph.cross_validate_information(company_data, external_data)
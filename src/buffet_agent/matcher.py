@@ -0,0 +1,115 @@
+"""多模式关键词匹配模块：基于 Aho-Corasick 自动机的行业关键词识别"""
+from typing import Optional, Dict, List, Tuple, Mapping
+
+
+class KeywordMatcher:
+    """Aho-Corasick 多模式匹配器
+
+    构建完成后只读，可在多线程间共享。查找耗时只与文本长度相关，与关键词数量无关。
+    多个关键词同时命中时按以下顺序确定唯一结果：关键词更长者优先，
+    等长时在文本中出现更早者优先；重复的关键词以首次加入的标签为准。
+    """
+
+    def __init__(self, keywords: Mapping[str, str]):
+        """
+        编译关键词自动机
+
+        Args:
+            keywords: 关键词到标签（如行业）的映射
+        """
+        self._labels: List[str] = []
+        self._lengths: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 每个状态上以当前位置结尾的最长关键词编号，-1 表示无
+        self._best: List[int] = [-1]
+        self._terminal: List[int] = [-1]
+
+        for keyword, label in keywords.items():
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(-1)
+                    self._terminal.append(-1)
+                state = next_state
+            if self._terminal[state] == -1:
+                self._terminal[state] = len(self._labels)
+                self._labels.append(label)
+                self._lengths.append(len(keyword))
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        """按广度优先计算失败指针与最长输出"""
+        queue = []
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            self._best[state] = self._terminal[state]
+            queue.append(state)
+
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # 自身是关键词时即为以此结尾的最长关键词，否则沿失败指针继承
+                terminal = self._terminal[next_state]
+                self._best[next_state] = terminal if terminal != -1 else self._best[self._fail[next_state]]
+                queue.append(next_state)
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def find(self, text: str) -> Optional[Tuple[str, int, int]]:
+        """
+        查找优先级最高的匹配
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            (标签, 起始位置, 关键词长度)，无匹配时返回None
+        """
+        goto, fail, best, lengths = self._goto, self._fail, self._best, self._lengths
+        state = 0
+        match = -1
+        match_start = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            candidate = best[state]
+            if candidate == -1:
+                continue
+            start = position - lengths[candidate] + 1
+            # 从左到右扫描，只有更长的关键词才会替换已有结果，等长时保留更早出现者
+            if match == -1 or lengths[candidate] > lengths[match]:
+                match, match_start = candidate, start
+        if match == -1:
+            return None
+        return self._labels[match], match_start, lengths[match]
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        返回优先级最高的匹配标签
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            标签，无匹配时返回None
+        """
+        result = self.find(text)
+        return result[0] if result else None
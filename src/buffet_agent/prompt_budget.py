@@ -0,0 +1,240 @@
+"""提示词预算模块：离线估算 token 数，按相关性在预算内挑选 Skill.md 章节"""
+import re
+import math
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, NamedTuple
+
+
+# 中文字符与全角标点各计 1 个 token，英文单词约 4 个字母 1 个，数字约 3 位 1 个，其余符号各计 1 个
+_TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]|[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_QUESTION_TERM_PATTERN = re.compile(r"[\u4e00-\u9fff]+|[A-Za-z]{2,}")
+
+# 每次分析都会关注的主题
+BASE_TERMS = {"安全边际": 1.0, "护城河": 1.0, "基本面": 1.0, "风险": 1.0}
+
+
+class SkillSection(NamedTuple):
+    """Skill.md 中的一个章节"""
+    parent: str
+    heading: str
+    text: str
+    tokens: int
+
+
+def count_tokens(text: str) -> int:
+    """
+    离线估算文本的 token 数
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 token 数
+    """
+    total = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece.isascii() and piece.isalpha():
+            total += math.ceil(len(piece) / 4)
+        elif piece.isdigit():
+            total += math.ceil(len(piece) / 3)
+        else:
+            total += 1
+    return total
+
+
+@lru_cache(maxsize=8)
+def split_skill_sections(content: str) -> Tuple[str, Tuple[SkillSection, ...]]:
+    """
+    按二、三级标题拆分 Skill.md
+
+    Args:
+        content: Skill.md 内容
+
+    Returns:
+        (一级标题等前言, 章节元组)，三级章节记录所属的二级标题
+    """
+    preamble: List[str] = []
+    sections: List[SkillSection] = []
+    parent = ""
+    heading = None
+    lines: List[str] = []
+
+    def flush():
+        if heading is not None:
+            text = "\n".join(lines).strip()
+            sections.append(SkillSection(parent if heading != parent else "", heading, text, count_tokens(text)))
+
+    for line in content.splitlines():
+        if line.startswith("## ") or line.startswith("### "):
+            flush()
+            heading = line.strip()
+            if line.startswith("## "):
+                parent = heading
+            lines = [line]
+        elif heading is None:
+            preamble.append(line)
+        else:
+            lines.append(line)
+    flush()
+    return "\n".join(preamble).strip(), tuple(sections)
+
+
+def build_query_terms(company_data: Dict[str, Any], user_question: Optional[str] = None) -> Dict[str, float]:
+    """
+    根据公司指标和用户问题生成带权重的检索词
+
+    Args:
+        company_data: 公司数据
+        user_question: 用户问题（可选）
+
+    Returns:
+        检索词到权重的映射
+    """
+    terms = dict(BASE_TERMS)
+
+    def add(term: str, weight: float):
+        terms[term] = terms.get(term, 0) + weight
+
+    pe = company_data.get('pe')
+    pe_hist = company_data.get('pe_hist_percent')
+    if pe is not None or company_data.get('pb') is not None:
+        add("估值", 2)
+        add("PE", 1)
+        add("PB", 1)
+    if (pe is not None and pe > 30) or (pe_hist is not None and pe_hist >= 70):
+        add("估值风险", 3)
+        add("安全边际", 2)
+    elif pe_hist is not None and pe_hist <= 30:
+        add("逆向", 2)
+        add("安全边际", 1)
+
+    roe = company_data.get('roe_ttm')
+    if roe is not None:
+        add("ROE", 1)
+        if roe >= 20:
+            add("护城河", 2)
+            add("竞争优势", 1)
+        elif roe < 10:
+            add("盈利能力", 2)
+
+    debt_to_asset = company_data.get('debt_to_asset')
+    if debt_to_asset is not None and debt_to_asset >= 60:
+        add("负债", 3)
+        add("财务风险", 3)
+        add("偿债", 2)
+
+    growth = [g for g in (company_data.get('revenue_growth'), company_data.get('profit_growth')) if g is not None]
+    if growth:
+        add("增长", 1)
+        if min(growth) < 0:
+            add("经营风险", 2)
+            add("增长", 1)
+
+    gross_margin = company_data.get('gross_margin')
+    if gross_margin is not None:
+        if gross_margin >= 40:
+            add("定价权", 2)
+            add("品牌", 1)
+        elif gross_margin < 20:
+            add("成本", 2)
+
+    if 'cash_flow_healthy' in company_data and not company_data.get('cash_flow_healthy'):
+        add("现金流", 3)
+        add("财务风险", 2)
+
+    if user_question:
+        # 中文按二元组切分，英文按单词，提问涉及的主题权重最高
+        for run in _QUESTION_TERM_PATTERN.findall(user_question):
+            if run.isascii():
+                add(run, 3)
+            else:
+                for i in range(max(len(run) - 1, 1)):
+                    add(run[i:i + 2], 3)
+
+    return terms
+
+
+def score_section(section: SkillSection, terms: Dict[str, float]) -> float:
+    """
+    计算章节与检索词的相关度：标题命中计 3 倍，正文每次命中计 1 倍（单词最多 3 次）
+
+    Args:
+        section: 章节
+        terms: 检索词权重
+
+    Returns:
+        相关度
+    """
+    heading = section.heading.lower()
+    body = section.text.lower()
+    score = 0.0
+    for term, weight in terms.items():
+        term = term.lower()
+        if term in heading:
+            score += 3 * weight
+        score += min(body.count(term), 3) * weight
+    return score
+
+
+def compact_skill_content(content: str, company_data: Dict[str, Any], user_question: Optional[str] = None,
+                          token_budget: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    在 token 预算内挑选与公司指标和用户问题最相关的 Skill.md 章节
+
+    Args:
+        content: Skill.md 内容
+        company_data: 公司数据
+        user_question: 用户问题（可选）
+        token_budget: token 预算，None 表示不限制（使用全文）
+
+    Returns:
+        (压缩后的技能框架文本, 统计信息)
+    """
+    preamble, sections = split_skill_sections(content)
+    full_tokens = count_tokens(content)
+    if token_budget is None or not sections:
+        return content, {"skill_tokens": full_tokens, "skill_tokens_full": full_tokens,
+                         "sections_used": len(sections), "sections_total": len(sections)}
+
+    terms = build_query_terms(company_data, user_question)
+    scored = sorted(
+        ((score_section(section, terms), index) for index, section in enumerate(sections)),
+        key=lambda item: (-item[0], item[1])
+    )
+
+    used = count_tokens(preamble)
+    chosen = set()
+    headed = set()
+    for score, index in scored:
+        if score <= 0:
+            break
+        section = sections[index]
+        if section.text == section.heading:
+            # 只有标题的二级章节随其下被选中的三级章节输出
+            continue
+        cost = section.tokens
+        if section.parent and section.parent not in headed:
+            cost += count_tokens(section.parent)
+        if used + cost > token_budget:
+            continue
+        chosen.add(index)
+        headed.add(section.parent or section.heading)
+        used += cost
+
+    # 按原文顺序输出，补齐被选中三级章节的二级标题
+    parts = [preamble] if preamble else []
+    emitted_parents = set()
+    for index, section in enumerate(sections):
+        if index not in chosen:
+            continue
+        if section.parent and section.parent not in emitted_parents:
+            if not any(sections[i].heading == section.parent for i in chosen):
+                parts.append(section.parent)
+            emitted_parents.add(section.parent)
+        if not section.parent:
+            emitted_parents.add(section.heading)
+        parts.append(section.text)
+
+    compacted = "\n\n".join(parts)
+    return compacted, {"skill_tokens": count_tokens(compacted), "skill_tokens_full": full_tokens,
+                       "sections_used": len(chosen), "sections_total": len(sections)}
@@ -0,0 +1,339 @@
+"""全市场筛选模块：流式读取股票池，分片到进程池批量评分，可选大模型分析，结果增量写出"""
+import os
+import csv
+import json
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Dict, List, Any, Iterable, Iterator
+
+from . import skills
+from .batch import records_to_frame, SCORE_FIELDS
+
+# 每个分片的股票数、每个工作进程同时排队的分片数、大模型分析默认并发数
+SCREEN_CHUNK_SIZE = 2000
+SCREEN_CHUNKS_PER_WORKER = 2
+SCREEN_LLM_CONCURRENCY = 4
+
+# 输出列（启用大模型分析时追加 LLM_FIELDS）
+RESULT_FIELDS = [
+    "code", "name", "industry",
+    "safety_score", "safety_level", "fundamental_score", "fundamental_status",
+    "moat_score", "moat_level", "risk_score", "risk_level",
+    "avg_score", "final_decision", "warnings",
+]
+LLM_FIELDS = ["llm_recommendation", "llm_confidence", "llm_risk"]
+
+# Parquet 输出的列类型（pyarrow 类型别名），未列出的列按字符串写出
+PARQUET_FIELD_TYPES = {
+    "safety_score": "int64",
+    "fundamental_score": "int64",
+    "moat_score": "int64",
+    "risk_score": "int64",
+    "avg_score": "int64",
+    "llm_confidence": "float64",
+}
+
+# CSV 中始终按文本读取的列（避免 000001 之类的代码被转换为数字）
+TEXT_FIELDS = ("code", "name", "industry")
+
+
+def _parse_cell(key: str, value: str) -> Any:
+    """CSV 单元格转换：空值为缺失，文本列保持原样，true/false 为布尔值，数字转换为 int/float，
+    评分字段中无法解析为数字的值（如 "N/A"、"-"）视为缺失"""
+    if value is None or value.strip() == "":
+        return None
+    text = value.strip()
+    if key in TEXT_FIELDS:
+        return text
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return None if key in SCORE_FIELDS else text
+
+
+def _parse_csv_rows(fields: List[str], rows: List[List[str]]) -> List[Dict[str, Any]]:
+    """将 CSV 原始行转换为公司数据字典（缺失单元格不出现在字典中）"""
+    records = []
+    for row in rows:
+        record = {}
+        for key, value in zip(fields, row):
+            value = _parse_cell(key, value)
+            if value is not None:
+                record[key] = value
+        records.append(record)
+    return records
+
+
+def iter_universe_chunks(path: str, chunk_size: int = SCREEN_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    流式读取股票池文件并按固定大小分片
+
+    CSV 分片保留为原始字符串行，单元格转换在 load_chunk 中进行（筛选时由工作进程完成），
+    其他格式的分片为公司数据字典列表。
+
+    Args:
+        path: 股票池文件路径，支持 .csv（首行为列名）、.jsonl（每行一个JSON对象）、
+            .json（{code: 数据} 或数据列表）与 .snap（snapshot.write_snapshot 生成的快照）
+        chunk_size: 每个分片的股票数
+
+    Returns:
+        分片迭代器
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            fields = next(reader, [])
+            for rows in _chunks(reader, chunk_size):
+                yield ("csv", fields, rows)
+        return
+    if ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            yield from _chunks((json.loads(line) for line in f if line.strip()), chunk_size)
+    elif ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = (dict(record, code=record.get("code", code)) for code, record in data.items())
+        yield from _chunks(data, chunk_size)
+    elif ext == ".snap":
+        from .snapshot import open_snapshot
+        snapshot = open_snapshot(path)
+        yield from _chunks((snapshot.row(i).to_dict() for i in range(len(snapshot))), chunk_size)
+    else:
+        raise ValueError(f"不支持的股票池文件格式: {ext}（支持 .csv/.jsonl/.json/.snap）")
+
+
+def load_chunk(chunk: Any) -> List[Dict[str, Any]]:
+    """
+    将 iter_universe_chunks 产出的分片转换为公司数据字典列表
+
+    Args:
+        chunk: 分片
+
+    Returns:
+        公司数据字典列表
+    """
+    if isinstance(chunk, tuple) and chunk and chunk[0] == "csv":
+        return _parse_csv_rows(chunk[1], chunk[2])
+    return chunk
+
+
+def iter_universe(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    流式读取股票池文件，逐行产出公司数据字典
+
+    Args:
+        path: 股票池文件路径（格式见 iter_universe_chunks）
+
+    Returns:
+        公司数据字典迭代器
+    """
+    for chunk in iter_universe_chunks(path):
+        yield from load_chunk(chunk)
+
+
+def _chunks(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """按固定大小切分记录流"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_chunk(chunk: Any, with_records: bool = False) -> Any:
+    """
+    对一个分片做向量化评分（在工作进程中执行）
+
+    Args:
+        chunk: iter_universe_chunks 产出的分片，或公司数据字典列表
+        with_records: 是否同时返回解析后的公司数据（供后续大模型分析使用）
+
+    Returns:
+        与 RESULT_FIELDS 对应的结果行列表；with_records 为True时返回 (公司数据列表, 结果行列表)
+    """
+    records = load_chunk(chunk)
+    batch = skills.score_batch(records_to_frame(records))
+    rows = []
+    for i, record in enumerate(records):
+        result = batch.row(i)
+        rows.append({
+            "code": record.get("code", ""),
+            "name": record.get("name", ""),
+            "industry": record.get("industry", ""),
+            "safety_score": result["safety_margin"]["score"],
+            "safety_level": result["safety_margin"]["level"],
+            "fundamental_score": result["fundamental"]["score"],
+            "fundamental_status": result["fundamental"]["status"],
+            "moat_score": result["moat"]["score"],
+            "moat_level": result["moat"]["level"],
+            "risk_score": result["risk"]["score"],
+            "risk_level": result["risk"]["risk_level"],
+            "avg_score": result["final_rating"]["avg"],
+            "final_decision": result["final_rating"]["decision"],
+            "warnings": "；".join(result["final_rating"]["all_warnings"]),
+        })
+    return (records, rows) if with_records else rows
+
+
+def _llm_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """对单只股票运行大模型分析，失败时记录错误而不中断筛选"""
+    from .github_llm import get_github_llm_analysis
+    try:
+        analysis = get_github_llm_analysis(record)
+    except Exception as e:
+        return {"llm_recommendation": f"分析失败: {e}", "llm_confidence": None, "llm_risk": None}
+    return {
+        "llm_recommendation": analysis.get("investment_recommendation"),
+        "llm_confidence": analysis.get("confidence_score"),
+        "llm_risk": analysis.get("risk_assessment"),
+    }
+
+
+class CsvResultWriter:
+    """CSV 结果写出器，每个分片写完后刷新到磁盘"""
+
+    def __init__(self, path: str, fields: List[str]):
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.DictWriter(self._file, fieldnames=fields)
+        self._writer.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """Parquet 结果写出器，每个分片写为一个 row group（需要安装 pyarrow）
+
+    列类型按 PARQUET_FIELD_TYPES 预先确定，不按分片推断：否则首个分片中全为空值的列
+    （如大模型分析失败时的 llm_confidence）会被推断为 null 类型，后续分片无法写入。
+    """
+
+    def __init__(self, path: str, fields: List[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("写出 Parquet 需要安装 pyarrow（pip install pyarrow），或改用 .csv 输出")
+        self._pa = pa
+        self._schema = pa.schema([(field, pa.type_for_alias(PARQUET_FIELD_TYPES.get(field, "string")))
+                                  for field in fields])
+        self._path = path
+        self._pq = pq
+        self._writer = None
+
+    def write(self, rows: List[Dict[str, Any]]):
+        table = self._pa.Table.from_pylist(rows, schema=self._schema)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_result_writer(path: str, fields: List[str]):
+    """
+    按扩展名创建结果写出器
+
+    Args:
+        path: 输出文件路径（.csv 或 .parquet）
+        fields: 输出列
+
+    Returns:
+        写出器（write(rows) / close()）
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return CsvResultWriter(path, fields)
+    if ext == ".parquet":
+        return ParquetResultWriter(path, fields)
+    raise ValueError(f"不支持的输出格式: {ext}（支持 .csv/.parquet）")
+
+
+def screen_universe(chunks: Iterable[Any], writer, workers: Optional[int] = None, with_llm: bool = False,
+                    llm_concurrency: int = SCREEN_LLM_CONCURRENCY, progress=None) -> Dict[str, Any]:
+    """
+    筛选股票池：分片提交到进程池评分，按完成顺序增量写出
+
+    同时排队的分片数不超过 workers * SCREEN_CHUNKS_PER_WORKER，输入只需流式读取，内存占用与股票池大小无关。
+    启用大模型分析时，评分完成的分片在主进程的线程池中逐只调用大模型（并发数为 llm_concurrency），
+    全部完成后再写出该分片。
+
+    Args:
+        chunks: 分片序列（iter_universe_chunks 的返回值，或公司数据字典列表的序列）
+        writer: 结果写出器
+        workers: 工作进程数，默认 CPU 核数；为 1 时在当前进程评分
+        with_llm: 是否运行大模型分析
+        llm_concurrency: 大模型分析并发数
+        progress: 进度回调 progress(已完成行数, 已用秒数)
+
+    Returns:
+        统计信息：rows、chunks、seconds、rows_per_second、decisions（各评级数量）
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * SCREEN_CHUNKS_PER_WORKER
+    start = time.perf_counter()
+    stats = {"rows": 0, "chunks": 0}
+    decisions = Counter()
+    llm_executor = ThreadPoolExecutor(max_workers=llm_concurrency, thread_name_prefix="screen-llm") if with_llm else None
+
+    def emit(scored):
+        if llm_executor is not None:
+            records, rows = scored
+            for row, extra in zip(rows, llm_executor.map(_llm_fields, records)):
+                row.update(extra)
+        else:
+            rows = scored
+        writer.write(rows)
+        stats["rows"] += len(rows)
+        stats["chunks"] += 1
+        decisions.update(row["final_decision"] for row in rows)
+        if progress:
+            progress(stats["rows"], time.perf_counter() - start)
+
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                emit(score_chunk(chunk, with_llm))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = set()
+                for chunk in chunks:
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            emit(future.result())
+                    pending.add(pool.submit(score_chunk, chunk, with_llm))
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        emit(future.result())
+    finally:
+        if llm_executor is not None:
+            llm_executor.shutdown(wait=False, cancel_futures=True)
+
+    seconds = time.perf_counter() - start
+    stats.update({
+        "seconds": seconds,
+        "rows_per_second": stats["rows"] / seconds if seconds > 0 else 0.0,
+        "decisions": dict(decisions),
+    })
+    return stats
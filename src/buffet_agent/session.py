@@ -0,0 +1,183 @@
+"""会话管理模块：按客户端会话ID隔离智能体，空闲超时淘汰与会话数上限"""
+import re
+import time
+import uuid
+import threading
+from typing import Optional, Dict, Callable, Tuple
+
+from .agent import ValueInvestmentAgent
+
+# 默认空闲超时（秒）、最大会话数、空闲清理的最小间隔（秒）
+SESSION_IDLE_TIMEOUT = 1800.0
+SESSION_MAX_SESSIONS = 1000
+SESSION_SWEEP_INTERVAL = 60.0
+
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class _Session:
+    """一个会话：智能体与最近访问时间"""
+    __slots__ = ("agent", "last_used")
+
+    def __init__(self, agent: ValueInvestmentAgent, now: float):
+        self.agent = agent
+        self.last_used = now
+
+
+def is_valid_session_id(session_id: str) -> bool:
+    """
+    校验客户端提供的会话ID（1-64位字母、数字、下划线或连字符）
+
+    Args:
+        session_id: 会话ID
+
+    Returns:
+        是否合法
+    """
+    return bool(_SESSION_ID_PATTERN.match(session_id))
+
+
+class SessionManager:
+    """会话管理器
+
+    每个会话持有独立的 ValueInvestmentAgent，对话与分析历史互不影响。
+    读取已有会话不加锁：会话表只在创建和淘汰时整体替换（写时复制），读取方拿到的总是完整的快照。
+    会话在进程内保存，多进程部署时需要按会话ID做粘性路由。
+    """
+
+    def __init__(self, agent_factory: Callable[[], ValueInvestmentAgent] = ValueInvestmentAgent,
+                 idle_timeout: float = SESSION_IDLE_TIMEOUT, max_sessions: int = SESSION_MAX_SESSIONS,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL, clock: Callable[[], float] = time.monotonic):
+        """
+        初始化会话管理器
+
+        Args:
+            agent_factory: 创建会话智能体的函数
+            idle_timeout: 空闲超时（秒），超时的会话被淘汰
+            max_sessions: 最大会话数，达到上限时先淘汰空闲会话，再淘汰最久未使用的会话
+            sweep_interval: 创建会话时清理空闲会话的最小间隔（秒）
+            clock: 时钟函数
+        """
+        self.agent_factory = agent_factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._sessions: Dict[str, _Session] = {}
+        self._write_lock = threading.Lock()
+        self._last_sweep = clock()
+        self._evictions = 0
+
+    def get(self, session_id: str) -> Optional[ValueInvestmentAgent]:
+        """
+        获取已有会话的智能体（不加锁）
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            智能体，会话不存在或已超时返回None
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        now = self._clock()
+        if now - session.last_used > self.idle_timeout:
+            return None
+        session.last_used = now
+        return session.agent
+
+    def get_or_create(self, session_id: Optional[str] = None) -> Tuple[str, ValueInvestmentAgent]:
+        """
+        获取会话智能体，会话不存在或已超时时以新分配的ID新建
+
+        客户端提供的会话ID未知或已超时（会话被淘汰，或多进程部署时请求落到了其他进程）时不沿用该ID，
+        调用方比较返回的ID与请求的ID即可得知原会话的历史已丢失
+
+        Args:
+            session_id: 会话ID，None表示新建会话并分配ID
+
+        Returns:
+            (会话ID, 智能体)
+        """
+        if session_id is not None:
+            agent = self.get(session_id)
+            if agent is not None:
+                return session_id, agent
+
+        with self._write_lock:
+            now = self._clock()
+            session = self._sessions.get(session_id) if session_id is not None else None
+            if session is not None and now - session.last_used <= self.idle_timeout:
+                session.last_used = now
+                return session_id, session.agent
+
+            sessions = dict(self._sessions)
+            if session_id is not None:
+                sessions.pop(session_id, None)
+            session_id = uuid.uuid4().hex
+            if now - self._last_sweep >= self.sweep_interval or len(sessions) >= self.max_sessions:
+                self._drop_idle(sessions, now)
+                self._last_sweep = now
+            while len(sessions) >= self.max_sessions:
+                oldest = min(sessions, key=lambda sid: sessions[sid].last_used)
+                del sessions[oldest]
+                self._evictions += 1
+
+            session = _Session(self.agent_factory(), now)
+            sessions[session_id] = session
+            self._sessions = sessions
+            return session_id, session.agent
+
+    def _drop_idle(self, sessions: Dict[str, _Session], now: float):
+        """从会话表副本中移除超时会话，调用方需持有写锁"""
+        expired = [sid for sid, session in sessions.items() if now - session.last_used > self.idle_timeout]
+        for sid in expired:
+            del sessions[sid]
+        self._evictions += len(expired)
+
+    def evict_idle(self) -> int:
+        """
+        立即淘汰所有超时会话
+
+        Returns:
+            淘汰的会话数
+        """
+        with self._write_lock:
+            now = self._clock()
+            sessions = dict(self._sessions)
+            before = len(sessions)
+            self._drop_idle(sessions, now)
+            self._last_sweep = now
+            self._sessions = sessions
+            return before - len(sessions)
+
+    def remove(self, session_id: str) -> bool:
+        """
+        结束会话
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            会话是否存在
+        """
+        with self._write_lock:
+            if session_id not in self._sessions:
+                return False
+            sessions = dict(self._sessions)
+            del sessions[session_id]
+            self._sessions = sessions
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取会话数与淘汰计数
+
+        Returns:
+            统计信息
+        """
+        return {"sessions": len(self._sessions), "evictions": self._evictions}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
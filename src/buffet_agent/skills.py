@@ -157,4 +157,14 @@ def final_rating(results):
         "avg": avg,
         "decision": final,
         "all_warnings": all_warn
-    }
\ No newline at end of file
+    }
+
+def score_batch(frame):
+    """
+    批量评分：对列式数据（列名 -> 等长序列）向量化计算四大技能与综合评级
+
+    分数与档位整列返回，理由/警告列表仅在调用 row(i) 时按行生成，
+    结果与逐条调用 safety_margin/fundamental/moat/risk/final_rating 完全一致。
+    """
+    from .batch import score_frame
+    return score_frame(frame)
@@ -0,0 +1,267 @@
+"""股票池快照模块：列式存储的单文件快照，加载时内存映射，按行零拷贝读取、按列直接供批量评分使用
+
+文件格式（小端序）:
+    8 字节魔数 | 8 字节头部长度 | JSON 头部 | 各列数据（按 64 字节对齐）
+头部记录行数与每列的名称、类型（int/float/bool/str）、NumPy dtype 和相对数据区起点的偏移量。
+数值列以 float64 存储、NaN 表示缺失（无缺失的整数与布尔列保持 int64/bool）；
+字符串列以定长 UTF-32 存储，空字符串表示缺失。
+"""
+import os
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+from typing import Optional, Dict, List, Any, Iterator
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"BFSNAP01"
+SNAPSHOT_ALIGNMENT = 64
+
+_HEADER_LENGTH = struct.Struct("<Q")
+
+
+def _data_start(header_length: int) -> int:
+    """数据区起点：魔数、头部长度与头部之后的第一个对齐位置"""
+    end = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size + header_length
+    return end + (-end % SNAPSHOT_ALIGNMENT)
+
+
+def _column_kind(values: List[Any]) -> str:
+    """推断列类型：全部为布尔值为 bool，全部为整数为 int，全部为数值为 float，否则为 str"""
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return "bool"
+    if any(isinstance(value, bool) or not isinstance(value, (int, float)) for value in present):
+        return "str"
+    if all(isinstance(value, int) for value in present):
+        return "int"
+    return "float"
+
+
+def _column_array(values: List[Any], kind: str) -> np.ndarray:
+    """将一列值转换为存储用的数组：无缺失的 int/bool 列保持原类型，有缺失时以 float64 存储，NaN 表示缺失"""
+    if kind == "str":
+        return np.array(["" if value is None else str(value) for value in values], dtype=str)
+    if kind in ("int", "bool") and None not in values:
+        return np.array(values, dtype="<i8" if kind == "int" else "?")
+    return np.array([np.nan if value is None else float(value) for value in values], dtype="<f8")
+
+
+def write_snapshot(data: Mapping, path: str):
+    """
+    将股票数据写入列式快照文件（先写临时文件再原子替换）
+
+    Args:
+        data: 股票数据字典 {code: stock_data}
+        path: 快照文件路径
+    """
+    codes = list(data)
+    records = [data[code] for code in codes]
+    keys = dict.fromkeys(["code"])
+    for record in records:
+        keys.update(dict.fromkeys(record))
+
+    columns = []
+    for key in keys:
+        if key == "code":
+            values = [record.get("code", code) for code, record in zip(codes, records)]
+        else:
+            values = [record.get(key) for record in records]
+        kind = _column_kind(values)
+        columns.append((key, kind, _column_array(values, kind)))
+
+    # 列偏移量相对于数据区起点（头部之后按 SNAPSHOT_ALIGNMENT 对齐）
+    specs = []
+    offset = 0
+    for key, kind, array in columns:
+        offset += -offset % SNAPSHOT_ALIGNMENT
+        specs.append({"name": key, "kind": kind, "dtype": array.dtype.str, "offset": offset})
+        offset += array.nbytes
+    header_bytes = json.dumps({"rows": len(codes), "columns": specs}, ensure_ascii=False).encode("utf-8")
+    base = _data_start(len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        for spec, (_, _, array) in zip(specs, columns):
+            f.write(b"\0" * (base + spec["offset"] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+class _IntColumn:
+    """含缺失值的整数列：按 float64 参与向量计算，按单元格读取时还原为 int（缺失为 None）"""
+    __slots__ = ("values",)
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype, copy=False)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, i: int) -> Optional[int]:
+        value = self.values[i]
+        return None if value != value else int(value)
+
+
+class SnapshotRow(Mapping):
+    """快照中的一行：只保存行号，读取字段时直接访问内存映射的列，不复制整行"""
+    __slots__ = ("_snapshot", "_index")
+
+    def __init__(self, snapshot: "Snapshot", index: int):
+        self._snapshot = snapshot
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        kind = self._snapshot.kinds.get(key)
+        if kind is None:
+            raise KeyError(key)
+        value = self._snapshot.columns[key][self._index]
+        if kind == "str":
+            if not value:
+                raise KeyError(key)
+            return str(value)
+        if value != value:
+            raise KeyError(key)
+        if kind == "bool":
+            return bool(value)
+        if kind == "int":
+            return int(value)
+        return float(value)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._snapshot.kinds:
+            if key in self:
+                yield key
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """复制为普通字典"""
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"SnapshotRow({self.to_dict()!r})"
+
+
+class Snapshot(Mapping):
+    """内存映射的股票池快照
+
+    作为 {code: 行} 的只读映射使用，与 load_sample_data 返回的字典接口一致；
+    columns 为列名到只读 NumPy 数组的映射，frame 可直接传给 batch.score_frame。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开快照文件并映射各列（不读取列数据）
+
+        Args:
+            path: 快照文件路径
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            self._file.close()
+            raise ValueError(f"无效的快照文件: {path}")
+        if self._mmap[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"无效的快照文件: {path}")
+        start = len(SNAPSHOT_MAGIC)
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._mmap, start)
+        start += _HEADER_LENGTH.size
+        header = json.loads(bytes(self._mmap[start:start + header_length]).decode("utf-8"))
+        base = _data_start(header_length)
+
+        self.rows = header["rows"]
+        self.kinds: Dict[str, str] = {}
+        self.columns: Dict[str, np.ndarray] = {}
+        for spec in header["columns"]:
+            self.kinds[spec["name"]] = spec["kind"]
+            self.columns[spec["name"]] = np.frombuffer(self._mmap, dtype=np.dtype(spec["dtype"]),
+                                                       count=self.rows, offset=base + spec["offset"])
+        self._index: Optional[Dict[str, int]] = None
+
+    @property
+    def frame(self) -> Dict[str, Any]:
+        """
+        供 batch.score_frame 使用的列式数据：与 columns 共享内存，
+        含缺失值的整数列按单元格读取时还原为 int，使理由文案与逐条评分一致
+        """
+        return {key: _IntColumn(values) if self.kinds[key] == "int" and values.dtype.kind == "f" else values
+                for key, values in self.columns.items()}
+
+    @property
+    def index(self) -> Dict[str, int]:
+        """股票代码到行号的索引（首次按代码查找时构建）"""
+        if self._index is None:
+            self._index = {code: i for i, code in enumerate(self.columns["code"].tolist())}
+        return self._index
+
+    def row(self, i: int) -> SnapshotRow:
+        """
+        按行号获取一行
+
+        Args:
+            i: 行号
+
+        Returns:
+            SnapshotRow
+        """
+        if not -self.rows <= i < self.rows:
+            raise IndexError(i)
+        return SnapshotRow(self, i % self.rows)
+
+    def __getitem__(self, code: str) -> SnapshotRow:
+        return SnapshotRow(self, self.index[code])
+
+    def __contains__(self, code: object) -> bool:
+        return code in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def close(self):
+        """释放内存映射与文件句柄（之后不能再访问列数据）"""
+        self.columns = {}
+        self._file.close()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 仍有外部引用的列数组时，映射在这些数组释放后由垃圾回收关闭
+            pass
+
+    def __repr__(self) -> str:
+        return f"Snapshot({self.path!r}, rows={self.rows}, columns={len(self.kinds)})"
+
+
+def open_snapshot(path: str) -> Snapshot:
+    """
+    打开股票池快照
+
+    Args:
+        path: 快照文件路径
+
+    Returns:
+        Snapshot
+    """
+    return Snapshot(path)
@@ -0,0 +1,126 @@
+"""股票列表模块：按数据版本预先序列化股票列表，附带ETag与gzip压缩结果"""
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
+
+# 缓存的查询结果数（不同筛选/分页组合）、gzip压缩级别
+LISTING_CACHE_SIZE = 256
+LISTING_GZIP_LEVEL = 6
+
+
+class RenderedListing:
+    """一次查询的序列化结果：原始JSON、gzip压缩后的JSON，以及两种表示各自的强ETag"""
+    __slots__ = ("body", "gzipped", "etag", "gzip_etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=LISTING_GZIP_LEVEL, mtime=0)
+        self.etag = hashlib.sha1(body).hexdigest()
+        # 强校验器须随内容编码不同而不同
+        self.gzip_etag = f"{self.etag}-gzip"
+
+
+def stock_market(code: str) -> str:
+    """
+    由股票代码后缀得到市场（如 600519.SH -> SH），无后缀时返回空字符串
+
+    Args:
+        code: 股票代码
+
+    Returns:
+        市场代码（大写）
+    """
+    _, dot, suffix = code.rpartition('.')
+    return suffix.upper() if dot else ''
+
+
+class StockListing:
+    """股票列表
+
+    数据只在 load() 时变化：每次加载递增版本号并清空缓存，
+    同一版本下每种筛选/分页组合只序列化与压缩一次。
+    """
+
+    def __init__(self, data: Optional[Dict[str, Dict]] = None, cache_size: int = LISTING_CACHE_SIZE):
+        """
+        初始化股票列表
+
+        Args:
+            data: 股票数据字典 {code: stock_data}
+            cache_size: 缓存的查询结果数
+        """
+        self.cache_size = cache_size
+        self.version = 0
+        self._stocks: List[Dict] = []
+        self._cache: "OrderedDict[Tuple, RenderedListing]" = OrderedDict()
+        self._lock = threading.Lock()
+        if data is not None:
+            self.load(data)
+
+    def load(self, data: Dict[str, Dict]):
+        """
+        加载（或重新加载）股票数据，使旧版本的缓存失效
+
+        Args:
+            data: 股票数据字典 {code: stock_data}
+        """
+        stocks = [{
+            "code": code,
+            "name": item.get('name', ''),
+            "industry": item.get('industry', ''),
+            "market": stock_market(code)
+        } for code, item in data.items()]
+        with self._lock:
+            self._stocks = stocks
+            self.version += 1
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._stocks)
+
+    def render(self, market: Optional[str] = None, industry: Optional[str] = None,
+               page: Optional[int] = None, page_size: Optional[int] = None) -> RenderedListing:
+        """
+        获取筛选、分页后的序列化结果
+
+        Args:
+            market: 市场筛选（如 SH、SZ，不区分大小写）
+            industry: 行业筛选（精确匹配）
+            page: 页码（从1开始），为None时不分页
+            page_size: 每页数量，分页时必填
+
+        Returns:
+            RenderedListing
+        """
+        market = market.upper() if market else None
+        key = (market, industry or None, page, page_size)
+        with self._lock:
+            rendered = self._cache.get(key)
+            if rendered is not None:
+                self._cache.move_to_end(key)
+                return rendered
+            stocks = self._stocks
+            version = self.version
+
+        # 序列化与压缩在锁外进行；并发的相同查询最多重复计算一次
+        selected = [stock for stock in stocks
+                    if (market is None or stock["market"] == market)
+                    and (not industry or stock["industry"] == industry)]
+        payload = {"success": True, "total": len(selected)}
+        if page is not None:
+            payload["page"] = page
+            payload["page_size"] = page_size
+            selected = selected[(page - 1) * page_size:page * page_size]
+        payload["data"] = selected
+        rendered = RenderedListing(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+        with self._lock:
+            # 计算期间数据已重新加载时不写入缓存
+            if version == self.version:
+                self._cache[key] = rendered
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return rendered
@@ -1,4 +1,8 @@
-from src.buffet_agent.agent import run_analysis
+import asyncio
+import time
+
+from src.buffet_agent import agent as agent_module
+from src.buffet_agent.agent import run_analysis, ValueInvestmentAgent
 from src.buffet_agent.data import load_sample_data
 
 def test_agent_full_flow():
@@ -7,4 +11,54 @@ def test_agent_full_flow():
     # 适应新的返回格式
     assert report["traditional_analysis"]["avg_score"] >= 80
     assert "强烈推荐" in report["traditional_analysis"]["final_decision"]
-    print("✅ Agent 全流程测试通过")
\ No newline at end of file
+    print("✅ Agent 全流程测试通过")
+
+def _delayed(func, delay):
+    def wrapper(*args, **kwargs):
+        time.sleep(delay)
+        return func(*args, **kwargs)
+    return wrapper
+
+def test_arun_analysis_matches_run_analysis():
+    data = load_sample_data()["000858.SZ"]
+    sync_report = ValueInvestmentAgent().run_analysis(data, "护城河分析")
+    async_report = asyncio.run(ValueInvestmentAgent().arun_analysis(data, "护城河分析"))
+    for key in ("analysis_time", "analysis_id"):
+        sync_report.pop(key)
+        async_report.pop(key)
+    assert async_report == sync_report
+    print("✅ 异步分析结果一致性测试通过")
+
+def test_arun_analysis_runs_llm_stages_concurrently():
+    data = load_sample_data()["600519.SH"]
+    originals = (agent_module.get_llm_analysis, agent_module.get_github_llm_analysis)
+    agent_module.get_llm_analysis = _delayed(originals[0], 0.2)
+    agent_module.get_github_llm_analysis = _delayed(originals[1], 0.2)
+    try:
+        start = time.perf_counter()
+        report = ValueInvestmentAgent().run_analysis_concurrent(data)
+        elapsed = time.perf_counter() - start
+    finally:
+        agent_module.get_llm_analysis, agent_module.get_github_llm_analysis = originals
+    assert elapsed < 0.35
+    assert "degraded_stages" not in report
+    print(f"✅ 大模型阶段并发测试通过（{elapsed * 1000:.0f}ms）")
+
+def test_arun_analysis_degrades_on_timeout():
+    data = load_sample_data()["600519.SH"]
+    agent = ValueInvestmentAgent()
+    original = agent_module.get_github_llm_analysis
+    agent_module.get_github_llm_analysis = _delayed(original, 1.0)
+    try:
+        start = time.perf_counter()
+        report = agent.run_analysis_concurrent(data, stage_timeouts={"github_deep_analysis": 0.1})
+        elapsed = time.perf_counter() - start
+    finally:
+        agent_module.get_github_llm_analysis = original
+    assert elapsed < 0.5
+    assert report["degraded_stages"] == ["github_deep_analysis"]
+    assert report["github_deep_analysis"]["investment_recommendation"] == "中性"
+    assert report["basic_llm_analysis"] == agent_module.get_llm_analysis(data)
+    assert report["traditional_analysis"]["avg_score"] >= 80
+    assert "knowledge_enhanced" in report
+    print("✅ 大模型阶段超时降级测试通过")
@@ -0,0 +1,86 @@
+"""批量分析接口测试"""
+import json
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api
+
+
+def _lines(response):
+    # 关闭响应以触发 call_on_close，释放并发名额
+    with response:
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+
+def _status(response):
+    with response:
+        return response.status_code
+
+
+def test_batch_analyze_streams_ndjson():
+    """测试批量接口逐行返回结果，单只股票失败不影响整体"""
+    client = api.app.test_client()
+    response = client.post('/api/analyze/batch', json={"codes": ["600519.SH", "000000.SZ", "000858.SZ"]})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = _lines(response)
+    items = {line["code"]: line for line in lines if "code" in line}
+    assert set(items) == {"600519.SH", "000000.SZ", "000858.SZ"}
+    assert items["600519.SH"]["success"] is True
+    assert items["600519.SH"]["data"]["traditional_analysis"]["avg_score"] >= 80
+    assert items["000000.SZ"] == {"code": "000000.SZ", "success": False, "error": "找不到股票数据"}
+    assert lines[-1] == {"done": True, "total": 3, "succeeded": 2, "failed": 1}
+    print("✅ 批量分析NDJSON流式返回测试通过")
+
+
+def test_batch_analyze_item_error_does_not_abort():
+    """测试单条分析异常只影响该条目"""
+    client = api.app.test_client()
+    original = api.run_analysis
+
+    def flaky_analysis(stock_data, user_question=None):
+        if stock_data["code"] == "600000.SH":
+            raise ValueError("模拟分析异常")
+        return original(stock_data, user_question)
+
+    api.run_analysis = flaky_analysis
+    try:
+        lines = _lines(client.post('/api/analyze/batch', json={"codes": ["600000.SH", "600519.SH"]}))
+    finally:
+        api.run_analysis = original
+    items = {line["code"]: line for line in lines if "code" in line}
+    assert items["600000.SH"] == {"code": "600000.SH", "success": False, "error": "模拟分析异常"}
+    assert items["600519.SH"]["success"] is True
+    assert lines[-1]["failed"] == 1
+    print("✅ 批量分析单条错误隔离测试通过")
+
+
+def test_batch_analyze_limits():
+    """测试参数校验与并发请求数限制"""
+    client = api.app.test_client()
+    assert _status(client.post('/api/analyze/batch', json={})) == 400
+    too_many = ["600519.SH"] * (api.BATCH_MAX_CODES + 1)
+    assert _status(client.post('/api/analyze/batch', json={"codes": too_many})) == 400
+
+    for _ in range(api.BATCH_MAX_CONCURRENT_REQUESTS):
+        assert api.batch_slots.acquire(timeout=5)
+    try:
+        assert _status(client.post('/api/analyze/batch', json={"codes": ["600519.SH"]})) == 429
+    finally:
+        for _ in range(api.BATCH_MAX_CONCURRENT_REQUESTS):
+            api.batch_slots.release()
+
+    # 请求结束后并发名额被释放
+    for _ in range(api.BATCH_MAX_CONCURRENT_REQUESTS + 1):
+        assert _status(client.post('/api/analyze/batch', json={"codes": ["600519.SH"]})) == 200
+    print("✅ 批量分析限流测试通过")
+
+
+if __name__ == "__main__":
+    test_batch_analyze_streams_ndjson()
+    test_batch_analyze_item_error_does_not_abort()
+    test_batch_analyze_limits()
+    print("\n🎉 所有批量分析接口测试通过！")
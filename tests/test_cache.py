@@ -0,0 +1,127 @@
+"""行情缓存模块测试"""
+import threading
+import time
+
+from src.buffet_agent import data as data_module
+from src.buffet_agent.cache import QuoteCache
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_and_lru_eviction():
+    """测试新鲜期命中与LRU淘汰"""
+    clock = _FakeClock()
+    cache = QuoteCache(ttl=5, max_size=2, stale_ttl=0, clock=clock)
+    calls = []
+
+    def loader(value):
+        return lambda: calls.append(value) or value
+
+    assert cache.get_or_load(("600519.SH", "sina"), loader("a")) == "a"
+    assert cache.get_or_load(("600519.SH", "sina"), loader("b")) == "a"
+    clock.now = 6
+    assert cache.get_or_load(("600519.SH", "sina"), loader("c")) == "c"
+    cache.put("k2", "v2")
+    cache.get_or_load(("600519.SH", "sina"), loader("unused"))
+    cache.put("k3", "v3")
+    assert cache.get("k2") is None
+    assert cache.get(("600519.SH", "sina")) == "c"
+
+    stats = cache.stats()
+    assert calls == ["a", "c"]
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+    assert stats["hits"] >= 2
+    print("✅ 缓存TTL与LRU测试通过")
+
+
+def test_stale_while_revalidate():
+    """测试过期后返回旧值并只触发一次后台刷新"""
+    clock = _FakeClock()
+    cache = QuoteCache(ttl=5, stale_ttl=60, clock=clock)
+    cache.put("600519.SH", {"pe": 15})
+    clock.now = 10
+
+    release = threading.Event()
+    refreshed = []
+
+    def slow_loader():
+        release.wait(2)
+        refreshed.append(1)
+        return {"pe": 16}
+
+    assert cache.get_or_load("600519.SH", slow_loader) == {"pe": 15}
+    assert cache.get_or_load("600519.SH", slow_loader) == {"pe": 15}
+    release.set()
+    for _ in range(100):
+        if cache.get("600519.SH"):
+            break
+        time.sleep(0.01)
+    assert cache.get("600519.SH") == {"pe": 16}
+    assert refreshed == [1]
+    assert cache.stats()["refreshes"] == 1
+    assert cache.stats()["stale_hits"] == 2
+    print("✅ 缓存过期后台刷新测试通过")
+
+
+def test_concurrent_misses_are_coalesced():
+    """测试同一键的并发未命中只发起一次上游请求"""
+    cache = QuoteCache(ttl=5)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"code": "600519.SH"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("600519.SH", loader)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"code": "600519.SH"}] * 8
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 7
+    print("✅ 缓存并发合并测试通过")
+
+
+def test_load_data_uses_quote_cache():
+    """测试 load_data 实时数据经过行情缓存"""
+    calls = []
+    original = data_module.get_real_time_data
+
+    def fake_real_time_data(stock_code, hedged=False):
+        calls.append(stock_code)
+        return {"code": stock_code, "name": "缓存测试"}
+
+    data_module.get_real_time_data = fake_real_time_data
+    data_module.quote_cache.invalidate()
+    try:
+        first = data_module.load_data("600519.SH", use_real_time=True)
+        first["name"] = "被调用方修改"
+        second = data_module.load_data("600519.SH", use_real_time=True)
+        data_module.load_data("600519.SH", use_real_time=True, use_cache=False)
+        assert calls == ["600519.SH", "600519.SH"]
+        assert second["name"] == "缓存测试"
+        print("✅ load_data 行情缓存测试通过")
+    finally:
+        data_module.get_real_time_data = original
+        data_module.quote_cache.invalidate()
+
+
+if __name__ == "__main__":
+    test_ttl_and_lru_eviction()
+    test_stale_while_revalidate()
+    test_concurrent_misses_are_coalesced()
+    test_load_data_uses_quote_cache()
+    print("\n🎉 所有行情缓存测试通过！")
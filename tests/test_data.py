@@ -1,4 +1,10 @@
 """数据获取模块测试"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.buffet_agent import data as data_module
 from src.buffet_agent.data import get_real_time_data, load_data, load_sample_data, get_sina_finance_data, get_xueqiu_data, get_xiaohongshu_data
 
 
@@ -113,6 +119,199 @@ def test_load_data_fallback():
     print("✅ 数据加载回退机制测试通过")
 
 
+class _StubQuoteHandler(BaseHTTPRequestHandler):
+    """本地桩服务：/v5 模拟雪球（慢速失败），/list= 模拟新浪"""
+    protocol_version = "HTTP/1.1"
+    xueqiu_delay = 0.2
+    connections = 0
+    sina_requests = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _StubQuoteHandler.lock:
+            _StubQuoteHandler.connections += 1
+
+    def do_GET(self):
+        if self.path.startswith("/v5/"):
+            time.sleep(self.xueqiu_delay)
+            self._reply(503, json.dumps({"error": "busy"}))
+        else:
+            with _StubQuoteHandler.lock:
+                _StubQuoteHandler.sina_requests += 1
+            codes = self.path.split("=", 1)[-1].split(",")
+            # 以 9 结尾的代码模拟停牌/无效代码，返回空字段
+            lines = [f'var hq_str_{code}="{"" if code.endswith("9") else "桩数据,1,2,3,4"}";' for code in codes]
+            self._reply(200, "\n".join(lines) + "\n")
+
+    def _reply(self, status, body):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+def test_real_time_data_hedged_with_stub_server():
+    """测试连接池复用与并发模式在本地桩服务上的延迟"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubQuoteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    saved = (dict(data_module.SOURCE_URLS), dict(data_module.SOURCE_BUDGETS))
+    data_module.SOURCE_URLS.update(xueqiu=base_url, sina=base_url)
+    data_module.SOURCE_BUDGETS.update(xueqiu=0.05, sina=0.5, xiaohongshu=0.5)
+    data_module.close_sessions()
+    try:
+        codes = [f"60{i:04d}.SH" for i in range(1, 9)]
+        latencies = {}
+        for hedged in (False, True):
+            samples = []
+            for code in codes:
+                start = time.perf_counter()
+                result = get_real_time_data(code, hedged=hedged)
+                samples.append(time.perf_counter() - start)
+                assert result["code"] == code
+                assert result["name"] == "桩数据"
+            latencies[hedged] = samples
+            print(f"   {'并发' if hedged else '串行'}: p50={_percentile(samples, 50) * 1000:.1f}ms"
+                  f" p99={_percentile(samples, 99) * 1000:.1f}ms")
+        assert _percentile(latencies[True], 99) < _percentile(latencies[False], 50)
+        # 新浪请求复用保活连接，连接数远小于请求数
+        assert _StubQuoteHandler.connections < len(codes) * 3
+        print("✅ 连接池与并发数据源测试通过")
+    finally:
+        data_module.SOURCE_URLS.update(saved[0])
+        data_module.SOURCE_BUDGETS.update(saved[1])
+        data_module.close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
+class _SlowXueqiuHandler(_StubQuoteHandler):
+    """雪球接口远超延迟预算才返回"""
+    xueqiu_delay = 3
+
+
+def test_hedged_requests_release_workers_within_budget():
+    """测试超出预算的慢数据源请求按预算超时，不会长时间占满共享线程池"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowXueqiuHandler, bind_and_activate=False)
+    # 突发连接较多，加大监听队列
+    server.request_queue_size = 128
+    server.server_bind()
+    server.server_activate()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    saved = (dict(data_module.SOURCE_URLS), dict(data_module.SOURCE_BUDGETS))
+    data_module.SOURCE_URLS.update(xueqiu=base_url, sina=base_url)
+    data_module.SOURCE_BUDGETS.update(xueqiu=0.1, sina=1.0, xiaohongshu=1.0)
+    data_module.close_sessions()
+    try:
+        # 并发调用数多于线程池大小：慢速雪球请求若占用线程直到 SOURCE_TIMEOUTS，新浪请求会排队错过预算
+        codes = [f"60{i:04d}.SH" for i in range(1, 100) if i % 10 != 9][:data_module.SESSION_POOL_SIZE * 2]
+        results = {}
+
+        def worker(code):
+            results[code] = get_real_time_data(code, hedged=True)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(code,)) for code in codes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        assert all(results[code] and results[code]["name"] == "桩数据" for code in codes)
+        assert elapsed < _SlowXueqiuHandler.xueqiu_delay
+        print(f"✅ 并发请求按预算释放线程测试通过（{len(codes)} 次调用耗时 {elapsed * 1000:.0f}ms）")
+    finally:
+        data_module.SOURCE_URLS.update(saved[0])
+        data_module.SOURCE_BUDGETS.update(saved[1])
+        data_module.close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
+class _SlowValidXueqiuHandler(_StubQuoteHandler):
+    """雪球接口在预算内返回有效数据，但比新浪慢"""
+
+    def do_GET(self):
+        if self.path.startswith("/v5/"):
+            time.sleep(0.5)
+            try:
+                self._reply(200, json.dumps({"data": {"name": "雪球桩"}}))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        else:
+            super().do_GET()
+
+
+def test_hedged_takes_first_valid_response():
+    """测试并发模式采用最先返回的有效结果，不等待仍在预算内的高优先级数据源"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowValidXueqiuHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    saved = (dict(data_module.SOURCE_URLS), dict(data_module.SOURCE_BUDGETS))
+    data_module.SOURCE_URLS.update(xueqiu=base_url, sina=base_url)
+    data_module.SOURCE_BUDGETS.update(xueqiu=1.5, sina=1.0, xiaohongshu=0.5)
+    data_module.close_sessions()
+    try:
+        start = time.perf_counter()
+        result = get_real_time_data("600001.SH", hedged=True)
+        elapsed = time.perf_counter() - start
+        assert result["name"] == "桩数据" and elapsed < 0.4
+        # 雪球未出结果、新浪失败时才采用兜底的模拟数据源
+        assert get_real_time_data("600009.SH", hedged=True)["source"] == "xueqiu"
+        data_module.SOURCE_BUDGETS.update(xueqiu=0.1)
+        assert get_real_time_data("600009.SH", hedged=True)["source"] == "xiaohongshu"
+        print(f"✅ 并发模式采用最先返回的结果测试通过（{elapsed * 1000:.0f}ms）")
+    finally:
+        data_module.SOURCE_URLS.update(saved[0])
+        data_module.SOURCE_BUDGETS.update(saved[1])
+        data_module.close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
+def test_sina_finance_data_bulk_with_stub_server():
+    """测试新浪财经批量接口：合并请求、逐行解析、load_data 批量加载"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubQuoteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved = dict(data_module.SOURCE_URLS)
+    data_module.SOURCE_URLS["sina"] = f"http://127.0.0.1:{server.server_address[1]}"
+    data_module.close_sessions()
+    try:
+        codes = [f"{600000 + i}.SH" if i % 2 else f"{i:06d}.SZ" for i in range(300)]
+        _StubQuoteHandler.sina_requests = 0
+        quotes = data_module.get_sina_finance_data_bulk(codes)
+        assert _StubQuoteHandler.sina_requests == 3
+        assert set(quotes) == {code for code in codes if not code[5] == "9"}
+        assert quotes["600001.SH"] == get_sina_finance_data("600001.SH")
+
+        watchlist = ["600519.SH", "600001.SH", "600009.SH", "invalid_code"]
+        _StubQuoteHandler.sina_requests = 0
+        loaded = load_data(watchlist, use_real_time=True)
+        assert _StubQuoteHandler.sina_requests == 1
+        assert list(loaded) == ["600519.SH", "600001.SH"]
+        assert loaded["600001.SH"]["name"] == "桩数据"
+        # 实时数据缺失的代码回退到示例数据
+        assert loaded["600519.SH"] == load_sample_data()["600519.SH"]
+        assert list(load_data(watchlist)) == ["600519.SH"]
+        print("✅ 新浪财经批量接口测试通过")
+    finally:
+        data_module.SOURCE_URLS.update(saved)
+        data_module.close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
 if __name__ == "__main__":
     test_load_sample_data()
     test_get_sina_finance_data()
@@ -122,4 +321,8 @@ if __name__ == "__main__":
     test_get_real_time_data_invalid()
     test_load_data_with_real_time()
     test_load_data_fallback()
+    test_real_time_data_hedged_with_stub_server()
+    test_hedged_requests_release_workers_within_budget()
+    test_hedged_takes_first_valid_response()
+    test_sina_finance_data_bulk_with_stub_server()
     print("\n🎉 所有数据获取测试通过！")
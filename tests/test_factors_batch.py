@@ -0,0 +1,115 @@
+"""Fundamental-Q-Agent 批量因子评分与排雷一致性测试"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Fundamental-Q-Agent"))
+
+from config import Config
+from factors import Factors, FACTOR_BUCKETS, FACTOR_COLUMNS, MINEFIELD_RULES
+
+
+def _random_companies(size, seed=0):
+    """随机因子与业务数据，混入恰好落在分档阈值上的值、负值与零"""
+    rng = np.random.default_rng(seed)
+    factor_rows = []
+    business_rows = []
+    for _ in range(size):
+        factors = {}
+        for factor, (_, thresholds) in FACTOR_BUCKETS.items():
+            if rng.random() < 0.4:
+                value = float(rng.choice(thresholds + (0, -1)))
+            else:
+                value = round(float(rng.uniform(-10, thresholds[-1] * 1.5)), 2)
+            factors[factor] = int(value) if value.is_integer() and rng.random() < 0.5 else value
+        factors['pb'] = 2.0
+        factor_rows.append(factors)
+        business_rows.append({
+            'loss_years': int(rng.integers(0, 4)),
+            'cash_flow_deterioration_years': int(rng.integers(0, 4)),
+            'high_pledge': bool(rng.random() < 0.2),
+        })
+    # 资产负债率恰好等于破产阈值
+    factor_rows[0]['debt_ratio'] = Config.BANKRUPTCY_DEBT_RATIO
+    factor_rows[1]['debt_ratio'] = Config.BANKRUPTCY_DEBT_RATIO + 0.5
+    return factor_rows, business_rows
+
+
+def _columns(rows, names):
+    return {name: [row[name] for row in rows] for name in names}
+
+
+def test_score_factors_batch_matches_scalar():
+    """测试批量因子评分与 score_factors 逐行结果完全一致"""
+    factor_rows, _ = _random_companies(2000)
+    batch = Factors.score_factors_batch(_columns(factor_rows, FACTOR_COLUMNS))
+    for i, row in enumerate(factor_rows):
+        assert Factors.score_factors_row(batch, i) == Factors.score_factors(row)
+
+    # 二维矩阵输入
+    matrix = np.array([[row[name] for name in FACTOR_COLUMNS] for row in factor_rows], dtype=float)
+    from_matrix = Factors.score_factors_batch(matrix)
+    assert np.array_equal(from_matrix['total_score'], batch['total_score'])
+    assert list(from_matrix['grade']) == list(batch['grade'])
+    print("✅ 批量因子评分一致性测试通过")
+
+
+def test_check_minefields_batch_matches_scalar():
+    """测试批量排雷掩码与 check_minefields 一致，并记录全部未通过的规则"""
+    factor_rows, business_rows = _random_companies(2000, seed=1)
+    passed, mask = Factors.check_minefields_batch(
+        _columns(factor_rows, FACTOR_COLUMNS),
+        _columns(business_rows, ('loss_years', 'cash_flow_deterioration_years', 'high_pledge'))
+    )
+    multi_failures = 0
+    for i, (factors, business) in enumerate(zip(factor_rows, business_rows)):
+        expected = Factors.check_minefields(factors, business)
+        assert bool(passed[i]) == expected[0]
+        assert Factors.minefield_result(mask[i], factors, business) == expected
+
+        # 每一位单独对应一条规则：只保留该规则的输入时，标量检查应在该规则处失败
+        for bit, rule in enumerate(MINEFIELD_RULES):
+            only_factor = {'debt_ratio': factors['debt_ratio']} if rule[1] == 'factor' else {}
+            only_business = {rule[2]: business[rule[2]]} if rule[1] == 'business' else {}
+            assert bool(mask[i] >> bit & 1) == (not Factors.check_minefields(only_factor, only_business)[0])
+        multi_failures += len(Factors.minefield_failures(mask[i])) > 1
+    assert multi_failures > 0
+    print("✅ 批量排雷一致性测试通过")
+
+
+def test_batch_defaults_for_missing_columns():
+    """测试缺失的列按 dict.get 的缺省值处理，NaN 与标量评分一致"""
+    batch = Factors.score_factors_batch({'roe': [25, 3]})
+    assert Factors.score_factors_row(batch, 0) == Factors.score_factors({'roe': 25})
+    passed, mask = Factors.check_minefields_batch({'debt_ratio': [90, 10]}, {})
+    assert list(passed) == [False, True] and Factors.minefield_failures(mask[0]) == ['high_debt']
+
+    # NaN 与标量路径一致：与任何阈值比较都不成立，落在最低档
+    nan_rows = [dict({name: 20.0 for name in FACTOR_COLUMNS}, **{factor: float('nan')}) for factor in FACTOR_COLUMNS]
+    batch = Factors.score_factors_batch(_columns(nan_rows, FACTOR_COLUMNS))
+    for i, row in enumerate(nan_rows):
+        assert Factors.score_factors_row(batch, i) == Factors.score_factors(row)
+        assert batch['scores'][FACTOR_COLUMNS[i]][i] == 1
+    matrix = np.array([[row[name] for name in FACTOR_COLUMNS] for row in nan_rows], dtype=float)
+    assert np.array_equal(Factors.score_factors_batch(matrix)['total_score'], batch['total_score'])
+    print("✅ 批量评分缺省值测试通过")
+
+
+def test_minefield_mask_matches_scalar():
+    """测试单家公司排雷掩码与 check_minefields 一致，并列出全部未通过规则的说明"""
+    factor_rows, business_rows = _random_companies(500, seed=2)
+    for factors, business in zip(factor_rows, business_rows):
+        mask = Factors.minefield_mask(factors, business)
+        assert Factors.minefield_result(mask, factors, business) == Factors.check_minefields(factors, business)
+        assert len(Factors.minefield_messages(mask, factors, business)) == len(Factors.minefield_failures(mask))
+    assert Factors.minefield_bits(('high_debt', 'high_pledge')) == 0b1001
+    print("✅ 单家公司排雷掩码测试通过")
+
+
+if __name__ == "__main__":
+    test_score_factors_batch_matches_scalar()
+    test_check_minefields_batch_matches_scalar()
+    test_batch_defaults_for_missing_columns()
+    test_minefield_mask_matches_scalar()
+    print("\n🎉 所有批量因子评分测试通过！")
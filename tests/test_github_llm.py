@@ -0,0 +1,109 @@
+"""GitHub大模型接口测试"""
+import os
+import tempfile
+
+from src.buffet_agent import github_llm
+from src.buffet_agent.github_llm import get_github_llm_interface, load_skill_content, GitHubLLMInterface
+from src.buffet_agent.history import HistoryStore
+from src.buffet_agent.prompt_budget import count_tokens, compact_skill_content, split_skill_sections
+
+
+def test_interface_registry_reuses_instances():
+    """测试接口注册表按 (api_key, model) 复用实例"""
+    github_llm.clear_github_llm_interfaces()
+    first = get_github_llm_interface("key-a")
+    assert get_github_llm_interface("key-a") is first
+    assert get_github_llm_interface("key-b") is not first
+    assert get_github_llm_interface("key-a", model="other-model") is not first
+
+    # 共享实例不保留对话历史，追问与分析只写入调用方传入的会话历史
+    history = HistoryStore()
+    github_llm.ask_github_llm_follow_up("什么是护城河？", api_key="key-a", history=history)
+    github_llm.ask_github_llm_follow_up("其他用户的问题", api_key="key-a")
+    first.generate_investment_analysis(COMPANY, "护城河能维持多久？")
+    assert first.get_conversation_history() == []
+    assert [m["content"] for m in history.messages() if m["role"] == "user"] == ["什么是护城河？"]
+    first.generate_investment_analysis(COMPANY, "护城河能维持多久？", history=history)
+    assert len(history.messages()) == 4
+    github_llm.clear_github_llm_interfaces()
+    print("✅ 接口注册表复用测试通过")
+
+
+def test_skill_file_cached_and_hot_reloaded():
+    """测试Skill.md只加载一次，修改后按mtime热加载"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "Skill.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# 版本一")
+        assert load_skill_content(path) == "# 版本一"
+
+        reads = []
+        original_open = open
+
+        def counting_open(*args, **kwargs):
+            reads.append(args[0])
+            return original_open(*args, **kwargs)
+
+        github_llm.open = counting_open
+        try:
+            for _ in range(5):
+                assert load_skill_content(path) == "# 版本一"
+            assert reads == []
+
+            with original_open(path, "w", encoding="utf-8") as f:
+                f.write("# 版本二")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            assert load_skill_content(path) == "# 版本二"
+            assert reads == [path]
+        finally:
+            del github_llm.open
+    print("✅ Skill.md缓存与热加载测试通过")
+
+
+COMPANY = {
+    "code": "600519", "name": "贵州茅台", "pe": 35, "pb": 9, "pe_hist_percent": 80,
+    "roe_ttm": 30, "debt_to_asset": 20, "revenue_growth": 15, "profit_growth": 18,
+    "gross_margin": 91, "cash_flow_healthy": True,
+}
+
+
+def test_skill_sections_selected_under_budget():
+    """测试技能框架按预算挑选相关章节，并保持原文顺序"""
+    content = load_skill_content()
+    _, sections = split_skill_sections(content)
+    assert len(sections) > 10
+
+    compacted, stats = compact_skill_content(content, COMPANY, "管理层是否可靠？", token_budget=800)
+    assert stats["skill_tokens"] <= 800
+    assert stats["skill_tokens"] < stats["skill_tokens_full"]
+    assert "管理层质量评估" in compacted
+    headings = [line for line in compacted.splitlines() if line.startswith("### ")]
+    assert headings == sorted(headings, key=lambda h: [int(n) for n in h.split()[1].split(".")])
+
+    # 不设预算时内联全文
+    full, full_stats = compact_skill_content(content, COMPANY, None, token_budget=None)
+    assert full == content
+    assert full_stats["skill_tokens"] == count_tokens(content)
+    print("✅ 技能框架预算压缩测试通过")
+
+
+def test_investment_prompt_reports_token_savings():
+    """测试分析结果附带每次请求的token节省统计"""
+    interface = GitHubLLMInterface()
+    _, stats = interface._build_investment_prompt(COMPANY, "护城河能维持多久？", token_budget=1000)
+    assert stats["saved_tokens"] > 0
+    assert stats["full_prompt_tokens"] == stats["prompt_tokens"] + stats["saved_tokens"]
+    assert stats["skill_sections_used"] < stats["skill_sections_total"]
+
+    result = interface.generate_investment_analysis(COMPANY)
+    assert result["prompt_stats"]["saved_tokens"] > 0
+    print("✅ 提示词token节省统计测试通过")
+
+
+if __name__ == "__main__":
+    test_interface_registry_reuses_instances()
+    test_skill_file_cached_and_hot_reloaded()
+    test_skill_sections_selected_under_budget()
+    test_investment_prompt_reports_token_savings()
+    print("\n🎉 所有GitHub大模型接口测试通过！")
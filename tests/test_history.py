@@ -0,0 +1,87 @@
+"""会话历史模块测试"""
+from src.buffet_agent.agent import ValueInvestmentAgent
+from src.buffet_agent.data import load_sample_data
+from src.buffet_agent.history import HistoryStore, analysis_size
+
+
+def test_ring_buffer_and_byte_cap():
+    """测试消息条数与字节上限，被淘汰的消息进入滚动摘要"""
+    history = HistoryStore(max_messages=3, max_bytes=1000, max_summary_chars=50)
+    for i in range(5):
+        history.add_message("user", f"问题{i}")
+    assert [m["content"] for m in history.messages()] == ["问题2", "问题3", "问题4"]
+    assert "问题1" in history.summary
+
+    history.add_message("assistant", "长" * 300)
+    assert history.stats()["message_bytes"] <= 1000
+    assert history.messages()[-1]["content"] == "长" * 300
+    assert len(history.summary) <= 50
+
+    # 单条消息超过字节上限时也不会保留
+    history.add_message("assistant", "超" * 400)
+    assert history.stats()["message_bytes"] <= 1000
+
+    unsummarized = HistoryStore(max_messages=1, summarize=False)
+    unsummarized.add_message("user", "a")
+    unsummarized.add_message("user", "b")
+    assert unsummarized.summary == ""
+    print("✅ 环形缓冲与字节上限测试通过")
+
+
+def test_analyses_stored_by_reference():
+    """测试分析结果按ID保存引用，超过上限淘汰最早的结果"""
+    history = HistoryStore(max_analyses=2)
+    results = [{"n": i} for i in range(3)]
+    ids = [history.add_analysis(result) for result in results]
+    assert history.get_analysis(ids[0]) is None
+    assert history.get_analysis(ids[2]) is results[2]
+    assert history.analyses() == results[1:]
+    assert history.stats()["evicted_analyses"] == 1
+    print("✅ 分析结果引用存储测试通过")
+
+
+def test_analysis_byte_cap():
+    """测试分析结果总字节数超限时淘汰最早的结果，单条超限时仍保留最新一条"""
+    results = [{"n": i, "payload": "分" * 100} for i in range(5)]
+    size = analysis_size(results[0])
+    history = HistoryStore(max_analyses=10, max_analysis_bytes=size * 2)
+    ids = [history.add_analysis(result) for result in results]
+    assert history.analyses() == results[3:]
+    assert history.get_analysis(ids[2]) is None
+    stats = history.stats()
+    assert stats["analysis_bytes"] == size * 2 and stats["evicted_analyses"] == 3
+
+    large = {"payload": "大" * 1000}
+    large_id = history.add_analysis(large)
+    assert history.analyses() == [large] and history.get_analysis(large_id) is large
+    assert history.stats()["analysis_bytes"] == analysis_size(large)
+
+    history.clear()
+    assert history.stats()["analysis_bytes"] == 0
+    print("✅ 分析结果字节上限测试通过")
+
+
+def test_agent_history_is_bounded():
+    """测试智能体重复分析时历史有界，对话中只记录分析引用"""
+    agent = ValueInvestmentAgent(HistoryStore(max_messages=4, max_analyses=2))
+    company_data = load_sample_data()["600519.SH"]
+    for _ in range(5):
+        result = agent.run_analysis(company_data, "护城河如何？")
+    assert len(agent.get_conversation_history()) == 4
+    assert len(agent.get_analysis_history()) == 2
+    assert agent.get_analysis(result["analysis_id"]) is result
+    assert result["analysis_id"] in agent.get_conversation_history()[-1]["content"]
+    assert len(agent.get_conversation_history()[-1]["content"]) < 200
+
+    agent.clear_history()
+    assert agent.get_conversation_history() == []
+    assert agent.get_analysis_history() == []
+    print("✅ 智能体有界历史测试通过")
+
+
+if __name__ == "__main__":
+    test_ring_buffer_and_byte_cap()
+    test_analyses_stored_by_reference()
+    test_analysis_byte_cap()
+    test_agent_history_is_bounded()
+    print("\n🎉 所有会话历史测试通过！")
@@ -0,0 +1,91 @@
+"""增量评分模块测试"""
+from src.buffet_agent.data import load_sample_data
+from src.buffet_agent.incremental import IncrementalScorer
+from src.buffet_agent.knowledge import get_shared_knowledge_graph
+
+
+def test_unchanged_inputs_are_reused(tmp_path):
+    """测试输入未变化时复用上次结果，且与全量重算结果一致"""
+    path = str(tmp_path / "state.json")
+    universe = load_sample_data()
+    first = IncrementalScorer(path).score_all(universe)
+
+    scorer = IncrementalScorer(path)
+    second = scorer.score_all(universe)
+    assert scorer.stats["reused"] == len(universe) and scorer.stats["recomputed"] == 0
+    assert sum(scorer.stats["skills_recomputed"].values()) == 0
+    assert second == first
+    print("✅ 增量评分复用测试通过")
+
+
+def test_price_move_recomputes_valuation_skills_only(tmp_path):
+    """测试仅价格变动时只重算依赖估值字段的技能"""
+    path = str(tmp_path / "state.json")
+    universe = load_sample_data()
+    IncrementalScorer(path).score_all(universe)
+
+    moved = {code: dict(data) for code, data in universe.items()}
+    moved["600519.SH"].update(pe=60.5, peg=1.4, pe_hist_percent=92)
+    scorer = IncrementalScorer(path)
+    results = scorer.score_all(moved)
+    assert scorer.stats["reused"] == 2 and scorer.stats["recomputed"] == 1
+    assert scorer.stats["skills_recomputed"] == {
+        "safety_margin": 1, "fundamental": 0, "moat": 1, "risk": 1, "investment_reasoning": 1
+    }
+    assert results == IncrementalScorer(str(tmp_path / "fresh.json")).score_all(moved)
+
+    # 基本面字段变化时重算基本面
+    moved["000858.SZ"]["revenue_growth"] = -5
+    scorer = IncrementalScorer(path)
+    scorer.score_all(moved)
+    assert scorer.stats["skills_recomputed"]["fundamental"] == 1
+    print("✅ 估值变动增量重算测试通过")
+
+
+def test_removed_tickers_are_pruned(tmp_path):
+    """测试本次未出现的股票从状态中删除"""
+    path = str(tmp_path / "state.json")
+    universe = load_sample_data()
+    IncrementalScorer(path).score_all(universe)
+    IncrementalScorer(path).score_all({"600519.SH": universe["600519.SH"]})
+    assert list(IncrementalScorer(path).state) == ["600519.SH"]
+    print("✅ 增量状态清理测试通过")
+
+
+def test_industry_mapping_change_recomputes_reasoning(tmp_path):
+    """测试加载新的行业映射后推理结果失效重算，评分技能仍复用"""
+    path = str(tmp_path / "state.json")
+    universe = load_sample_data()
+    graph = get_shared_knowledge_graph()
+    saved = graph.snapshot
+    try:
+        IncrementalScorer(path).score_all(universe)
+        mapping = tmp_path / "mapping.json"
+        mapping.write_text('{"codes": {"600519.SH": "白酒"}}', encoding="utf-8")
+        graph.load_industry_mapping(str(mapping))
+
+        scorer = IncrementalScorer(path)
+        results = scorer.score_all(universe)
+        assert scorer.stats["skills_recomputed"] == {
+            "safety_margin": 0, "fundamental": 0, "moat": 0, "risk": 0, "investment_reasoning": len(universe)
+        }
+        assert results == IncrementalScorer(str(tmp_path / "fresh.json")).score_all(universe)
+        assert results["600519.SH"]["investment_reasoning"]["industry"] == "白酒"
+    finally:
+        graph._snapshot = saved
+    print("✅ 行业映射变化重算推理测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_unchanged_inputs_are_reused(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_price_move_recomputes_valuation_skills_only(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_removed_tickers_are_pruned(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_industry_mapping_change_recomputes_reasoning(Path(tmp))
+    print("\n🎉 所有增量评分测试通过！")
@@ -0,0 +1,144 @@
+"""知识图谱模块测试"""
+import json
+import threading
+
+from src.buffet_agent import knowledge
+from src.buffet_agent.data import load_sample_data
+from src.buffet_agent.knowledge import InvestmentKnowledgeGraph, get_shared_knowledge_graph
+from src.buffet_agent.matcher import KeywordMatcher
+
+
+def test_shared_graph_built_once():
+    """测试模块级辅助函数复用同一份知识图谱"""
+    graph = get_shared_knowledge_graph()
+    builds = []
+    original = InvestmentKnowledgeGraph._initialize_default_knowledge
+
+    def counting_initialize(self):
+        builds.append(1)
+        original(self)
+
+    InvestmentKnowledgeGraph._initialize_default_knowledge = counting_initialize
+    try:
+        company_data = load_sample_data()["000858.SZ"]
+        for _ in range(3):
+            knowledge.build_investment_reasoning(company_data)
+            enhanced = knowledge.enhance_analysis({"integrated_recommendation": "⚠️  中性观察"}, company_data)
+            knowledge.cross_validate_data(company_data, company_data)
+        assert builds == []
+        assert get_shared_knowledge_graph() is graph
+    finally:
+        InvestmentKnowledgeGraph._initialize_default_knowledge = original
+
+    # 只读快照仍可直接JSON序列化
+    assert json.loads(json.dumps(enhanced, ensure_ascii=False))["knowledge_enhanced"]["industry_insights"]["leaders"][1] == "五粮液"
+    print("✅ 共享知识图谱测试通过")
+
+
+def test_snapshot_is_read_only():
+    """测试知识快照不可被请求方修改"""
+    graph = InvestmentKnowledgeGraph()
+    insights = graph.get_industry_knowledge("白酒")
+    for mutate in (lambda: insights.__setitem__("growth_prospects", "高速"),
+                   lambda: insights.update({}),
+                   lambda: graph.industry_knowledge.pop("白酒")):
+        try:
+            mutate()
+            assert False, "只读快照不应允许修改"
+        except TypeError:
+            pass
+    assert graph.get_industry_knowledge("白酒")["growth_prospects"] == "稳定"
+    print("✅ 知识快照只读测试通过")
+
+
+def test_add_company_relationship_copy_on_write():
+    """测试添加公司关系时旧快照保持不变，并发读取不受影响"""
+    graph = InvestmentKnowledgeGraph()
+    before = graph.snapshot
+    graph.add_company_relationship("五粮液", {"type": "竞争", "target": "贵州茅台"})
+    assert before.company_relationships == {}
+    assert graph.get_company_relationships("五粮液") == [{"type": "竞争", "target": "贵州茅台"}]
+    assert graph.snapshot.industry_knowledge is before.industry_knowledge
+
+    errors = []
+    company_data = load_sample_data()["000858.SZ"]
+
+    def reader():
+        try:
+            for _ in range(200):
+                graph.enhance_analysis_with_knowledge({}, company_data)
+        except Exception as e:
+            errors.append(e)
+
+    def writer(index):
+        for i in range(50):
+            graph.add_company_relationship("五粮液", {"type": "供应商", "target": f"供应商{index}-{i}"})
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    threads += [threading.Thread(target=writer, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(graph.get_company_relationships("五粮液")) == 1 + 4 * 50
+    print("✅ 公司关系写时复制测试通过")
+
+
+def _brute_force_match(keywords, text):
+    """逐个关键词扫描的参照实现：最长优先，等长取最先出现"""
+    best = None
+    for keyword, label in keywords.items():
+        start = text.find(keyword)
+        if start == -1:
+            continue
+        if best is None or len(keyword) > best[2] or (len(keyword) == best[2] and start < best[1]):
+            best = (label, start, len(keyword))
+    return best
+
+
+def test_keyword_matcher_matches_brute_force():
+    """测试关键词自动机与暴力匹配结果一致"""
+    import random
+
+    rng = random.Random(3)
+    alphabet = "银行证券保险医药白酒科技电子能源地产中国华安"
+    keywords = {}
+    while len(keywords) < 20000:
+        keyword = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6)))
+        keywords.setdefault(keyword, f"行业{len(keywords) % 31}")
+    matcher = KeywordMatcher(keywords)
+    assert len(matcher) == 20000
+
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet + "公司集团股份") for _ in range(rng.randint(0, 12)))
+        assert matcher.find(text) == _brute_force_match(keywords, text), text
+    print("✅ 关键词自动机一致性测试通过")
+
+
+def test_infer_industry_longest_match_and_code_index():
+    """测试行业推断的最长匹配优先与代码索引"""
+    graph = InvestmentKnowledgeGraph()
+    assert graph.infer_industry("贵州茅台") == "白酒"
+    assert graph.infer_industry("长春高新") == "医药"
+    assert graph.infer_industry("优质价值公司") is None
+
+    graph.add_industry_keywords({"招商": "银行", "招商证券": "证券", "证券": "证券"})
+    assert graph.infer_industry("招商银行") == "银行"
+    assert graph.infer_industry("招商证券股份") == "证券"
+
+    graph.add_industry_codes({"600519.SH": "白酒"})
+    assert graph.infer_industry("优质价值公司", "600519.SH") == "白酒"
+    reasoning = graph.build_investment_reasoning_chain(load_sample_data()["600519.SH"])
+    assert reasoning["industry"] == "白酒"
+    print("✅ 行业推断测试通过")
+
+
+if __name__ == "__main__":
+    test_shared_graph_built_once()
+    test_snapshot_is_read_only()
+    test_add_company_relationship_copy_on_write()
+    test_keyword_matcher_matches_brute_force()
+    test_infer_industry_longest_match_and_code_index()
+    print("\n🎉 所有知识图谱测试通过！")
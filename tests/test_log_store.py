@@ -0,0 +1,147 @@
+"""Fundamental-Q-Agent 因子缓存追加写日志测试"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Fundamental-Q-Agent"))
+
+from config import Config
+from log_store import FactorCacheLog
+
+
+def _open(tmp_path, cls=FactorCacheLog, **kwargs):
+    Config.FACTOR_CACHE_PATH = str(tmp_path / "factor_cache.json")
+    return cls(str(tmp_path / "factor_cache.log"), **kwargs)
+
+
+def test_set_get_clear_and_replay(tmp_path):
+    """测试写入、覆盖、删除后读取最新值，重新打开时重放段文件得到相同结果"""
+    saved = Config.FACTOR_CACHE_PATH
+    try:
+        store = _open(tmp_path)
+        assert store.set("600519", {"roe": 30})
+        assert store.set_many({"000858": {"roe": 25}, "600519": {"roe": 31}})
+        assert store.clear("000858")
+        assert store.get("600519") == {"roe": 31} and store.get("000858") is None
+        assert store.stats()["records"] == 4
+        store.close()
+
+        store = _open(tmp_path)
+        assert store.get("600519") == {"roe": 31} and store.get("000858") is None
+        assert store.clear() and store.get("600519") is None
+        store.close()
+    finally:
+        Config.FACTOR_CACHE_PATH = saved
+    print("✅ 追加写日志读写测试通过")
+
+
+def test_failed_batch_leaves_index_and_file_intact(tmp_path):
+    """测试批量写入中途编码失败或写入失败时，索引不指向未写入的字节，段文件可正常重放"""
+    saved = Config.FACTOR_CACHE_PATH
+    try:
+        store = _open(tmp_path)
+        store.set("600519", {"roe": 30})
+
+        # 第二条无法编码：整批不写入
+        assert not store.set_many({"000858": {"roe": 25}, "000333": {"bad": object()}, "600519": {"roe": 99}})
+        assert store.get("000858") is None and store.get("600519") == {"roe": 30}
+
+        # 写入时出错：截断回写入前的长度
+        real_file = store._file
+
+        class _FailingFile:
+            def tell(self):
+                return real_file.tell()
+
+            def write(self, payload):
+                real_file.write(payload[:len(payload) // 2])
+                real_file.flush()
+                raise IOError("磁盘已满")
+
+            def close(self):
+                real_file.close()
+
+        size = os.path.getsize(store.log_path)
+        store._file = _FailingFile()
+        assert not store.set_many({"000858": {"roe": 25}, "600519": {"roe": 99}})
+        assert os.path.getsize(store.log_path) == size
+        assert store.get("000858") is None and store.get("600519") == {"roe": 30}
+
+        # 之后的写入正常，重放后记录完整
+        assert store.set("000858", {"roe": 26})
+        store.close()
+        store = _open(tmp_path)
+        assert store.get("000858") == {"roe": 26} and store.get("600519") == {"roe": 30}
+        store.close()
+    finally:
+        Config.FACTOR_CACHE_PATH = saved
+    print("✅ 写入失败回滚测试通过")
+
+
+def test_compaction_rewrites_live_records(tmp_path):
+    """测试垃圾比例超过阈值时后台压缩，压缩后数据不变且重放一致"""
+    saved = Config.FACTOR_CACHE_PATH
+    try:
+        store = _open(tmp_path, compact_ratio=0.5, compact_min_records=20)
+        for round_ in range(10):
+            store.set_many({f"{i:06d}": {"round": round_} for i in range(5)})
+        for _ in range(100):
+            if store.stats()["compactions"]:
+                break
+            threading.Event().wait(0.02)
+        stats = store.stats()
+        assert stats["compactions"] >= 1 and stats["garbage_ratio"] < 0.5
+        assert all(store.get(f"{i:06d}") == {"round": 9} for i in range(5))
+        store.close()
+
+        store = _open(tmp_path)
+        assert all(store.get(f"{i:06d}") == {"round": 9} for i in range(5))
+        store.close()
+    finally:
+        Config.FACTOR_CACHE_PATH = saved
+    print("✅ 后台压缩测试通过")
+
+
+def test_compaction_does_not_block_writers(tmp_path):
+    """测试重写存活记录期间不持有锁，其间的写入与删除在压缩后保留"""
+    saved = Config.FACTOR_CACHE_PATH
+
+    class _SlowCompactLog(FactorCacheLog):
+        def _copy_live(self, snapshot, reader, out):
+            result = super()._copy_live(snapshot, reader, out)
+            writer = threading.Thread(target=lambda: (self.set("000001", {"roe": 2}),
+                                                      self.set("300750", {"roe": 20}),
+                                                      self.clear("000002")))
+            writer.start()
+            writer.join(5)
+            assert not writer.is_alive(), "压缩期间写入被阻塞"
+            return result
+
+    try:
+        store = _open(tmp_path, cls=_SlowCompactLog, compact_min_records=10 ** 9)
+        store.set_many({"000001": {"roe": 1}, "000002": {"roe": 1}, "000003": {"roe": 1}})
+        store.set("000003", {"roe": 3})
+        store.compact()
+
+        expected = {"000001": {"roe": 2}, "000002": None, "000003": {"roe": 3}, "300750": {"roe": 20}}
+        assert {code: store.get(code) for code in expected} == expected
+        assert store.stats()["compactions"] == 1 and store.stats()["records"] == 6
+        store.close()
+
+        store = _open(tmp_path)
+        assert {code: store.get(code) for code in expected} == expected
+        store.close()
+    finally:
+        Config.FACTOR_CACHE_PATH = saved
+    print("✅ 压缩期间写入不阻塞测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_set_get_clear_and_replay, test_failed_batch_leaves_index_and_file_intact,
+                 test_compaction_rewrites_live_records, test_compaction_does_not_block_writers):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\n🎉 所有追加写日志测试通过！")
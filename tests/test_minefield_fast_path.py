@@ -0,0 +1,156 @@
+"""Fundamental-Q-Agent 排雷快速通道与低价模型分档测试（桩客户端，不访问网络）"""
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Fundamental-Q-Agent"))
+
+from config import Config
+from agent import FundamentalQAgent
+from response_cache import ResponseCache
+
+REPLY = "【决策结论】观望 测试\n【关键事实】\nROE: 25%\n【推理逻辑】桩模型\n【风险提示】\n估值偏高"
+
+GOOD_FACTORS = {
+    "roe": 25, "gross_margin": 40, "cash_flow_ratio": 1.2, "debt_ratio": 40, "pe": 15, "pb": 3,
+    "revenue_growth": 15, "profit_growth": 20, "dividend_yield": 3, "cash_flow_quality": 0.9
+}
+POOR_FACTORS = dict(GOOD_FACTORS, roe=1, gross_margin=1, cash_flow_ratio=0.1, pe=90, revenue_growth=-5,
+                    profit_growth=-5, dividend_yield=0, cash_flow_quality=0.1)
+
+
+class _StubCompletions:
+    """记录调用的模型名称，返回固定输出（支持 stream=True）"""
+
+    def __init__(self):
+        self.models = []
+
+    def create(self, model, messages, stream=False, **kwargs):
+        self.models.append(model)
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=line + "\n"))])
+                         for line in REPLY.split("\n")])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=REPLY))])
+
+
+class _Settings:
+    """临时修改 Config，退出时恢复"""
+
+    def __init__(self, **overrides):
+        self.overrides = overrides
+        self.saved = {}
+
+    def __enter__(self):
+        for name, value in self.overrides.items():
+            self.saved[name] = getattr(Config, name)
+            setattr(Config, name, value)
+        FundamentalQAgent.reset_llm_stats()
+        return self
+
+    def __exit__(self, *exc):
+        for name, value in self.saved.items():
+            setattr(Config, name, value)
+        FundamentalQAgent.reset_llm_stats()
+
+
+def _settings(tmp_path, **overrides):
+    defaults = {
+        "STORAGE_BACKEND": "json",
+        "FACTOR_CACHE_PATH": str(tmp_path / "factor_cache.json"),
+        "LLM_CACHE_ENABLED": False,
+        "LLM_CACHE_DIR": str(tmp_path / "llm_cache"),
+    }
+    defaults.update(overrides)
+    return _Settings(**defaults)
+
+
+def _agent(provider="openai", model_name="gpt-4o"):
+    agent = FundamentalQAgent("test", provider, model_name)
+    completions = _StubCompletions()
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return agent, completions
+
+
+def test_hard_reject_skips_model(tmp_path):
+    """测试命中硬否决规则时不调用模型，直接返回"不碰"结论并列出全部未通过规则"""
+    with _settings(tmp_path):
+        agent, completions = _agent()
+        bad = dict(GOOD_FACTORS, debt_ratio=90)
+        result = agent.analyze("000001", "测试", bad, {"loss_years": 3})
+        assert completions.models == []
+        assert result["conclusion"].startswith("不碰")
+        assert len(result["risks"]) == 2 and "资产负债率 90%" in result["risks"][0]
+
+        events = list(agent.analyze_stream("000001", "测试", bad, {"high_pledge": True}))
+        assert completions.models == []
+        assert [event["type"] for event in events] == ["result"]
+        assert events[0]["result"]["conclusion"].startswith("不碰")
+
+        # 关闭快速通道后照常调用模型
+        Config.MINEFIELD_FAST_PATH = False
+        try:
+            assert agent.analyze("000001", "测试", bad, {})["conclusion"] == "观望 测试"
+        finally:
+            Config.MINEFIELD_FAST_PATH = True
+        assert completions.models == ["gpt-4o"]
+    print("✅ 硬否决快速通道测试通过")
+
+
+def test_borderline_routes_to_cheap_model(tmp_path):
+    """测试未通过非硬否决规则或评分较差的边缘情况使用低价模型，其余使用主模型"""
+    with _settings(tmp_path, CHEAP_MODEL_ENABLED=True, MINEFIELD_HARD_REJECT_RULES=("high_debt",)):
+        agent, completions = _agent()
+        agent.analyze("000001", "软规则", GOOD_FACTORS, {"loss_years": 3})
+        agent.analyze("000002", "评分较差", POOR_FACTORS, {})
+        list(agent.analyze_stream("000003", "评分较差", POOR_FACTORS, {}))
+        agent.analyze("000004", "正常", GOOD_FACTORS, {})
+        assert completions.models == ["gpt-4o-mini", "gpt-4o-mini", "gpt-4o-mini", "gpt-4o"]
+        stats = FundamentalQAgent.get_llm_stats()
+        assert stats["cheap_llm_calls"] == 3 and stats["llm_calls"] == 1
+
+    # 低价模型与主模型相同（kimi 默认配置）时回退为主模型，计入主模型调用
+    with _settings(tmp_path, CHEAP_MODEL_ENABLED=True):
+        agent, completions = _agent("kimi", Config.CHEAP_MODELS["kimi"])
+        agent.analyze("000002", "评分较差", POOR_FACTORS, {})
+        assert completions.models == [Config.CHEAP_MODELS["kimi"]]
+        stats = FundamentalQAgent.get_llm_stats()
+        assert stats["cheap_llm_calls"] == 0 and stats["llm_calls"] == 1
+
+    # 未启用低价模型时边缘情况也使用主模型
+    with _settings(tmp_path):
+        agent, completions = _agent()
+        agent.analyze("000002", "评分较差", POOR_FACTORS, {})
+        assert completions.models == ["gpt-4o"]
+    print("✅ 低价模型分档测试通过")
+
+
+def test_llm_stats_counters(tmp_path):
+    """测试模型调用统计：快速通道与缓存命中计入 avoided"""
+    with _settings(tmp_path, LLM_CACHE_ENABLED=True):
+        try:
+            agent, completions = _agent()
+            agent.analyze("000001", "正常", GOOD_FACTORS, {})
+            agent.analyze("000001", "正常", GOOD_FACTORS, {})
+            agent.analyze("000002", "高负债", dict(GOOD_FACTORS, debt_ratio=95), {})
+            list(agent.analyze_stream("000003", "亏损", GOOD_FACTORS, {"loss_years": 2}))
+            assert len(completions.models) == 1
+            assert FundamentalQAgent.get_llm_stats() == {
+                "analyses": 4, "fast_path": 2, "cache_hits": 1, "llm_calls": 1, "cheap_llm_calls": 0, "avoided": 3
+            }
+        finally:
+            ResponseCache._instances.pop(Config.LLM_CACHE_DIR, None)
+    assert FundamentalQAgent.get_llm_stats()["analyses"] == 0
+    print("✅ 模型调用统计测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_hard_reject_skips_model(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_borderline_routes_to_cheap_model(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_llm_stats_counters(Path(tmp))
+    print("\n🎉 所有排雷快速通道测试通过！")
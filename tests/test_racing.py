@@ -0,0 +1,231 @@
+"""Fundamental-Q-Agent 多提供商竞速测试（本地伪 OpenAI 兼容服务）"""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Fundamental-Q-Agent"))
+
+from config import Config, ModelProvider
+from racing import ProviderRace
+
+MESSAGES = [{"role": "user", "content": "测试"}]
+
+
+class _FakeProvider:
+    """伪 /chat/completions 流式接口
+
+    Args:
+        text: 返回的文本，按字符逐段发送
+        status: 响应状态码，非200时直接返回错误
+        header_delay: 发送响应头前的等待时间（秒）
+        first_delay: 发送响应头后、首段文本前的等待时间（秒）
+        chunk_interval: 两段文本之间的间隔（秒）
+    """
+
+    def __init__(self, text="ok", status=200, header_delay=0.0, first_delay=0.0, chunk_interval=0.0):
+        self.text = text
+        self.status = status
+        self.header_delay = header_delay
+        self.first_delay = first_delay
+        self.chunk_interval = chunk_interval
+        self.request_times = []
+        self.disconnected = False
+        self.completed = False
+        self.finished = threading.Event()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = openai.OpenAI(api_key="test", base_url=f"http://127.0.0.1:{self.server.server_port}/v1",
+                                    max_retries=0)
+
+    def _handler(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                provider.request_times.append(time.monotonic())
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                try:
+                    time.sleep(provider.header_delay)
+                    if provider.status != 200:
+                        body = json.dumps({"error": {"message": "fake failure", "type": "server_error"}}).encode()
+                        self.send_response(provider.status)
+                        self.send_header("Content-Type", "application/json")
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    self.wfile.flush()
+                    time.sleep(provider.first_delay)
+                    for char in provider.text:
+                        chunk = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0,
+                                 "model": "fake", "choices": [{"index": 0, "delta": {"content": char},
+                                                               "finish_reason": None}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                        time.sleep(provider.chunk_interval)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                    provider.completed = True
+                except (BrokenPipeError, ConnectionResetError):
+                    provider.disconnected = True
+                finally:
+                    provider.finished.set()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_hedge_fires_after_delay():
+    """测试主提供商在 hedge_delay 内未出首个token时启动备用提供商，备用先出token胜出"""
+    ModelProvider.reset_latency()
+    primary = _FakeProvider("主提供商", header_delay=1.0)
+    backup = _FakeProvider("备用提供商")
+    try:
+        race = ProviderRace({"kimi": (primary.client, "m1"), "openai": (backup.client, "m2")}, hedge_delay=0.2)
+        start = time.monotonic()
+        text = "".join(race.stream(MESSAGES))
+        elapsed = time.monotonic() - start
+        assert text == "备用提供商" and race.last_provider == "openai"
+        assert backup.request_times[0] - start >= 0.2
+        assert elapsed < 1.0
+    finally:
+        primary.close()
+        backup.close()
+    print("✅ 备用提供商延迟启动测试通过")
+
+
+def test_loser_is_cancelled_and_stream_closed():
+    """测试落败请求被取消，已建立的流式连接被关闭"""
+    ModelProvider.reset_latency()
+    primary = _FakeProvider("x" * 50, first_delay=1.0, chunk_interval=0.02)
+    backup = _FakeProvider("备用")
+    try:
+        race = ProviderRace({"kimi": (primary.client, "m1"), "openai": (backup.client, "m2")}, hedge_delay=0.2)
+        assert "".join(race.stream(MESSAGES)) == "备用"
+        assert primary.finished.wait(5)
+        assert primary.disconnected and not primary.completed
+    finally:
+        primary.close()
+        backup.close()
+    print("✅ 落败请求取消测试通过")
+
+
+def test_primary_error_fails_over_immediately():
+    """测试主提供商请求失败时不等待 hedge_delay，立即启动备用提供商"""
+    ModelProvider.reset_latency()
+    primary = _FakeProvider(status=500)
+    backup = _FakeProvider("备用")
+    try:
+        race = ProviderRace({"kimi": (primary.client, "m1"), "openai": (backup.client, "m2")}, hedge_delay=5)
+        start = time.monotonic()
+        assert "".join(race.stream(MESSAGES)) == "备用"
+        assert time.monotonic() - start < 1.0
+        assert race.last_provider == "openai"
+        # 失败计入溢出桶
+        assert ModelProvider.get_latency_histogram("kimi")[f">{Config.LATENCY_BUCKETS[-1]}s"] == 1
+    finally:
+        primary.close()
+        backup.close()
+    print("✅ 主提供商失败立即切换测试通过")
+
+
+def test_rank_providers_reorders_after_latency():
+    """测试记录延迟后按延迟重新排序，下一次竞速直接以延迟低者为主提供商"""
+    ModelProvider.reset_latency()
+    assert ModelProvider.rank_providers(["kimi", "openai"]) == ["kimi", "openai"]
+    ModelProvider.record_latency("kimi", 8)
+    ModelProvider.record_latency("openai", 0.2)
+    assert ModelProvider.rank_providers(["kimi", "openai"]) == ["openai", "kimi"]
+    # 没有记录的提供商排在最后
+    assert ModelProvider.rank_providers(["minimax", "kimi", "openai"]) == ["openai", "kimi", "minimax"]
+
+    slow = _FakeProvider("慢")
+    fast = _FakeProvider("快")
+    try:
+        race = ProviderRace({"kimi": (slow.client, "m1"), "openai": (fast.client, "m2")}, hedge_delay=5)
+        assert "".join(race.stream(MESSAGES)) == "快"
+        assert not slow.request_times and len(fast.request_times) == 1
+    finally:
+        slow.close()
+        fast.close()
+        ModelProvider.reset_latency()
+    print("✅ 按延迟选择主提供商测试通过")
+
+
+def test_cancelled_loser_does_not_move_ahead():
+    """测试刚启动即被取消的备用提供商不记录延迟样本，下一次竞速仍以胜出者为主提供商"""
+    ModelProvider.reset_latency()
+    primary = _FakeProvider("主", first_delay=0.35)
+    backup = _FakeProvider("备用", first_delay=1.0)
+    try:
+        race = ProviderRace({"kimi": (primary.client, "m1"), "openai": (backup.client, "m2")}, hedge_delay=0.25)
+        assert "".join(race.stream(MESSAGES)) == "主"
+        assert len(backup.request_times) == 1
+        assert sum(ModelProvider.get_latency_histogram("openai").values()) == 0
+        assert ModelProvider.rank_providers(["openai", "kimi"]) == ["kimi", "openai"]
+    finally:
+        primary.close()
+        backup.close()
+        ModelProvider.reset_latency()
+    print("✅ 取消的请求不影响主提供商选择测试通过")
+
+
+def test_cached_response_is_tagged_with_winner(tmp_path):
+    """测试竞速结果按胜出的提供商与模型写入缓存，再次请求时命中缓存不再调用模型"""
+    from agent import FundamentalQAgent
+    from response_cache import ResponseCache
+
+    ModelProvider.reset_latency()
+    saved = (Config.LLM_CACHE_ENABLED, Config.LLM_CACHE_DIR)
+    Config.LLM_CACHE_ENABLED, Config.LLM_CACHE_DIR = True, str(tmp_path / "llm_cache")
+    primary = _FakeProvider(status=500)
+    backup = _FakeProvider("【决策结论】观望 测试")
+    try:
+        agent = FundamentalQAgent("test", "kimi", "moonshot-v1-8k")
+        agent.race = ProviderRace({"kimi": (primary.client, "moonshot-v1-8k"),
+                                   "openai": (backup.client, "gpt-4o-mini")}, hedge_delay=5)
+        args = ({"roe": 20}, {}, "通过排雷检查", {"total_score": 40, "average_score": 4, "grade": "良好"})
+        assert agent._model_reasoning(*args) == "【决策结论】观望 测试"
+
+        entries = [json.loads(path.read_text(encoding="utf-8")) for path in (tmp_path / "llm_cache").iterdir()]
+        assert [(entry["provider"], entry["model"]) for entry in entries] == [("openai", "gpt-4o-mini")]
+
+        assert agent._model_reasoning(*args) == "【决策结论】观望 测试"
+        assert len(primary.request_times) == 1 and len(backup.request_times) == 1
+    finally:
+        primary.close()
+        backup.close()
+        ResponseCache._instances.pop(Config.LLM_CACHE_DIR, None)
+        Config.LLM_CACHE_ENABLED, Config.LLM_CACHE_DIR = saved
+        ModelProvider.reset_latency()
+    print("✅ 竞速结果缓存归属测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_hedge_fires_after_delay()
+    test_loser_is_cancelled_and_stream_closed()
+    test_primary_error_fails_over_immediately()
+    test_rank_providers_reorders_after_latency()
+    test_cancelled_loser_does_not_move_ahead()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cached_response_is_tagged_with_winner(Path(tmp))
+    print("\n🎉 所有多提供商竞速测试通过！")
@@ -0,0 +1,120 @@
+"""Fundamental-Q-Agent 模型响应缓存测试：指纹、TTL、条目数淘汰、bypass_cache"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Fundamental-Q-Agent"))
+
+import response_cache
+from config import Config
+from agent import FundamentalQAgent
+from response_cache import ResponseCache
+
+REPLY = "【决策结论】观望 测试\n【关键事实】\nROE: 25%\n【推理逻辑】桩模型\n【风险提示】\n估值偏高"
+
+FACTORS = {
+    "roe": 25, "gross_margin": 40, "cash_flow_ratio": 1.2, "debt_ratio": 40, "pe": 15, "pb": 3,
+    "revenue_growth": 15, "profit_growth": 20, "dividend_yield": 3, "cash_flow_quality": 0.9
+}
+
+
+def test_make_key_covers_every_field():
+    """测试任一提示词、模型、提供商或采样参数变化都得到不同指纹，相同输入指纹稳定"""
+    args = ("系统", "用户", "gpt-4o", "openai", 0.1, 1000)
+    key = ResponseCache.make_key(*args)
+    assert key == ResponseCache.make_key(*args) and len(key) == 64
+    variants = [("系统2", "用户", "gpt-4o", "openai", 0.1, 1000),
+                ("系统", "用户2", "gpt-4o", "openai", 0.1, 1000),
+                ("系统", "用户", "gpt-4o-mini", "openai", 0.1, 1000),
+                ("系统", "用户", "gpt-4o", "kimi", 0.1, 1000),
+                ("系统", "用户", "gpt-4o", "openai", 0.2, 1000),
+                ("系统", "用户", "gpt-4o", "openai", 0.1, 500)]
+    assert len({key} | {ResponseCache.make_key(*variant) for variant in variants}) == len(variants) + 1
+    print("✅ 缓存指纹测试通过")
+
+
+def test_ttl_expires_entries(tmp_path):
+    """测试过期条目不再返回，并从磁盘与索引中删除"""
+    cache = ResponseCache(str(tmp_path), ttl=0.2, max_entries=10)
+    cache.put("k1", "响应", model="gpt-4o", provider="openai")
+    assert cache.get("k1") == "响应"
+    time.sleep(0.25)
+    assert cache.get("k1") is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "k1.json")) and len(cache) == 0
+    assert cache.get("missing") is None
+    print("✅ 缓存TTL测试通过")
+
+
+def test_eviction_uses_index_without_listing_dir(tmp_path):
+    """测试超出条目数上限时淘汰最早写入的条目，写入过程不遍历缓存目录；重新打开时从磁盘恢复索引"""
+    cache = ResponseCache(str(tmp_path), ttl=60, max_entries=3)
+    real_listdir = response_cache.os.listdir
+
+    def fail_listdir(path):
+        raise AssertionError("写入时不应遍历缓存目录")
+
+    response_cache.os.listdir = fail_listdir
+    try:
+        for i in range(5):
+            cache.put(f"k{i}", f"响应{i}")
+        # 覆盖写入已有条目视为最新写入
+        cache.put("k2", "响应2'")
+        cache.put("k5", "响应5")
+    finally:
+        response_cache.os.listdir = real_listdir
+    assert len(cache) == 3
+    assert sorted(os.listdir(str(tmp_path))) == ["k2.json", "k4.json", "k5.json"]
+    assert cache.get("k3") is None and cache.get("k2") == "响应2'"
+
+    reopened = ResponseCache(str(tmp_path), ttl=60, max_entries=3)
+    assert len(reopened) == 3
+    reopened.put("k6", "响应6")
+    assert sorted(os.listdir(str(tmp_path))) == ["k2.json", "k5.json", "k6.json"]
+
+    reopened.clear()
+    assert len(reopened) == 0 and os.listdir(str(tmp_path)) == []
+    print("✅ 缓存淘汰测试通过")
+
+
+def test_bypass_cache_forces_model_call(tmp_path):
+    """测试命中缓存时不调用模型，bypass_cache=True 时重新调用模型并刷新缓存"""
+    saved = {name: getattr(Config, name) for name in ("LLM_CACHE_ENABLED", "LLM_CACHE_DIR", "STORAGE_BACKEND",
+                                                      "FACTOR_CACHE_PATH")}
+    Config.LLM_CACHE_ENABLED = True
+    Config.LLM_CACHE_DIR = str(tmp_path / "llm_cache")
+    Config.STORAGE_BACKEND = "json"
+    Config.FACTOR_CACHE_PATH = str(tmp_path / "factor_cache.json")
+    calls = []
+
+    def create(model, messages, stream=False, **kwargs):
+        calls.append(model)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=REPLY))])
+
+    try:
+        agent = FundamentalQAgent("test", "openai", "gpt-4o")
+        agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        first = agent.analyze("000001", "测试", FACTORS, {})
+        assert agent.analyze("000001", "测试", FACTORS, {}) == first
+        assert calls == ["gpt-4o"]
+        assert agent.analyze("000001", "测试", FACTORS, {}, bypass_cache=True)["conclusion"] == first["conclusion"]
+        assert calls == ["gpt-4o", "gpt-4o"]
+        assert len(ResponseCache.instance()) == 1
+    finally:
+        ResponseCache._instances.pop(Config.LLM_CACHE_DIR, None)
+        for name, value in saved.items():
+            setattr(Config, name, value)
+        FundamentalQAgent.reset_llm_stats()
+    print("✅ bypass_cache 测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_make_key_covers_every_field()
+    for test in (test_ttl_expires_entries, test_eviction_uses_index_without_listing_dir,
+                 test_bypass_cache_forces_model_call):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\n🎉 所有模型响应缓存测试通过！")
@@ -0,0 +1,153 @@
+"""全市场筛选模块测试"""
+import csv
+import json
+import importlib.util
+
+import pytest
+
+from src.buffet_agent import skills
+from src.buffet_agent.data import load_sample_data
+from src.buffet_agent.screening import (iter_universe, iter_universe_chunks, open_result_writer,
+                                        screen_universe, RESULT_FIELDS, LLM_FIELDS)
+
+
+def _write_universe_csv(path, copies=10):
+    records = list(load_sample_data().values())
+    fields = list(records[0])
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for i in range(copies):
+            for j, record in enumerate(records):
+                # 不带后缀的纯数字代码
+                row = dict(record, code=f"{i * 10 + j:06d}")
+                # 缺失单元格
+                row["peg"] = "" if i % 3 == 0 else row["peg"]
+                writer.writerow([row[key] for key in fields])
+    return records
+
+
+def _read_results(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def test_iter_universe_formats(tmp_path):
+    """测试 CSV 保留代码文本、缺失单元格不出现在字典中，JSON 与 CSV 读取一致"""
+    path = tmp_path / "universe.csv"
+    _write_universe_csv(path, copies=1)
+    records = list(iter_universe(str(path)))
+    assert records[0]["code"] == "000000" and records[2]["code"] == "000002"
+    assert "peg" not in records[0]
+    assert records[0]["cash_flow_healthy"] is True and records[0]["roe_ttm"] == 22.5
+
+    json_path = tmp_path / "universe.json"
+    json_path.write_text(json.dumps({r["code"]: r for r in records}, ensure_ascii=False), encoding="utf-8")
+    assert list(iter_universe(str(json_path))) == records
+    print("✅ 股票池读取测试通过")
+
+
+def test_screen_universe_parallel_matches_serial(tmp_path):
+    """测试进程池筛选结果与单进程、逐条评分一致，并输出统计"""
+    path = tmp_path / "universe.csv"
+    _write_universe_csv(path)
+    expected = {}
+    for record in iter_universe(str(path)):
+        safety, fund, moat, risk = (skills.safety_margin(record), skills.fundamental(record),
+                                    skills.moat(record), skills.risk(record))
+        expected[record["code"]] = skills.final_rating([safety, fund, moat, risk])
+
+    outputs = []
+    for workers in (1, 2):
+        out = tmp_path / f"results_{workers}.csv"
+        writer = open_result_writer(str(out), RESULT_FIELDS)
+        try:
+            stats = screen_universe(iter_universe_chunks(str(path), chunk_size=7), writer, workers=workers)
+        finally:
+            writer.close()
+        assert stats["rows"] == 30 and stats["chunks"] == 5
+        assert sum(stats["decisions"].values()) == 30
+        outputs.append(sorted(_read_results(out), key=lambda row: (row["code"], row["avg_score"])))
+
+    assert outputs[0] == outputs[1]
+    for row in outputs[0]:
+        assert int(row["avg_score"]) == expected[row["code"]]["avg"]
+        assert row["warnings"] == "；".join(expected[row["code"]]["all_warnings"])
+    print("✅ 并行筛选测试通过")
+
+
+def test_screen_universe_tolerates_dirty_cells(tmp_path):
+    """测试评分字段中无法解析为数字的单元格按缺失处理，不会中断整个筛选"""
+    path = tmp_path / "universe.csv"
+    records = _write_universe_csv(path, copies=1)
+    fields = list(records[0])
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        dirty = dict(records[0], code="999999", pe="N/A", roe_ttm="-", gross_margin="暂无")
+        csv.writer(f).writerow([dirty[key] for key in fields])
+
+    parsed = list(iter_universe(str(path)))[-1]
+    assert parsed["code"] == "999999" and "pe" not in parsed and "roe_ttm" not in parsed
+    assert parsed["name"] == records[0]["name"]
+
+    out = tmp_path / "results.csv"
+    writer = open_result_writer(str(out), RESULT_FIELDS)
+    try:
+        stats = screen_universe(iter_universe_chunks(str(path), chunk_size=2), writer, workers=1)
+    finally:
+        writer.close()
+    assert stats["rows"] == len(records) + 1
+    row = {row["code"]: row for row in _read_results(out)}["999999"]
+    clean = {key: value for key, value in records[0].items() if key not in ("pe", "roe_ttm", "gross_margin")}
+    safety, fund, moat, risk = (skills.safety_margin(clean), skills.fundamental(clean),
+                                skills.moat(clean), skills.risk(clean))
+    assert int(row["avg_score"]) == skills.final_rating([safety, fund, moat, risk])["avg"]
+    print("✅ 脏数据单元格筛选测试通过")
+
+
+def test_screen_universe_with_llm(tmp_path):
+    """测试筛选时附带大模型分析字段"""
+    path = tmp_path / "universe.csv"
+    _write_universe_csv(path, copies=1)
+    out = tmp_path / "results.csv"
+    writer = open_result_writer(str(out), RESULT_FIELDS + LLM_FIELDS)
+    try:
+        screen_universe(iter_universe_chunks(str(path)), writer, workers=1, with_llm=True, llm_concurrency=2)
+    finally:
+        writer.close()
+    rows = _read_results(out)
+    assert len(rows) == 3 and all(row["llm_recommendation"] for row in rows)
+    print("✅ 筛选大模型分析测试通过")
+
+
+def test_parquet_writer_keeps_schema_across_chunks(tmp_path):
+    """测试 Parquet 列类型预先确定：首个分片某列全为空值时，后续分片仍可写入"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    fields = RESULT_FIELDS + LLM_FIELDS
+    base = {field: None for field in fields}
+    out = tmp_path / "results.parquet"
+    writer = open_result_writer(str(out), fields)
+    try:
+        writer.write([dict(base, code="000001", avg_score=60, llm_recommendation="分析失败: 超时")])
+        writer.write([dict(base, code="600519", avg_score=80, llm_confidence=0.8, llm_risk="低")])
+    finally:
+        writer.close()
+    table = pq.read_table(str(out))
+    assert table.column_names == fields
+    assert str(table.schema.field("llm_confidence").type) == "double"
+    assert table.column("llm_confidence").to_pylist() == [None, 0.8]
+    assert table.column("avg_score").to_pylist() == [60, 80]
+    print("✅ Parquet 列类型测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_iter_universe_formats(Path(tmp))
+        test_screen_universe_parallel_matches_serial(Path(tmp))
+        test_screen_universe_tolerates_dirty_cells(Path(tmp))
+        test_screen_universe_with_llm(Path(tmp))
+        if importlib.util.find_spec("pyarrow"):
+            test_parquet_writer_keeps_schema_across_chunks(Path(tmp))
+    print("\n🎉 所有筛选测试通过！")
@@ -0,0 +1,140 @@
+"""Fundamental-Q-Agent 增量段落解析器测试：任意切分的流式输入与一次性解析结果一致"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Fundamental-Q-Agent"))
+
+from config import Config
+from agent import SectionParser
+
+OUTPUT = (
+    "【决策结论】观望 估值偏高\n"
+    "\n"
+    "【关键事实】\n"
+    "ROE: 25%\n"
+    "毛利率: 40%\n"
+    "净现比: 1.2\n"
+    "资产负债率: 40%\n"
+    "PE: 35\n"
+    "PB: 6\n"
+    "股息率: 1%\n"
+    "【推理逻辑】盈利能力优秀，\n"
+    "  但估值处于历史高位，\r\n"
+    "安全边际不足。\n"
+    "【风险提示】\n"
+    "估值回落\n"
+    "行业竞争加剧\n"
+    "原材料涨价\n"
+    "政策变化\n"
+    "汇率波动"
+)
+
+
+def _legacy_parse(analysis_result):
+    """改为增量解析前 _format_output 的一次性解析逻辑"""
+    lines = analysis_result.strip().split('\n')
+    result = {"conclusion": "", "key_facts": [], "reasoning": "", "risks": []}
+    current_section = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("【决策结论】"):
+            current_section = "conclusion"
+            result["conclusion"] = line.replace("【决策结论】", "").strip()
+        elif line.startswith("【关键事实】"):
+            current_section = "key_facts"
+        elif line.startswith("【推理逻辑】"):
+            current_section = "reasoning"
+            result["reasoning"] = line.replace("【推理逻辑】", "").strip()
+        elif line.startswith("【风险提示】"):
+            current_section = "risks"
+        elif current_section == "key_facts":
+            result["key_facts"].append(line)
+        elif current_section == "reasoning":
+            result["reasoning"] += " " + line
+        elif current_section == "risks":
+            result["risks"].append(line)
+    result["key_facts"] = result["key_facts"][:Config.MAX_KEY_FACTS]
+    result["risks"] = result["risks"][:Config.MAX_RISKS]
+    return result
+
+
+def _parse_chunks(chunks):
+    parser = SectionParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    events.extend(parser.close())
+    return parser.result, events
+
+
+def test_split_mid_line_and_mid_header():
+    """测试在行中间与段落标题中间切分时，只有完整行才产生内容"""
+    parser = SectionParser()
+    assert parser.feed("【决策") == []
+    assert parser.feed("结论】观望 估") == []
+    assert parser.feed("值偏高\n【关键") == [("conclusion", "观望 估值偏高")]
+    assert parser.feed("事实】\nROE: 2") == []
+    assert parser.snapshot()["key_facts"] == []
+    assert parser.feed("5%\n【推理逻辑】盈利") == [("key_facts", "ROE: 25%")]
+    assert parser.feed("能力优秀\n") == [("reasoning", "盈利能力优秀")]
+    assert parser.feed("【风险提示】\n估值回落") == []
+    assert parser.snapshot()["risks"] == []
+    print("✅ 行中间与标题中间切分测试通过")
+
+
+def test_close_flushes_last_line_without_newline():
+    """测试末尾没有换行符的最后一行在 close() 时解析，再次 close() 不重复"""
+    parser = SectionParser()
+    parser.feed("【风险提示】\n估值回落\n汇率波动")
+    assert parser.result["risks"] == ["估值回落"]
+    assert parser.close() == [("risks", "汇率波动")]
+    assert parser.close() == []
+    assert parser.result["risks"] == ["估值回落", "汇率波动"]
+
+    parser = SectionParser()
+    assert parser.feed("【决策结论】买入") == []
+    assert parser.close() == [("conclusion", "买入")]
+    print("✅ close() 处理末行测试通过")
+
+
+def test_parity_with_one_shot_parse_for_every_split():
+    """测试任意位置切分为两段或逐字符输入时，结果与旧的一次性解析一致（含数量上限）"""
+    expected = _legacy_parse(OUTPUT)
+    assert len(expected["key_facts"]) == Config.MAX_KEY_FACTS
+    assert len(expected["risks"]) == Config.MAX_RISKS
+
+    for i in range(len(OUTPUT) + 1):
+        result, _ = _parse_chunks([OUTPUT[:i], OUTPUT[i:]])
+        assert result == expected, f"在第{i}个字符处切分时结果不一致"
+
+    result, events = _parse_chunks(list(OUTPUT))
+    assert result == expected
+    # 超出上限的事实与风险不产生事件
+    assert [content for section, content in events if section == "key_facts"] == expected["key_facts"]
+    assert [content for section, content in events if section == "risks"] == expected["risks"]
+    print("✅ 与一次性解析一致性测试通过")
+
+
+def test_parity_respects_configured_caps():
+    """测试修改 MAX_KEY_FACTS/MAX_RISKS 后增量解析与一次性解析的截断一致"""
+    saved = (Config.MAX_KEY_FACTS, Config.MAX_RISKS)
+    try:
+        for max_key_facts, max_risks in ((1, 1), (2, 0), (10, 10)):
+            Config.MAX_KEY_FACTS, Config.MAX_RISKS = max_key_facts, max_risks
+            result, _ = _parse_chunks([OUTPUT[j:j + 7] for j in range(0, len(OUTPUT), 7)])
+            assert result == _legacy_parse(OUTPUT)
+            assert len(result["key_facts"]) == min(max_key_facts, 7)
+            assert len(result["risks"]) == min(max_risks, 5)
+    finally:
+        Config.MAX_KEY_FACTS, Config.MAX_RISKS = saved
+    print("✅ 数量上限一致性测试通过")
+
+
+if __name__ == "__main__":
+    test_split_mid_line_and_mid_header()
+    test_close_flushes_last_line_without_newline()
+    test_parity_with_one_shot_parse_for_every_split()
+    test_parity_respects_configured_caps()
+    print("\n🎉 所有增量段落解析器测试通过！")
@@ -0,0 +1,107 @@
+"""会话管理模块测试"""
+import json
+import threading
+
+import api
+from src.buffet_agent.session import SessionManager
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sessions_isolated_and_evicted():
+    """测试会话隔离、空闲超时淘汰与会话数上限"""
+    clock = _FakeClock()
+    manager = SessionManager(idle_timeout=10, max_sessions=2, sweep_interval=0, clock=clock)
+    sid_a, agent_a = manager.get_or_create()
+    assert manager.get_or_create(sid_a) == (sid_a, agent_a)
+    sid_b, agent_b = manager.get_or_create()
+    assert agent_b is not agent_a and len(sid_b) == 32
+
+    # 达到上限时淘汰最久未使用的会话
+    clock.now = 1
+    assert manager.get(sid_a) is agent_a
+    manager.get_or_create()
+    assert manager.get(sid_b) is None
+    assert manager.get(sid_a) is agent_a
+    assert len(manager) == 2
+
+    # 空闲超时后会话失效，新建的会话分配新ID，不沿用旧ID
+    clock.now = 20
+    assert manager.get(sid_a) is None
+    renewed_id, renewed = manager.get_or_create(sid_a)
+    assert renewed is not agent_a and renewed_id != sid_a
+    assert manager.get(sid_a) is None
+    # 未知的会话ID同样分配新ID
+    assert manager.get_or_create("unknown")[0] != "unknown"
+    # 创建会话时顺带清理了超时的会话
+    assert len(manager) == 2
+
+    clock.now = 40
+    assert manager.evict_idle() == 2
+    assert len(manager) == 0
+    print("✅ 会话隔离与淘汰测试通过")
+
+
+def test_concurrent_creation_returns_one_agent():
+    """测试并发创建同一会话只得到一个智能体"""
+    manager = SessionManager()
+    session_id, agent = manager.get_or_create()
+    agents = [agent]
+    threads = [threading.Thread(target=lambda: agents.append(manager.get_or_create(session_id)[1]))
+               for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(agent) for agent in agents}) == 1
+    print("✅ 并发创建会话测试通过")
+
+
+def _post(client, path, payload, headers=None):
+    with client.post(path, json=payload, headers=headers or {}) as response:
+        return response.status_code, json.loads(response.get_data(as_text=True)), response.headers
+
+
+def test_api_follow_ups_do_not_cross_sessions():
+    """测试不同客户端的分析与追问历史互不影响"""
+    client = api.app.test_client()
+    status, body, headers = _post(client, "/api/analyze", {"code": "600519.SH", "user_question": "护城河如何？"})
+    assert status == 200
+    session_a = body["session_id"]
+    assert headers["X-Session-ID"] == session_a
+
+    assert body["session_expired"] is False
+
+    status, body, _ = _post(client, "/api/ask", {"question": "什么是安全边际？"}, {"X-Session-ID": session_a})
+    assert status == 200 and body["session_id"] == session_a and body["session_expired"] is False
+
+    status, body, _ = _post(client, "/api/ask", {"question": "什么是护城河？"})
+    session_b = body["session_id"]
+    assert session_b != session_a
+
+    history_a = api.sessions.get(session_a).get_conversation_history()
+    history_b = api.sessions.get(session_b).get_conversation_history()
+    assert [m["content"] for m in history_a if m["role"] == "user"] == ["护城河如何？", "什么是安全边际？"]
+    assert [m["content"] for m in history_b if m["role"] == "user"] == ["什么是护城河？"]
+
+    # 未知或已超时的会话ID：分配新ID并标记 session_expired
+    status, body, headers = _post(client, "/api/ask", {"question": "追问", "session_id": "expired-session"})
+    assert status == 200 and body["session_expired"] is True
+    assert body["session_id"] != "expired-session" and headers["X-Session-ID"] == body["session_id"]
+
+    status, body, _ = _post(client, "/api/ask", {"question": "追问", "session_id": "bad id!"})
+    assert status == 400
+    print("✅ API会话隔离测试通过")
+
+
+if __name__ == "__main__":
+    test_sessions_isolated_and_evicted()
+    test_concurrent_creation_returns_one_agent()
+    test_api_follow_ups_do_not_cross_sessions()
+    print("\n🎉 所有会话管理测试通过！")
@@ -24,4 +24,59 @@ def test_moat():
     res = skills.moat(data)
     assert res["score"] >= 70
     assert res["level"] == "强护城河"
-    print("✅ 护城河测试通过")
\ No newline at end of file
+    print("✅ 护城河测试通过")
+
+def test_score_batch_matches_per_dict():
+    import random
+    from src.buffet_agent.batch import records_to_frame, score_records_loop
+    from src.buffet_agent.data import load_sample_data
+
+    rng = random.Random(7)
+    records = list(load_sample_data().values())
+    for _ in range(500):
+        record = {
+            "pe": rng.choice([None, rng.uniform(-10, 120)]),
+            "peg": rng.choice([None, round(rng.uniform(0, 3), 2)]),
+            "pe_hist_percent": rng.choice([None, rng.randint(0, 100)]),
+            "pb_hist_percent": rng.choice([None, rng.randint(0, 100)]),
+            "roe_ttm": rng.choice([None, 15, 20, rng.uniform(-5, 40)]),
+            "debt_to_asset": rng.choice([None, 40, 50, 60, 70, rng.uniform(0, 100)]),
+            "revenue_growth": rng.choice([None, 8, 10, rng.uniform(-20, 40)]),
+            "profit_growth": rng.choice([None, 0, 5, rng.uniform(-20, 40)]),
+            "gross_margin": rng.choice([None, 30, 40, rng.uniform(0, 90)]),
+            "cash_flow_healthy": rng.choice([None, True, False]),
+        }
+        records.append({k: v for k, v in record.items() if v is not None})
+
+    frame = records_to_frame(records)
+    batch = skills.score_batch(frame)
+    assert len(batch) == len(records)
+    expected = score_records_loop(records)
+    for i, record in enumerate(records):
+        assert batch.record(i) == record
+        assert batch.row(i) == expected[i]
+        assert batch.avg[i] == expected[i]["final_rating"]["avg"]
+        assert batch.decision[i] == expected[i]["final_rating"]["decision"]
+    print("✅ 批量评分一致性测试通过")
+
+
+def test_score_batch_numpy_columns():
+    import numpy as np
+    from src.buffet_agent.batch import score_records_loop
+
+    frame = {
+        "pe": np.array([15.2, 60.0, np.nan]),
+        "pe_hist_percent": np.array([22.0, 80.0, 10.0]),
+        "roe_ttm": np.array([22.5, 12.0, np.nan]),
+        "cash_flow_healthy": np.array([True, False, True]),
+    }
+    batch = skills.score_batch(frame)
+    expected = score_records_loop(batch.record(i) for i in range(len(batch)))
+    assert [batch.row(i) for i in range(len(batch))] == expected
+    assert batch.row(0)["safety_margin"]["reason"][0] == "PE处于历史低分位(22.0%)"
+
+    # 字典输入中无法解析为数字的值按缺失处理
+    dirty = skills.score_batch({"pe": [15.2, "N/A", None], "roe_ttm": ["22.5", "-", 12.0]})
+    clean = skills.score_batch({"pe": [15.2, None, None], "roe_ttm": [22.5, None, 12.0]})
+    assert [dirty.row(i)["final_rating"] for i in range(3)] == [clean.row(i)["final_rating"] for i in range(3)]
+    print("✅ 批量评分NumPy列测试通过")
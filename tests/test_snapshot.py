@@ -0,0 +1,79 @@
+"""股票池快照测试"""
+import numpy as np
+
+from src.buffet_agent import data as data_module
+from src.buffet_agent import skills
+from src.buffet_agent.batch import score_records_loop
+from src.buffet_agent.snapshot import write_snapshot, open_snapshot
+
+
+def _universe():
+    universe = dict(data_module.load_sample_data())
+    # 缺失字段与非整数值
+    universe["300001.SZ"] = {"code": "300001.SZ", "name": "缺失字段公司", "pe": 8, "roe_ttm": 18.5}
+    return universe
+
+
+def test_snapshot_round_trip(tmp_path):
+    """测试快照按行读取与原始字典一致，按列读取为内存映射的只读数组"""
+    universe = _universe()
+    path = str(tmp_path / "universe.snap")
+    write_snapshot(universe, path)
+    snapshot = open_snapshot(path)
+
+    assert len(snapshot) == len(universe) and list(snapshot) == list(universe)
+    for code, record in universe.items():
+        assert snapshot[code] == record
+        assert snapshot[code].to_dict() == record
+    row = snapshot["300001.SZ"]
+    assert "pb" not in row and row.get("cash_flow_healthy") is None
+    assert isinstance(snapshot["600519.SH"]["cash_flow_healthy"], bool)
+    assert snapshot.row(-1)["name"] == "缺失字段公司"
+
+    pe = snapshot.columns["pe"]
+    assert not pe.flags.owndata
+    assert not pe.flags.writeable
+    assert np.isnan(snapshot.columns["pb"][-1])
+    snapshot.close()
+    print("✅ 快照读写测试通过")
+
+
+def test_snapshot_columns_feed_batch_scoring(tmp_path):
+    """测试快照列可直接用于批量评分，结果与逐条评分一致"""
+    universe = _universe()
+    path = str(tmp_path / "universe.snap")
+    write_snapshot(universe, path)
+    snapshot = open_snapshot(path)
+
+    batch = skills.score_batch(snapshot.frame)
+    expected = score_records_loop(universe.values())
+    assert [batch.row(i) for i in range(len(batch))] == expected
+    print("✅ 快照批量评分测试通过")
+
+
+def test_load_sample_data_uses_snapshot(tmp_path, monkeypatch):
+    """测试配置快照路径后 load_sample_data/load_data 从快照读取"""
+    path = str(tmp_path / "universe.snap")
+    write_snapshot(_universe(), path)
+    monkeypatch.setattr(data_module, "UNIVERSE_SNAPSHOT_PATH", path)
+
+    universe = data_module.load_sample_data()
+    assert universe is data_module.load_sample_data()
+    assert data_module.load_data("300001.SZ")["name"] == "缺失字段公司"
+    assert list(data_module.load_data(["300001.SZ", "missing"])) == ["300001.SZ"]
+    print("✅ 快照加载测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    class _MonkeyPatch:
+        def setattr(self, target, name, value):
+            setattr(target, name, value)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_snapshot_round_trip(Path(tmp))
+        test_snapshot_columns_feed_batch_scoring(Path(tmp))
+        test_load_sample_data_uses_snapshot(Path(tmp), _MonkeyPatch())
+    print("\n🎉 所有快照测试通过！")
@@ -0,0 +1,125 @@
+"""Fundamental-Q-Agent SQLite存储测试：JSON一次性迁移、去重、并发写入"""
+import os
+import sys
+import json
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Fundamental-Q-Agent"))
+
+from config import Config
+from sqlite_store import SQLiteStore
+from storage import Storage
+
+
+class _Paths:
+    """把存储路径指向临时目录，退出时恢复配置"""
+
+    NAMES = ("STORAGE_BACKEND", "SQLITE_DB_PATH", "OBSERVATION_POOL_PATH", "FACTOR_CACHE_PATH")
+
+    def __init__(self, tmp_path):
+        self.values = {
+            "STORAGE_BACKEND": "sqlite",
+            "SQLITE_DB_PATH": str(tmp_path / "fundamental_q.db"),
+            "OBSERVATION_POOL_PATH": str(tmp_path / "observation_pool.json"),
+            "FACTOR_CACHE_PATH": str(tmp_path / "factor_cache.json"),
+        }
+        self.saved = {}
+
+    def __enter__(self):
+        for name in self.NAMES:
+            self.saved[name] = getattr(Config, name)
+            setattr(Config, name, self.values[name])
+        return self
+
+    def __exit__(self, *exc):
+        SQLiteStore._instances.pop(Config.SQLITE_DB_PATH, None)
+        for name, value in self.saved.items():
+            setattr(Config, name, value)
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def test_json_migration_runs_once(tmp_path):
+    """测试首次打开时导入JSON观察池（重复代码只保留第一条）与因子缓存，之后不再重复导入"""
+    with _Paths(tmp_path):
+        _write_json(Config.OBSERVATION_POOL_PATH, {"stocks": [
+            {"code": "600519", "name": "贵州茅台", "conclusion": "买入"},
+            {"code": "000858", "name": "五粮液", "conclusion": "观望"},
+            {"code": "600519", "name": "重复记录", "conclusion": "不碰"},
+        ]})
+        _write_json(Config.FACTOR_CACHE_PATH, {"600519": {"roe": 30}, "000858": {"roe": 25}})
+
+        assert [stock["name"] for stock in Storage.get_observation_pool()] == ["贵州茅台", "五粮液"]
+        assert Storage.get_factor_cache("000858") == {"roe": 25}
+
+        # JSON文件之后的修改不会再次导入
+        _write_json(Config.OBSERVATION_POOL_PATH, {"stocks": [{"code": "300750", "name": "宁德时代"}]})
+        Storage.remove_from_observation_pool("000858")
+        store = SQLiteStore(Config.SQLITE_DB_PATH)
+        assert [stock["code"] for stock in store.get_observation_pool()] == ["600519"]
+    print("✅ JSON一次性迁移测试通过")
+
+
+def test_add_dedupes_and_update_rejects_code_conflict(tmp_path):
+    """测试重复添加返回False；更新时改为已存在的代码返回False且不修改数据"""
+    with _Paths(tmp_path):
+        assert Storage.add_to_observation_pool({"code": "600519", "name": "贵州茅台"})
+        assert not Storage.add_to_observation_pool({"code": "600519", "name": "贵州茅台"})
+        assert Storage.add_to_observation_pool({"code": "000858", "name": "五粮液"})
+
+        assert not Storage.update_observation_pool("000858", {"code": "600519"})
+        assert not Storage.update_observation_pool("999999", {"name": "不存在"})
+        assert [stock["code"] for stock in Storage.get_observation_pool()] == ["600519", "000858"]
+
+        assert Storage.update_observation_pool("000858", {"code": "000568", "name": "泸州老窖"})
+        assert Storage.get_observation_pool()[1] == {"code": "000568", "name": "泸州老窖"}
+    print("✅ 观察池去重与代码冲突测试通过")
+
+
+def test_concurrent_writers(tmp_path):
+    """测试多线程、多个存储实例（模拟多个进程）并发写入不丢数据、不重复"""
+    with _Paths(tmp_path):
+        stores = [SQLiteStore.instance(), SQLiteStore(Config.SQLITE_DB_PATH)]
+        added = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(n):
+            store = stores[n % len(stores)]
+            try:
+                for i in range(30):
+                    code = f"{i:06d}"
+                    if store.add_to_observation_pool({"code": code, "writer": n}):
+                        with lock:
+                            added.append(code)
+                    assert store.set_factor_cache_many({f"{n}-{i}": {"writer": n, "i": i}, code: {"writer": n}})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert sorted(added) == [f"{i:06d}" for i in range(30)]
+        pool = stores[0].get_observation_pool()
+        assert len(pool) == 30 and len({stock["code"] for stock in pool}) == 30
+        assert all(stores[1].get_factor_cache(f"{n}-{i}") == {"writer": n, "i": i}
+                   for n in range(6) for i in range(30))
+    print("✅ 并发写入测试通过")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_json_migration_runs_once, test_add_dedupes_and_update_rejects_code_conflict,
+                 test_concurrent_writers):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\n🎉 所有SQLite存储测试通过！")
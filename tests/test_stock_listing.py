@@ -0,0 +1,75 @@
+"""股票列表接口测试"""
+import gzip
+import json
+
+import api
+from src.buffet_agent.stock_listing import StockListing
+
+
+def _universe(count):
+    return {f"{i:06d}.{'SH' if i % 2 else 'SZ'}": {"name": f"公司{i}", "industry": "银行" if i % 3 == 0 else "白酒"}
+            for i in range(count)}
+
+
+def test_listing_rendered_once_per_version():
+    """测试同一数据版本只序列化一次，重新加载后失效"""
+    listing = StockListing(_universe(10))
+    first = listing.render(market="sh")
+    assert listing.render(market="SH") is first
+    body = json.loads(first.body)
+    assert body["total"] == 5 and all(s["market"] == "SH" for s in body["data"])
+    assert gzip.decompress(first.gzipped) == first.body
+
+    page = json.loads(listing.render(industry="白酒", page=2, page_size=3).body)
+    assert page["total"] == 6 and page["page"] == 2
+    assert [s["code"] for s in page["data"]] == ["000005.SH", "000007.SH", "000008.SZ"]
+
+    listing.load(_universe(4))
+    assert listing.version == 2
+    assert json.loads(listing.render(market="SH").body)["total"] == 2
+    print("✅ 股票列表缓存测试通过")
+
+
+def test_stocks_endpoint_etag_gzip_and_pagination():
+    """测试 /api/stocks 的ETag/304、gzip与分页"""
+    client = api.app.test_client()
+    response = client.get("/api/stocks")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["success"] and body["total"] == len(api.sample_data)
+    assert {"code", "name", "industry", "market"} <= set(body["data"][0])
+    etag = response.headers["ETag"]
+
+    response = client.get("/api/stocks", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.get_data() == b""
+    # 弱校验器与 * 同样命中
+    for header in (f"W/{etag}", f'"other", W/{etag}', "*"):
+        assert client.get("/api/stocks", headers={"If-None-Match": header}).status_code == 304
+
+    response = client.get("/api/stocks", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.get_data())) == body
+    gzip_etag = response.headers["ETag"]
+    assert gzip_etag != etag
+
+    # 每种内容编码只匹配自己的ETag
+    response = client.get("/api/stocks", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    assert response.status_code == 304 and response.headers["ETag"] == gzip_etag
+    response = client.get("/api/stocks", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["Content-Encoding"] == "gzip"
+    response = client.get("/api/stocks", headers={"If-None-Match": gzip_etag})
+    assert response.status_code == 200 and "Content-Encoding" not in response.headers
+
+    response = client.get("/api/stocks?market=SZ&page_size=1")
+    paged = response.get_json()
+    assert paged["page"] == 1 and paged["page_size"] == 1 and len(paged["data"]) == 1
+    assert response.headers["ETag"] != etag
+
+    assert client.get("/api/stocks?page=0").status_code == 400
+    print("✅ 股票列表接口测试通过")
+
+
+if __name__ == "__main__":
+    test_listing_rendered_once_per_version()
+    test_stocks_endpoint_etag_gzip_and_pagination()
+    print("\n🎉 所有股票列表测试通过！")